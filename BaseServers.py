@@ -1,15 +1,245 @@
 from socket import htons
 from socketserver import ThreadingTCPServer, ThreadingUDPServer, BaseServer, ThreadingMixIn
 from sys import platform
-from threading import Thread
+from threading import Thread, Lock
+from time import monotonic, perf_counter
 
+from Profiling import SamplingProfiler
 from RawPacket import MAC_Address
 
 
+class TokenBucket(object):
+    __slots__ = ('rate', 'capacity', 'tokens', 'stamp')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = monotonic()
+
+    def consume(self, now, cost=1):
+        """
+        Refill the bucket for the time passed and try to take <cost> tokens from it
+
+        :param now: float: Current monotonic time
+        :param cost: int: Number of tokens the request costs
+        :return: bool: True if the tokens were available
+        """
+        # <now> can be a little older than the bucket, IE: taken just before creating it
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.stamp) * self.rate)
+        self.stamp = max(now, self.stamp)
+
+        if self.tokens >= cost:
+            self.tokens = self.tokens - cost
+            return True
+        return False
+
+    def is_full(self, now):
+        return self.tokens + (now - self.stamp) * self.rate >= self.capacity
+
+
+# Admission layer shared by the servers.
+# Decides if a request is handled before a handler (or thread) is created for it.
+class AdmissionControl(object):
+    def __init__(self, rate=0, burst=0, max_active=0, max_per_client=0, max_tracked=65536):
+        """
+        :param rate: float: Requests per second each client may make. 0 disables rate limiting
+        :param burst: int: Requests a client may make at once. Defaults to <rate>
+        :param max_active: int: Requests the server handles at once. 0 disables the cap
+        :param max_per_client: int: Requests a single client may have in progress. 0 disables the cap
+        :param max_tracked: int: Number of client buckets kept before idle ones are dropped
+        """
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.max_active = max_active
+        self.max_per_client = max_per_client
+        self.max_tracked = max_tracked
+
+        self.lock = Lock()
+        self.buckets = dict()  # Keys will be the client. IE: IP address
+        self.connections = dict()  # Keys will be the request key, values the client that made it
+        self.clients = dict()  # Keys will be the client, values the number of requests in progress
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def admit(self, client, key):
+        """
+        Check if a request from <client> is allowed and record it in the connection table
+
+        :param client: Identity of the client. IE: IP or MAC address
+        :param key: Unique key of the request, used to release it later
+        :return: bool
+        """
+        with self.lock:
+            if self.max_active and len(self.connections) >= self.max_active:
+                self.rejected = self.rejected + 1
+                return False
+
+            active = self.clients.get(client, 0)
+            if self.max_per_client and active >= self.max_per_client:
+                self.rejected = self.rejected + 1
+                return False
+
+            if self.rate:
+                now = monotonic()
+                try:
+                    bucket = self.buckets[client]
+                except KeyError:
+                    if len(self.buckets) >= self.max_tracked:
+                        self._prune(now)
+                    bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+
+                if not bucket.consume(now):
+                    self.rejected = self.rejected + 1
+                    return False
+
+            self.connections[key] = client
+            self.clients[client] = active + 1
+            self.admitted = self.admitted + 1
+            return True
+
+    def release(self, key):
+        """
+        Remove a finished request from the connection table.
+        Does nothing for requests that were never admitted.
+
+        :param key: Key the request was admitted with
+        :return: None
+        """
+        with self.lock:
+            client = self.connections.pop(key, None)
+            if client is None:
+                return
+
+            active = self.clients[client] - 1
+            if active:
+                self.clients[client] = active
+            else:
+                del self.clients[client]
+
+    def _prune(self, now):
+        # Drop buckets of clients that have been idle long enough to refill.
+        self.buckets = {client: bucket for client, bucket in self.buckets.items() if not bucket.is_full(now)}
+
+        if len(self.buckets) >= self.max_tracked:
+            # Every tracked client is busy, keep the most recently added half.
+            clients = list(self.buckets)[len(self.buckets) // 2:]
+            self.buckets = {client: self.buckets[client] for client in clients}
+
+    @property
+    def active(self):
+        return len(self.connections)
+
+    def __contains__(self, client):
+        return client in self.clients
+
+    def __len__(self):
+        return len(self.connections)
+
+
+# Adds optional admission control to a socketserver server.
+# Enabled through enable_admission, or by setting the admission attribute to an AdmissionControl.
+# The DHCP and DHCPv6 servers call enable_admission with the [admission] section of their config.ini.
+class AdmissionMixIn(object):
+    admission = None
+
+    def enable_admission(self, rate=0, burst=0, max_active=0, max_per_client=0):
+        """
+        Limit the requests the server handles. Call before the server is started.
+        With every limit at 0 admission control is turned off.
+
+        :param rate: float: Requests per second each client may make. 0 disables rate limiting
+        :param burst: int: Requests a client may make at once. Defaults to <rate>
+        :param max_active: int: Requests the server handles at once. 0 disables the cap
+        :param max_per_client: int: Requests a single client may have in progress. 0 disables the cap
+        :return: AdmissionControl or None
+        """
+        if rate or max_active or max_per_client:
+            self.admission = AdmissionControl(rate, burst, max_active, max_per_client)
+        else:
+            self.admission = None
+        return self.admission
+
+    def client_key(self, client_address):
+        # Clients are identified by IP address
+        return client_address[0]
+
+    def verify_request(self, request, client_address):
+        if self.admission is None:
+            return True
+        return self.admission.admit(self.client_key(client_address), id(request))
+
+    def shutdown_request(self, request):
+        if self.admission is not None:
+            self.admission.release(id(request))
+        super().shutdown_request(request)
+
+
+# Adds per request hooks and a runtime toggled sampling profiler to a socketserver server.
+class HookMixIn(object):
+    hooks = ()
+    profiler = None
+
+    def add_hook(self, hook):
+        # Hooks are replaced rather than mutated so running handlers keep a consistent view
+        self.hooks = (*self.hooks, hook)
+
+    def remove_hook(self, hook):
+        self.hooks = tuple(item for item in self.hooks if item is not hook)
+
+    def finish_request(self, request, client_address):
+        hooks = self.hooks
+        if not hooks:
+            super().finish_request(request, client_address)
+            return
+
+        for hook in hooks:
+            hook.before(self, request, client_address)
+
+        error = None
+        start = perf_counter()
+        try:
+            super().finish_request(request, client_address)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            for hook in hooks:
+                hook.after(self, request, client_address, elapsed, error)
+
+    def start_profiling(self, interval=0.005):
+        """
+        Start sampling the threads handling requests for this server
+
+        :param interval: float: Seconds between samples
+        :return: SamplingProfiler
+        """
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval, f'{self.__class__.__name__} Profiler')
+            self.add_hook(self.profiler)
+            self.profiler.start()
+        return self.profiler
+
+    def stop_profiling(self):
+        """
+        Stop sampling. The returned profiler still holds the collected stacks.
+
+        :return: SamplingProfiler or None
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            self.remove_hook(profiler)
+            profiler.stop()
+            self.profiler = None
+        return profiler
+
+
 # Base server that runs in it's own daemonic thread
 # Allows you to operate on server while running
 # IE: stop it, change a variable, etc
-class BaseTCPServer(Thread, ThreadingTCPServer):
+class BaseTCPServer(Thread, AdmissionMixIn, HookMixIn, ThreadingTCPServer):
     def __init__(self, ip, port, handler):
         ThreadingTCPServer.__init__(self, (ip, port), handler)
         Thread.__init__(self, target=self.serve_forever)
@@ -31,7 +261,7 @@ class BaseTCPServer(Thread, ThreadingTCPServer):
 # Base server that runs in it's own daemonic thread
 # Allows you to operate on server while running
 # IE: stop it, change a variable, etc
-class BaseUDPServer(Thread, ThreadingUDPServer):
+class BaseUDPServer(Thread, AdmissionMixIn, HookMixIn, ThreadingUDPServer):
     def __init__(self, ip, port, handler):
         ThreadingUDPServer.__init__(self, (ip, port), handler)
         Thread.__init__(self, target=self.serve_forever)
@@ -54,7 +284,7 @@ if ('linux' in platform):
     import socket
 
 
-    class BaseRawServer(BaseServer, ThreadingMixIn, Thread):
+    class BaseRawServer(AdmissionMixIn, HookMixIn, BaseServer, ThreadingMixIn, Thread):
 
         address_family = socket.AF_PACKET
 
@@ -66,14 +296,27 @@ if ('linux' in platform):
 
         max_packet_size = 65536
 
-        def __init__(self, interface, RequestHandlerClass, bind_and_activate=True, *, ethertype=0x0800):
-            """Constructor.  May be extended, do not override."""
+        def __init__(self, interface, RequestHandlerClass, bind_and_activate=True, *, ethertype=0x0800,
+                     sock=None, mac_address=0):
+            """Constructor.  May be extended, do not override.
+
+            A connected socket (IE: one end of a socketpair) can be given as <sock>
+            to stand in for the raw socket. It is used as is and <mac_address>
+            becomes the address of the server.
+
+            """
             BaseServer.__init__(self, (interface, 0), RequestHandlerClass)
             Thread.__init__(self, target=self.serve_forever)
 
-            self.socket = socket.socket(self.address_family,
-                                        self.socket_type,
-                                        htons(ethertype))
+            if sock is not None:
+                self.socket = sock
+                self.server_address = (interface, ethertype, 0, 1, MAC_Address(mac_address))
+                self.mac_address = self.server_address[-1]
+                bind_and_activate = False
+            else:
+                self.socket = socket.socket(self.address_family,
+                                            self.socket_type,
+                                            htons(ethertype))
             if bind_and_activate:
                 try:
                     self.server_bind()
@@ -119,14 +362,18 @@ if ('linux' in platform):
             """
             return self.socket.fileno()
 
-        def get_request(self):
-            data, client_addr = self.socket.recvfrom(self.max_packet_size)
-            client_addr = (*client_addr[:-1], MAC_Address(client_addr[-1]))
+        def get_request(self, flags=0):
+            data, client_addr = self.socket.recvfrom(self.max_packet_size, flags)
+            if client_addr:
+                client_addr = (*client_addr[:-1], MAC_Address(client_addr[-1]))
+            else:
+                # Stand in sockets have no link layer address, use the source of the frame.
+                client_addr = (*self.server_address[:-1], MAC_Address(data[6:12]))
             return (data, self.socket), client_addr
 
-        def shutdown_request(self, request):
-            # No need to shutdown anything.
-            self.close_request(request)
+        def client_key(self, client_address):
+            # Raw clients are identified by MAC address
+            return client_address[-1]
 
         def close_request(self, request):
             # No need to close anything.
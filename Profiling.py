@@ -0,0 +1,143 @@
+from collections import Counter
+from os import path
+from sys import _current_frames
+from threading import Thread, Event, Lock, get_ident
+
+
+# Base class for per request hooks.
+# Hooks are added to a server with server.add_hook(hook)
+# and are called around every request the server handles.
+class RequestHook(object):
+    def before(self, server, request, client_address):
+        """
+        Called before a handler is created for the request
+
+        :param server: Server handling the request
+        :param request: Request as given to the handler
+        :param client_address: Address of the client
+        :return: None
+        """
+        pass
+
+    def after(self, server, request, client_address, elapsed, error):
+        """
+        Called after the handler has finished with the request
+
+        :param server: Server handling the request
+        :param request: Request as given to the handler
+        :param client_address: Address of the client
+        :param elapsed: float: Seconds spent in the handler (setup, handle and finish)
+        :param error: Exception raised by the handler or None
+        :return: None
+        """
+        pass
+
+
+class TimingHook(RequestHook):
+    def __init__(self):
+        self.lock = Lock()
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def after(self, server, request, client_address, elapsed, error):
+        with self.lock:
+            self.count = self.count + 1
+            self.total = self.total + elapsed
+            self.max = max(self.max, elapsed)
+            if error is not None:
+                self.errors = self.errors + 1
+
+    @property
+    def mean(self):
+        if self.count:
+            return self.total / self.count
+        return 0.0
+
+
+# Statistical profiler that samples the stacks of threads
+# while they are handling a request for the server it is hooked into.
+class SamplingProfiler(RequestHook):
+    def __init__(self, interval=0.005, name='Sampling Profiler'):
+        self.interval = interval
+        self.name = name
+
+        self.threads = set()  # Idents of the threads currently handling a request
+        self.stacks = Counter()  # Keys will be a collapsed stack, values the number of samples
+        self.samples = 0
+
+        self.lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def before(self, server, request, client_address):
+        self.threads.add(get_ident())
+
+    def after(self, server, request, client_address, elapsed, error):
+        self.threads.discard(get_ident())
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = Thread(target=self.run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = _current_frames()
+
+        with self.lock:
+            for ident in tuple(self.threads):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+
+                stack = list()
+                while frame is not None:
+                    code = frame.f_code
+                    module = frame.f_globals.get('__name__', path.basename(code.co_filename))
+                    name = getattr(code, 'co_qualname', code.co_name)
+                    stack.append(f'{module}:{name}:{code.co_firstlineno}')
+                    frame = frame.f_back
+
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples = self.samples + 1
+
+    def clear(self):
+        with self.lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def collapsed(self):
+        """
+        Samples in collapsed stack format, one stack per line.
+        Can be fed straight into flamegraph.pl or speedscope.
+
+        :return: str
+        """
+        with self.lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def dump(self, file):
+        """
+        Write the collapsed stacks to a file
+
+        :param file: str: Location of the file to write to
+        :return: None
+        """
+        with open(file, 'w') as fd:
+            fd.write(self.collapsed())
@@ -48,6 +48,31 @@ class MAC_Address(object):
         return hash(self._address)
 
 
+def checksum(data):
+    """
+    Internet checksum (RFC 1071) of data.
+
+    Since 0x10000 is 1 mod 0xffff, the one's complement sum of all the 2 byte
+    words of data is the whole of data, as one big number, mod 0xffff. That
+    gets the sum done by int.from_bytes instead of a word at a time.
+
+    :param data: bytes-like object
+    :return: int
+    """
+    if (len(data) % 2 != 0):
+        # Make sure there is an even number of bytes
+        data = bytes(data) + b'\x00'
+
+    # Calculate the compliment of the sum to get the checksum.
+    compliment = -int.from_bytes(data, 'big') % 0xffff
+
+    if compliment:
+        return compliment
+
+    # If the checksum is calculated to be zero, set to 0xFFFF
+    return 0xffff
+
+
 # --------------------------------------------------
 # Base Class(es)
 #
@@ -79,29 +104,7 @@ class BasePacket(object):
         pass
 
     def _calc_compliment_(self, data):
-        out = 0
-
-        if (len(data) % 2 != 0):
-            # Make sure there is an even number of bytes
-            data = data + b'\x00'
-
-        # unpack all the bytes into 2 byte integers
-        values = unpack(f'! {len(data) // 2}H', data)
-        # Sum values together
-        out = out + sum(values)
-
-        while(out > 0xffff):
-            # If sum is bigger than 2 bytes, add the overflow to the sum
-            out = (out & 0xffff) + (out >> 16)
-
-        # Calculate the compliment of the sum to get the checksum.
-        compliment = -out % 0xffff
-
-        if compliment:
-            return compliment
-
-        # If the checksum is calculated to be zero, set to 0xFFFF
-        return 0xffff
+        return checksum(data)
 
     def __len__(self):
         pass
@@ -181,6 +184,79 @@ class Ethernet(BasePacket):
             return 18 + len(self.payload)
         return 14 + len(self.payload)
 
+@dataclass(init=False)
+class ARP(BasePacket):
+    format: str = field(default='! 2H 2B H 6s 4s 6s 4s', init=False, repr=False)
+    identifier: int = field(default=0x0806, init=False, repr=False)
+
+    hardware_type: int
+    protocol_type: int
+    hardware_length: int
+    protocol_length: int
+    operation: int  # 1 for a request, 2 for a reply
+    sender_mac: MAC_Address
+    sender_ip: IPv4Address
+    target_mac: MAC_Address
+    target_ip: IPv4Address
+
+    def __init__(self, operation: int, sender_mac: MAC_Address, sender_ip: IPv4Address,
+                 target_mac: MAC_Address, target_ip: IPv4Address, **kwargs):
+        BasePacket.__init__(self)
+
+        # Ethernet and IPv4 are the only hardware and protocol types used
+        self.hardware_type = kwargs.get('hardware_type', 1)
+        self.protocol_type = kwargs.get('protocol_type', 0x0800)
+        self.hardware_length = kwargs.get('hardware_length', 6)
+        self.protocol_length = kwargs.get('protocol_length', 4)
+        self.operation = operation
+        self.sender_mac = sender_mac
+        self.sender_ip = sender_ip
+        self.target_mac = target_mac
+        self.target_ip = target_ip
+
+    def build(self):
+        return pack(self.format, self.hardware_type, self.protocol_type,
+                    self.hardware_length, self.protocol_length, self.operation,
+                    self.sender_mac.packed, self.sender_ip.packed,
+                    self.target_mac.packed, self.target_ip.packed)
+
+    @classmethod
+    def disassemble(cls, packet: bytes):
+        """
+        Disassemble an ARP packet for inspection.
+        Padding after the packet (IE: to the minimum Ethernet frame size) is ignored.
+
+        :param packet: bytes: ARP packet to disassemble
+        :return: ARP
+        """
+        out = dict()
+
+        keys = ('hardware_type', 'protocol_type', 'hardware_length', 'protocol_length', 'operation',
+                'sender_mac', 'sender_ip', 'target_mac', 'target_ip')
+        values = unpack(cls.format, packet[:28])
+
+        for key, value in zip(keys, values):
+            if (key in ('sender_mac', 'target_mac')):
+                out[key] = MAC_Address(value)
+            elif (key in ('sender_ip', 'target_ip')):
+                out[key] = IPv4Address(value)
+            else:
+                out[key] = value
+
+        return cls(**out)
+
+    def calc_checksum(self, *, data=b''):
+        # ARP has no checksum
+        pass
+
+    def __len__(self):
+        return 28
+
+    def swap(self):
+        self.sender_mac, self.target_mac = self.target_mac, self.sender_mac
+        self.sender_ip, self.target_ip = self.target_ip, self.sender_ip
+
+
 # --------------------------------------------------
 # Internet Layer
 #
@@ -57,7 +57,7 @@ class TCPHandler(BaseRequestHandler):
         while True:
             try:
                 data = self.server.data[
-                       offset % self.server.get_size:(offset + self.server.width) % self.server.get_size].encode()
+                       offset % self.server.size:(offset + self.server.width) % self.server.size].encode()
                 offset = offset + 1
 
                 # If logging level set to info print it to output
@@ -91,16 +91,16 @@ class UDPHandler(BaseRequestHandler):
 
 
 class TCPServer(BaseTCPServer):
-    def __init__(self, ip, data: str = printable, width: int = 72):
-        BaseTCPServer.__init__(self, ip, 19, TCPHandler)
+    def __init__(self, ip, data: str = printable, width: int = 72, port: int = 19):
+        BaseTCPServer.__init__(self, ip, port, TCPHandler)
         self.data = data
         self.size = len(data)
         self.width = width
 
 
 class UDPServer(BaseUDPServer):
-    def __init__(self, ip, data: str = printable, width: int = 72):
-        BaseUDPServer.__init__(self, ip, 19, UDPHandler)
+    def __init__(self, ip, data: str = printable, width: int = 72, port: int = 19):
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
         self.data = data
         self.size = len(data)
         self.width = width
@@ -0,0 +1,163 @@
+from threading import Lock
+
+from RawPacket import MAC_Address
+
+FULL_MASK = (1 << 48) - 1
+
+
+def _to_int(text):
+    # 'aa:bb:cc' -> (0xaabbcc000000, number of bits given)
+    groups = text.replace('-', ':').split(':')
+    if not 1 <= len(groups) <= 6:
+        raise ValueError(f'{text!r} is not a MAC address or prefix')
+
+    value = 0
+    for group in groups:
+        value = (value << 8) | int(group, 16)
+
+    bits = len(groups) * 8
+    return value << (48 - bits), bits
+
+
+def _prefix_mask(length):
+    return (FULL_MASK << (48 - length)) & FULL_MASK
+
+
+class MacACL(object):
+    # Hardware addresses to allow (whitelist) or deny (blacklist) addresses to.
+    #
+    # Every rule is a value and a mask over the 48 bit address. Rules sharing
+    # a mask are kept in one set, so checking an address costs a set lookup
+    # per distinct mask (IE: one for exact addresses, one for OUIs), no
+    # matter how many rules there are.
+    #
+    # Rules are written as
+    #   aa:bb:cc:dd:ee:ff                     One address
+    #   aa:bb:cc  or  aa:bb:cc:00:00:00/24    Every address starting with the prefix (IE: an OUI)
+    #   02:00:00:00:00:00/02:00:00:00:00:00   Every address matching the value under the mask
+
+    def __init__(self, mode='b'):
+        """
+        :param mode: str: 'w' to only allow addresses matching a rule, 'b' to deny them
+        """
+        self.mode = mode
+        self.rules = dict()  # Keys will be the mask, values a set of address & mask
+        self.lock = Lock()
+        self._tables = tuple()  # (mask, values) of self.rules, replaced rather than changed
+
+    @staticmethod
+    def parse(rule):
+        """
+        :param rule: MAC_Address, int or str
+        :return: tuple: (value, mask)
+        """
+        if (type(rule) == MAC_Address):
+            return rule._address, FULL_MASK
+        if (type(rule) == int):
+            return rule, FULL_MASK
+
+        rule = rule.strip()
+        if '/' in rule:
+            address, mask = rule.split('/', 1)
+            value, _ = _to_int(address)
+            if ':' in mask or '-' in mask:
+                mask, _ = _to_int(mask)
+            else:
+                mask = _prefix_mask(int(mask))
+        else:
+            value, bits = _to_int(rule)
+            mask = _prefix_mask(bits)
+
+        return value & mask, mask
+
+    @staticmethod
+    def format(value, mask):
+        if mask == FULL_MASK:
+            return str(MAC_Address(value))
+
+        length = 48 - ((~mask & FULL_MASK).bit_length())
+        if _prefix_mask(length) == mask:
+            return f'{MAC_Address(value)}/{length}'
+        return f'{MAC_Address(value)}/{MAC_Address(mask)}'
+
+    def add(self, rule):
+        value, mask = self.parse(rule)
+        with self.lock:
+            self.rules.setdefault(mask, set()).add(value)
+            self._compile()
+
+    def remove(self, rule):
+        value, mask = self.parse(rule)
+        with self.lock:
+            values = self.rules.get(mask)
+            if values is None:
+                return
+            values.discard(value)
+            if not values:
+                del self.rules[mask]
+            self._compile()
+
+    def update(self, rules):
+        # Add many rules, compiling once
+        parsed = [self.parse(rule) for rule in rules]
+        with self.lock:
+            for value, mask in parsed:
+                self.rules.setdefault(mask, set()).add(value)
+            self._compile()
+
+    def load(self, file):
+        """
+        Add the rules in a file, one per line. Blank lines and anything after a # are skipped.
+
+        :param file: str: Path of the file
+        :return: int: Number of rules read
+        """
+        with open(file, 'r') as rules:
+            lines = [line.split('#', 1)[0].strip() for line in rules]
+        lines = [line for line in lines if line]
+
+        self.update(lines)
+        return len(lines)
+
+    def clear(self):
+        with self.lock:
+            self.rules.clear()
+            self._compile()
+
+    def _compile(self):
+        # Largest sets first, usually the exact addresses, so most matches take one lookup.
+        self._tables = tuple(sorted(((mask, values) for mask, values in self.rules.items()),
+                                    key=lambda table: -len(table[1])))
+
+    def matches(self, mac):
+        value = mac._address
+        for mask, values in self._tables:
+            if (value & mask) in values:
+                return True
+        return False
+
+    def allows(self, mac):
+        """
+        :param mac: MAC_Address
+        :return: bool: If the client may be given an address
+        """
+        if self.mode == 'b':
+            return not self.matches(mac)
+        return self.matches(mac)
+
+    def toggle_mode(self):
+        self.mode = 'b' if self.mode == 'w' else 'w'
+
+    def listing(self):
+        # Every rule, written the way parse reads it
+        with self.lock:
+            return [self.format(value, mask) for mask, values in self.rules.items() for value in values]
+
+    def __contains__(self, mac):
+        return self.matches(MAC_Address(mac))
+
+    def __iter__(self):
+        return iter(self.listing())
+
+    def __len__(self):
+        return sum(len(values) for _, values in self._tables)
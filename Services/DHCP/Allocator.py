@@ -0,0 +1,213 @@
+from bisect import bisect_right
+
+
+class IntervalSet(object):
+    # Set of integers stored as sorted, disjoint and non adjacent
+    # inclusive ranges. Memory grows with the number of ranges
+    # (fragmentation) rather than the number of integers held.
+
+    def __init__(self, ranges=()):
+        self.starts = list()
+        self.ends = list()
+        self.size = 0
+
+        for first, last in ranges:
+            self.add(first, last)
+
+    def _find(self, value):
+        # Index of the range that could hold value, -1 if value is below every range.
+        return bisect_right(self.starts, value) - 1
+
+    def add(self, first, last=None):
+        """
+        Add the inclusive range first to last to the set
+
+        :param first: int
+        :param last: int: Defaults to first
+        :return: int: Number of values that were not in the set already
+        """
+        if last is None:
+            last = first
+        if last < first:
+            return 0
+
+        # Ranges that overlap or touch first - last get merged into one.
+        low = bisect_right(self.ends, first - 2)
+        high = bisect_right(self.starts, last + 1)
+
+        if low < high:
+            merged = sum(self.ends[i] - self.starts[i] + 1 for i in range(low, high))
+            first = min(first, self.starts[low])
+            last = max(last, self.ends[high - 1])
+        else:
+            merged = 0
+
+        self.starts[low:high] = [first]
+        self.ends[low:high] = [last]
+
+        added = (last - first + 1) - merged
+        self.size = self.size + added
+        return added
+
+    def remove(self, first, last=None):
+        """
+        Remove the inclusive range first to last from the set
+
+        :param first: int
+        :param last: int: Defaults to first
+        :return: int: Number of values that were removed
+        """
+        if last is None:
+            last = first
+        if last < first:
+            return 0
+
+        low = bisect_right(self.ends, first - 1)
+        high = bisect_right(self.starts, last)
+        if low >= high:
+            return 0
+
+        starts = list()
+        ends = list()
+        removed = 0
+
+        for i in range(low, high):
+            start, end = self.starts[i], self.ends[i]
+            removed = removed + min(end, last) - max(start, first) + 1
+            if start < first:
+                starts.append(start)
+                ends.append(first - 1)
+            if end > last:
+                starts.append(last + 1)
+                ends.append(end)
+
+        self.starts[low:high] = starts
+        self.ends[low:high] = ends
+
+        self.size = self.size - removed
+        return removed
+
+    def pop(self):
+        """
+        Remove and return the lowest value in the set
+
+        :return: int or None if the set is empty
+        """
+        if not self.starts:
+            return None
+
+        value = self.starts[0]
+        if value == self.ends[0]:
+            del self.starts[0]
+            del self.ends[0]
+        else:
+            self.starts[0] = value + 1
+
+        self.size = self.size - 1
+        return value
+
+    def ranges(self):
+        return list(zip(self.starts, self.ends))
+
+    def __contains__(self, value):
+        index = self._find(value)
+        return index >= 0 and value <= self.ends[index]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for first, last in zip(tuple(self.starts), tuple(self.ends)):
+            yield from range(first, last + 1)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.ranges()})'
+
+
+class Allocator(object):
+    # Hands out integers (IE: addresses) from a set of ranges.
+    # allocate, take, release and contains never look at more than
+    # the ranges around the value involved.
+
+    def __init__(self, ranges=(), exclusions=()):
+        """
+        :param ranges: list: Inclusive (first, last) ranges of integers to allocate from
+        :param exclusions: list: Inclusive (first, last) ranges that are never handed out
+        """
+        self.scope = IntervalSet(ranges)
+        for first, last in exclusions:
+            self.scope.remove(first, last)
+
+        self.free = IntervalSet(self.scope.ranges())
+        self.held = IntervalSet()  # Values in scope that are handed out by someone else. IE: a failover peer
+
+    def add_range(self, first, last):
+        self.scope.add(first, last)
+        self.free.add(first, last)
+        for start, end in self.held.ranges():
+            self.free.remove(start, end)
+
+    def exclude(self, first, last=None):
+        self.scope.remove(first, last)
+        self.free.remove(first, last)
+
+    def hold(self, first, last=None):
+        """
+        Stop handing out the inclusive range first to last without taking it out of scope.
+        Held values that are given back stay out of the free values.
+
+        :param first: int
+        :param last: int: Defaults to first
+        """
+        self.held.add(first, last)
+        self.free.remove(first, last)
+
+    def unhold(self, first, last=None):
+        # Values of the range that nobody else is using have to be released by the caller
+        self.held.remove(first, last)
+
+    def allocate(self):
+        """
+        Take the lowest free value
+
+        :return: int or None if every value is in use
+        """
+        return self.free.pop()
+
+    def take(self, value):
+        """
+        Take a specific value if it is free
+
+        :param value: int
+        :return: bool: True if the value was free
+        """
+        return self.free.remove(value) == 1
+
+    def release(self, value):
+        """
+        Give a value back. Values outside of the allocator's ranges are ignored.
+
+        :param value: int
+        :return: bool: True if the value was in use
+        """
+        if value in self.scope and value not in self.held:
+            return self.free.add(value) == 1
+        return False
+
+    def in_scope(self, value):
+        return value in self.scope
+
+    @property
+    def used(self):
+        # size rather than len(), len() can't go past sys.maxsize (IE: a /64 of IPv6 addresses)
+        return self.scope.size - self.free.size - self.held.size
+
+    def __contains__(self, value):
+        # If a value is free to be allocated
+        return value in self.free
+
+    def __len__(self):
+        return len(self.free)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(free={self.free.ranges()})'
@@ -0,0 +1,293 @@
+import socket
+from json import dumps
+from os import unlink
+from threading import Thread, Condition
+from time import time
+
+# Kinds of lease events
+GRANT = 'grant'  # New lease, or a lease moved to another address
+RENEW = 'renew'  # Lease of the same address extended
+RELEASE = 'release'  # Client (or the failover peer) gave the address back
+EXPIRE = 'expire'  # Lease ran out
+DECLINE = 'decline'  # Client found its address in use
+QUARANTINE = 'quarantine'  # Address held out of the pool, IE: after a decline or an ARP conflict
+
+
+class LeaseEvent(object):
+    __slots__ = ('sequence', 'time', 'kind', 'mac', 'clientid', 'ip', 'expires', 'hostname')
+
+    def __init__(self, sequence, kind, mac, clientid, ip, expires=None, hostname=b''):
+        self.sequence = sequence
+        self.time = time()
+        self.kind = kind
+        self.mac = mac
+        self.clientid = clientid
+        self.ip = ip
+        self.expires = expires
+        self.hostname = hostname
+
+    def as_dict(self):
+        return {
+            'sequence': self.sequence,
+            'time': self.time,
+            'kind': self.kind,
+            'mac': str(self.mac),
+            'clientid': self.clientid.hex(),
+            'ip': str(self.ip),
+            'expires': self.expires,
+            'hostname': self.hostname.decode('utf-8', 'replace'),
+        }
+
+    def json(self):
+        return dumps(self.as_dict(), separators=(',', ':'))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.sequence}, {self.kind!r}, {self.mac!r}, {self.ip!r})'
+
+
+class EventBus(Thread):
+    # Lease events of the server, kept in a ring buffer.
+    #
+    # Publishing stores the event in the next slot and never waits on a
+    # consumer. Sinks are fed from the ring by a thread of their own, each
+    # at its own pace. A sink that falls more than <size> events behind
+    # misses the oldest ones, which it's told about through its dropped
+    # count, rather than slowing the server down.
+
+    def __init__(self, size=4096):
+        """
+        :param size: int: Events kept in the ring
+        """
+        super().__init__(name='DHCP Event Bus', daemon=True)
+        self.size = size
+        self.ring = [None] * size
+        self.sequence = 0  # Sequence of the next event
+        self.condition = Condition()
+
+        self.sinks = list()
+        self.keep_alive = True
+
+    def publish(self, kind, mac, clientid, ip, expires=None, hostname=b''):
+        with self.condition:
+            event = LeaseEvent(self.sequence, kind, mac, clientid, ip, expires, hostname)
+            self.ring[self.sequence % self.size] = event
+            self.sequence = self.sequence + 1
+            self.condition.notify_all()
+        return event
+
+    def read(self, cursor, limit=None):
+        """
+        Events from sequence <cursor> on, that are still in the ring
+
+        :param cursor: int: Sequence of the first event wanted
+        :param limit: int: Most events to return. Defaults to everything there is
+        :return: tuple: (list of events, cursor to read from next, number of events missed)
+        """
+        with self.condition:
+            oldest = max(0, self.sequence - self.size)
+            missed = max(0, oldest - cursor)
+            cursor = max(cursor, oldest)
+
+            stop = self.sequence if limit is None else min(self.sequence, cursor + limit)
+            events = [self.ring[sequence % self.size] for sequence in range(cursor, stop)]
+            return events, stop, missed
+
+    def tail(self, cursor=None, timeout=None):
+        """
+        Events as they are published. Starts with the next event unless given a cursor.
+
+        :param cursor: int: Sequence of the first event wanted
+        :param timeout: float: Seconds to wait for an event before stopping. Defaults to waiting forever
+        :return: generator of LeaseEvent
+        """
+        if cursor is None:
+            cursor = self.sequence
+
+        while self.keep_alive:
+            with self.condition:
+                if not self.condition.wait_for(lambda: self.sequence > cursor or not self.keep_alive, timeout):
+                    return
+
+            events, cursor, _ = self.read(cursor)
+            yield from events
+
+    def add_sink(self, sink, replay=False):
+        """
+        :param sink: Sink: Gets every event published from now on
+        :param replay: bool: Start with the events still in the ring instead
+        """
+        with self.condition:
+            sink.cursor = max(0, self.sequence - self.size) if replay else self.sequence
+            self.sinks.append(sink)
+            self.condition.notify_all()
+
+    def remove_sink(self, sink):
+        with self.condition:
+            self.sinks.remove(sink)
+        sink.close()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: not self.keep_alive or
+                                        any(sink.cursor < self.sequence for sink in self.sinks))
+                if not self.keep_alive:
+                    return
+                sinks = list(self.sinks)
+
+            for sink in sinks:
+                events, sink.cursor, missed = self.read(sink.cursor, 1024)
+                sink.dropped = sink.dropped + missed
+                if events:
+                    sink.deliver(events)
+
+    def statistics(self):
+        return {
+            'published': self.sequence,
+            'sinks': {repr(sink): {'delivered': sink.delivered, 'dropped': sink.dropped,
+                                   'lag': self.sequence - sink.cursor} for sink in self.sinks},
+        }
+
+    def shutdown(self):
+        with self.condition:
+            self.keep_alive = False
+            self.condition.notify_all()
+
+        if self.is_alive():
+            self.join()
+
+        for sink in self.sinks:
+            # Whatever was published before the server stopped still goes out
+            events, sink.cursor, missed = self.read(sink.cursor)
+            sink.dropped = sink.dropped + missed
+            if events:
+                sink.deliver(events)
+            sink.close()
+
+
+# --------------------------------------------------
+# Sinks
+#
+# Every sink is fed batches of events by the bus's thread.
+# --------------------------------------------------
+
+
+class Sink(object):
+    cursor = 0  # Sequence of the next event the sink gets, kept by the bus
+
+    def __init__(self):
+        self.delivered = 0
+        self.dropped = 0  # Events the sink fell too far behind to get
+        self.errors = 0
+
+    def deliver(self, events):
+        try:
+            self.write(events)
+            self.delivered = self.delivered + len(events)
+        except Exception:
+            # A broken sink must not take the bus down with it
+            self.errors = self.errors + 1
+
+    def write(self, events):
+        pass
+
+    def close(self):
+        pass
+
+
+class CallbackSink(Sink):
+    def __init__(self, callback):
+        """
+        :param callback: Callable taking a LeaseEvent
+        """
+        super().__init__()
+        self.callback = callback
+
+    def write(self, events):
+        for event in events:
+            self.callback(event)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.callback!r})'
+
+
+class JSONLinesSink(Sink):
+    # Appends every event to a file as a line of JSON, IE: for `tail -f`
+
+    def __init__(self, file):
+        super().__init__()
+        self.file = file
+        self.fd = open(file, 'a')
+
+    def write(self, events):
+        self.fd.write(''.join(event.json() + '\n' for event in events))
+        self.fd.flush()
+
+    def close(self):
+        self.fd.close()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.file!r})'
+
+
+class UnixSocketSink(Sink):
+    # Streams events as lines of JSON to everything connected to a Unix socket.
+    # Consumers that don't keep up (their socket buffer fills) are disconnected.
+
+    def __init__(self, file, backlog=8):
+        """
+        :param file: str: Path of the socket
+        :param backlog: int: Connections waiting to be accepted
+        """
+        super().__init__()
+        self.file = file
+
+        try:
+            # Left behind by a server that didn't shut down cleanly
+            unlink(file)
+        except FileNotFoundError:
+            pass
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(file)
+        self.listener.listen(backlog)
+        self.listener.setblocking(False)
+        self.consumers = list()
+
+    def accept(self):
+        while True:
+            try:
+                consumer, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            consumer.setblocking(False)
+            self.consumers.append(consumer)
+
+    def write(self, events):
+        self.accept()
+        if not self.consumers:
+            return
+
+        data = ''.join(event.json() + '\n' for event in events).encode()
+        for consumer in list(self.consumers):
+            try:
+                sent = consumer.send(data)
+            except OSError:
+                sent = 0
+            if sent < len(data):
+                # Gone, or too slow. A partial line can't be finished later either.
+                self.consumers.remove(consumer)
+                consumer.close()
+
+    def close(self):
+        for consumer in self.consumers:
+            consumer.close()
+        self.consumers.clear()
+        self.listener.close()
+        try:
+            unlink(self.file)
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.file!r})'
@@ -0,0 +1,298 @@
+import logging
+from collections import deque
+from ipaddress import ip_address
+from json import dumps, loads
+from socket import create_connection, SHUT_RDWR
+from socketserver import StreamRequestHandler
+from threading import Thread, Condition
+from time import monotonic
+
+from BaseServers import BaseTCPServer
+from RawPacket import MAC_Address
+
+# Mixing table of the load balancing hash (RFC 3074 section 6)
+LOADB_MX_TBL = (
+    251, 175, 119, 215, 81, 14, 79, 191, 103, 49, 181, 143, 186, 157, 0,
+    232, 31, 32, 55, 60, 152, 58, 17, 237, 174, 70, 160, 144, 220, 90, 57,
+    223, 59, 3, 18, 140, 111, 166, 203, 196, 134, 243, 124, 95, 222, 179, 197,
+    65, 180, 48, 36, 15, 107, 46, 233, 130, 165, 30, 123, 161, 209, 23, 97,
+    16, 40, 91, 219, 61, 100, 10, 210, 109, 250, 127, 22, 138, 29, 108, 244,
+    67, 207, 9, 178, 204, 74, 98, 126, 249, 167, 116, 34, 77, 193, 200, 121,
+    5, 20, 113, 71, 35, 128, 13, 182, 94, 25, 226, 227, 199, 75, 27, 41,
+    245, 230, 224, 43, 225, 177, 26, 155, 150, 212, 142, 218, 115, 241, 73, 88,
+    105, 39, 114, 62, 255, 192, 201, 145, 214, 168, 158, 221, 148, 154, 122, 12,
+    84, 82, 163, 44, 139, 228, 236, 205, 242, 217, 11, 187, 146, 159, 64, 86,
+    239, 195, 42, 106, 198, 118, 112, 184, 172, 87, 2, 173, 117, 176, 229, 247,
+    253, 137, 185, 99, 164, 102, 147, 45, 66, 231, 52, 141, 211, 194, 206, 246,
+    238, 56, 110, 78, 248, 63, 240, 189, 93, 92, 51, 53, 183, 19, 171, 72,
+    50, 33, 104, 101, 69, 8, 252, 83, 120, 76, 135, 85, 54, 202, 125, 188,
+    213, 96, 235, 136, 208, 162, 129, 190, 132, 156, 38, 47, 1, 7, 254, 24,
+    4, 216, 131, 89, 21, 28, 133, 37, 153, 149, 80, 170, 68, 6, 169, 234,
+    151,
+)
+
+
+def load_balance_hash(key):
+    """
+    Hash bucket of a client (RFC 3074 section 6)
+
+    :param key: bytes: Data of the client's ClientID option, or its hardware address if it didn't send one
+    :return: int: 0 - 255
+    """
+    value = len(key)
+    for byte in reversed(key):
+        value = LOADB_MX_TBL[value ^ byte]
+    return value
+
+
+class FailoverHandler(StreamRequestHandler):
+    # Messages from the peer, one line of JSON each
+
+    def handle(self):
+        failover = self.server.failover
+        failover.inbound.add(self.request)
+        logging.info(f'Failover peer {self.client_address[0]} CONNECTED')
+
+        try:
+            for line in self.rfile:
+                try:
+                    message = loads(line)
+                except ValueError:
+                    continue
+                failover.receive(message)
+        except OSError:
+            pass
+        finally:
+            failover.inbound.discard(self.request)
+            logging.info(f'Failover peer {self.client_address[0]} DISCONNECTED')
+
+
+class FailoverListener(BaseTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, failover, ip, port):
+        self.failover = failover
+        BaseTCPServer.__init__(self, ip, port, FailoverHandler)
+
+
+class Failover(Thread):
+    # Load balancing between two DHCP servers sharing the same networks.
+    #
+    # Clients are split into 256 buckets by the hash of RFC 3074. While both
+    # servers are up, each only answers DISCOVERs and REQUESTs from the
+    # clients in its own buckets. Once nothing has been heard from the peer
+    # for <timeout> seconds the server answers every client, until the peer
+    # is back.
+    #
+    # Each server only hands out its own half of every range of addresses,
+    # so the two never give the same address to different clients, even
+    # while they can't reach each other. Leases are sent to the peer as they
+    # are given out, and all of them once the connection to the peer is
+    # (re)made, so either server can renew the other's clients.
+
+    # DHCPMessageTypes answered by a single server, DISCOVER and REQUEST
+    balanced = (1, 3)
+
+    def __init__(self, server, role='primary', address=('', 647), peer=('127.0.0.1', 647),
+                 split=128, heartbeat=1.0, timeout=3.0):
+        """
+        :param server: RawServer: Server the failover works for
+        :param role: str: 'primary' answers the buckets below <split>, 'secondary' the rest
+        :param address: tuple: (IP address, port) to receive messages from the peer on
+        :param peer: tuple: (IP address, port) of the peer
+        :param split: int: First bucket of the secondary
+        :param heartbeat: float: Seconds between messages to the peer when there's nothing else to send
+        :param timeout: float: Seconds without a message from the peer before it's taken to be down
+        """
+        super().__init__(name='DHCP Failover', daemon=True)
+
+        if role not in ('primary', 'secondary'):
+            raise ValueError(f'Failover role must be primary or secondary, not {role!r}')
+
+        self.server = server
+        self.role = role
+        self.peer = peer
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+
+        # Buckets answered while the peer is up, indexed by bucket
+        own = range(split) if role == 'primary' else range(split, 256)
+        self.buckets = bytearray(256)
+        for bucket in own:
+            self.buckets[bucket] = 1
+
+        self.listener = FailoverListener(self, *address)
+        self.inbound = set()  # Connections from the peer
+
+        self.condition = Condition()
+        self.pending = deque()  # Messages waiting to be sent to the peer
+        self.connection = None  # Connection to the peer
+        self.last_seen = None  # monotonic() of the last message from the peer
+        self.keep_alive = True
+
+    @property
+    def address(self):
+        return self.listener.server_address
+
+    @property
+    def peer_up(self):
+        return self.last_seen is not None and monotonic() - self.last_seen < self.timeout
+
+    def split(self, pool):
+        """
+        Hold the peer's half of every range of the pool, so only the peer hands those addresses out
+
+        :param pool: Pool
+        """
+        hosts = pool.hosts
+        for first, last in hosts.scope.ranges():
+            middle = (first + last) // 2
+            if self.role == 'primary':
+                hosts.hold(middle + 1, last)
+            else:
+                hosts.hold(first, middle)
+
+    def serves(self, packet):
+        """
+        :param packet: DHCPPacket: DISCOVER or REQUEST from a client
+        :return: bool: If this server should answer the client
+        """
+        if not self.peer_up:
+            # Peer is down, its clients are ours until it's back
+            return True
+
+        if packet.options.has(54) or packet.ciaddr._ip:
+            # Requests to a chosen server (SELECTING) or from a client renewing
+            # with the server that gave it its lease aren't balanced (RFC 3074 section 3)
+            return True
+
+        key = packet.options.raw(61)
+        if key is None:
+            key = packet.chaddr.packed
+        return bool(self.buckets[load_balance_hash(key)])
+
+    # ----------------------------------------------------------------------
+    # Messages to the peer
+
+    def publish(self, message):
+        # Never blocks the server. While there is no connection to the peer
+        # messages are dropped, every lease is sent once it connects.
+        with self.condition:
+            if self.connection is None:
+                return
+            self.pending.append(message)
+            self.condition.notify()
+
+    def publish_lease(self, lease):
+        self.publish(self.lease_message(lease))
+
+    def publish_release(self, mac, clientid):
+        self.publish({'type': 'release', 'mac': str(mac), 'clientid': clientid.hex()})
+
+    @staticmethod
+    def lease_message(lease):
+        return {
+            'type': 'lease',
+            'mac': str(lease.mac),
+            'clientid': lease.clientid.hex(),
+            'ip': str(lease.ip),
+            'expires': lease.expires,
+            'hostname': bytes(lease.hostname).hex(),
+        }
+
+    def _connect(self):
+        try:
+            connection = create_connection(self.peer, timeout=self.timeout)
+        except OSError:
+            return
+
+        with self.condition:
+            self.connection = connection
+            self.pending.clear()
+
+        logging.info(f'Failover connected to peer {self.peer[0]}')
+
+        # Every lease goes out first, the peer may have missed some while it couldn't be reached.
+        # Leases published since the connection was made are queued behind them.
+        messages = [self.lease_message(lease) for lease in self.server.leases]
+        with self.condition:
+            self.pending.extendleft(reversed(messages))
+            self.pending.appendleft({'type': 'hello', 'role': self.role})
+
+    def _disconnect(self):
+        with self.condition:
+            connection = self.connection
+            self.connection = None
+            self.pending.clear()
+
+        if connection is not None:
+            connection.close()
+            logging.info(f'Failover lost connection to peer {self.peer[0]}')
+
+    def run(self):
+        while True:
+            with self.condition:
+                if not self.pending and self.keep_alive:
+                    self.condition.wait(self.heartbeat)
+                if not self.keep_alive:
+                    break
+
+                messages = list(self.pending)
+                self.pending.clear()
+
+            if self.connection is None:
+                self._connect()
+                continue
+
+            if not messages:
+                messages = [{'type': 'heartbeat'}]
+
+            data = ''.join(dumps(message, separators=(',', ':')) + '\n' for message in messages)
+            try:
+                self.connection.sendall(data.encode())
+            except OSError:
+                self._disconnect()
+
+    # ----------------------------------------------------------------------
+    # Messages from the peer
+
+    def receive(self, message):
+        self.last_seen = monotonic()
+        kind = message.get('type')
+
+        if kind == 'lease':
+            self.server.sync_lease(MAC_Address(message['mac']), bytes.fromhex(message['clientid']),
+                                   ip_address(message['ip']), message['expires'],
+                                   bytes.fromhex(message.get('hostname', '')))
+
+        elif kind == 'release':
+            self.server.sync_release(MAC_Address(message['mac']), bytes.fromhex(message['clientid']))
+
+        elif kind == 'hello':
+            if message.get('role') == self.role:
+                logging.warning(f'Failover peer is also {self.role}, both will answer the same clients')
+
+    # ----------------------------------------------------------------------
+
+    def start(self):
+        self.listener.start()
+        super().start()
+
+    def shutdown(self):
+        with self.condition:
+            self.keep_alive = False
+            self.condition.notify_all()
+
+        if self.is_alive():
+            self.join()
+        self._disconnect()
+
+        if self.listener.is_alive():
+            self.listener.shutdown()
+        for connection in list(self.inbound):
+            try:
+                connection.shutdown(SHUT_RDWR)
+            except OSError:
+                pass
+        self.listener.server_close()
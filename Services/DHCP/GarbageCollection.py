@@ -1,21 +1,254 @@
-from sched import scheduler
-from threading import Thread
+from itertools import count
+from threading import Thread, Condition
+from time import monotonic
+
+
+class Timer(object):
+    __slots__ = ('key', 'deadline', 'action', 'args', 'level', 'slot')
+
+    def __init__(self, key, deadline, action, args):
+        self.key = key
+        self.deadline = deadline  # Tick the timer expires on
+        self.action = action
+        self.args = args
+        self.level = 0
+        self.slot = 0
+
+
+class TimerWheel(object):
+    # Hierarchical timing wheel.
+    # Level 0 holds timers expiring within the next <slots> ticks, every level
+    # above covers <slots> times the range of the one below. Timers move down a
+    # level each time the level below wraps around. Insert, cancel and
+    # reschedule are O(1), looking a timer up by key is a dict lookup.
+
+    def __init__(self, resolution=0.1, bits=8, levels=4):
+        """
+        :param resolution: float: Seconds per tick
+        :param bits: int: Slots per level as a power of 2
+        :param levels: int: Number of levels. Delays past the top level are capped to it
+        """
+        self.resolution = resolution
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = levels
+        self.max_delta = (1 << (bits * levels)) - 1
+
+        self.epoch = monotonic()
+        self.tick = 0  # Last tick that has been processed
+
+        self.wheels = [[dict() for _ in range(1 << bits)] for _ in range(levels)]
+        self.counts = [0] * levels
+        self.timers = dict()  # Keys will be the timer key
+        self._keys = count()
+
+    def now(self):
+        return int((monotonic() - self.epoch) / self.resolution)
+
+    def _place(self, timer, earliest=1):
+        # earliest is 0 while cascading, the current tick hasn't been processed yet.
+        delta = min(max(timer.deadline - self.tick, earliest), self.max_delta)
+        deadline = self.tick + delta
+
+        level = 0
+        while delta >> (self.bits * (level + 1)):
+            level = level + 1
+
+        timer.level = level
+        timer.slot = (deadline >> (self.bits * level)) & self.mask
+        self.wheels[level][timer.slot][timer.key] = timer
+        self.counts[level] = self.counts[level] + 1
+
+    def _unplace(self, timer):
+        del self.wheels[timer.level][timer.slot][timer.key]
+        self.counts[timer.level] = self.counts[timer.level] - 1
+
+    def insert(self, delay, action, *args, key=None):
+        """
+        Call action(*args) after <delay> seconds.
+        A timer already using <key> is replaced.
+
+        :param delay: float: Seconds until the timer expires
+        :param action: Callable to call
+        :param key: Hashable key to cancel or reschedule the timer with
+        :return: Key of the timer
+        """
+        if key is None:
+            key = ('timer', next(self._keys))
+        else:
+            self.cancel(key)
+
+        timer = Timer(key, self.now() + max(1, round(delay / self.resolution)), action, args)
+        self.timers[key] = timer
+        self._place(timer)
+        return key
+
+    def cancel(self, key):
+        """
+        :param key: Key of the timer
+        :return: bool: True if there was a timer to cancel
+        """
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+        self._unplace(timer)
+        return True
+
+    def reschedule(self, key, delay):
+        """
+        Move a timer to expire <delay> seconds from now
+
+        :return: bool: False if there is no timer with <key>
+        """
+        timer = self.timers.get(key)
+        if timer is None:
+            return False
+
+        self._unplace(timer)
+        timer.deadline = self.now() + max(1, round(delay / self.resolution))
+        self._place(timer)
+        return True
+
+    def _cascade(self, level):
+        # Move the timers of the current slot of <level> down a level.
+        # Happens whenever the level below wraps around.
+        if level >= self.levels:
+            return
+
+        index = (self.tick >> (self.bits * level)) & self.mask
+        if index == 0:
+            self._cascade(level + 1)
+
+        slot = self.wheels[level][index]
+        if slot:
+            timers = list(slot.values())
+            slot.clear()
+            self.counts[level] = self.counts[level] - len(timers)
+            for timer in timers:
+                self._place(timer, 0)
+
+    def advance(self, target=None):
+        """
+        Process every tick up to <target>
+
+        :param target: int: Tick to advance to. Defaults to now
+        :return: list: Expired timers, their actions have not been called yet
+        """
+        if target is None:
+            target = self.now()
+
+        expired = list()
+        while self.tick < target:
+            if not self.timers:
+                self.tick = target
+                break
+
+            if not self.counts[0]:
+                # Nothing in the lowest level, skip to the tick it wraps on.
+                boundary = self.tick | self.mask
+                if boundary >= target:
+                    self.tick = target
+                    break
+                self.tick = boundary
+
+            self.tick = self.tick + 1
+            index = self.tick & self.mask
+            if index == 0:
+                self._cascade(1)
+
+            slot = self.wheels[0][index]
+            if slot:
+                expired.extend(slot.values())
+                self.counts[0] = self.counts[0] - len(slot)
+                slot.clear()
+
+        for timer in expired:
+            del self.timers[timer.key]
+        return expired
+
+    def next_expiry(self):
+        """
+        Ticks until the wheel next needs attention.
+        Either a timer in the lowest level expiring or the lowest level wrapping
+        around while there are timers waiting in the levels above.
+
+        :return: int or None if there are no timers at all
+        """
+        if not self.timers:
+            return None
+
+        wrap = (self.mask + 1) - (self.tick & self.mask)
+
+        if self.counts[0]:
+            wheel = self.wheels[0]
+            for offset in range(1, wrap):
+                if wheel[(self.tick + offset) & self.mask]:
+                    return offset
+        return wrap
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def __len__(self):
+        return len(self.timers)
 
 
 class GarbageCollector(Thread):
-    def __init__(self):
-        super().__init__()
-        self.schedule = scheduler()
+    def __init__(self, resolution=0.1):
+        super().__init__(name='DHCP Garbage Collector', daemon=True)
+        self.wheel = TimerWheel(resolution)
+        self.condition = Condition()
         self.keep_alive = True
 
     def run(self):
-        while self.keep_alive:
-            self.schedule.run()
+        while True:
+            with self.condition:
+                if not self.keep_alive:
+                    return
+
+                ticks = self.wheel.next_expiry()
+                if ticks is not None:
+                    # Time left until the tick is reached, not just the tick count.
+                    timeout = (self.wheel.tick + ticks) * self.wheel.resolution
+                    timeout = timeout - (monotonic() - self.wheel.epoch)
+                    if timeout > 0:
+                        self.condition.wait(timeout)
+                else:
+                    # Nothing scheduled, sleep until something is.
+                    self.condition.wait()
+
+                expired = self.wheel.advance()
 
-    def insert(self, delay, action, *args):
-        self.schedule.enter(delay, 1, action, args)
+            # Actions run without the lock so they can schedule timers of their own.
+            for timer in expired:
+                timer.action(*timer.args)
+
+    def insert(self, delay, action, *args, key=None):
+        with self.condition:
+            key = self.wheel.insert(delay, action, *args, key=key)
+            self.condition.notify()
+        return key
+
+    def cancel(self, key):
+        with self.condition:
+            return self.wheel.cancel(key)
+
+    def reschedule(self, key, delay):
+        with self.condition:
+            found = self.wheel.reschedule(key, delay)
+            self.condition.notify()
+        return found
+
+    def __contains__(self, key):
+        with self.condition:
+            return key in self.wheel
 
     def shutdown(self):
-        self.keep_alive = False
-        for event in self.schedule.queue:
-            self.schedule.cancel(event)
+        with self.condition:
+            self.keep_alive = False
+            for key in list(self.wheel.timers):
+                self.wheel.cancel(key)
+            self.condition.notify()
+
+        if self.is_alive():
+            self.join()
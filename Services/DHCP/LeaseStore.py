@@ -0,0 +1,221 @@
+from json import dumps, loads
+from os import fsync, replace, path, truncate, open as os_open, close, O_RDONLY
+from threading import Thread, Condition
+
+
+class LeaseStore(Thread):
+    # Crash safe lease database.
+    #
+    # Every change is appended to a journal as a line of JSON and the journal
+    # is flushed to disk before the change is acknowledged. Changes made while
+    # the journal is being written are committed together by the next write
+    # (group commit). Once the journal grows past <compact_after> entries the
+    # live leases are written to a snapshot and the journal starts over.
+    #
+    # Loading reads the snapshot and then replays the journal on top of it.
+    # Replaying an entry twice gives the same result, so a crash in the middle
+    # of compacting loses nothing.
+
+    def __init__(self, file, compact_after=4096, durable=True):
+        """
+        :param file: str: Snapshot file. The journal is kept next to it as <file>.journal
+        :param compact_after: int: Journal entries written before compacting into a snapshot
+        :param durable: bool: Wait for changes to reach the disk before returning
+        """
+        super().__init__(name='DHCP Lease Store', daemon=True)
+        self.file = file
+        self.journal_file = f'{file}.journal'
+        self.compact_after = compact_after
+        self.durable = durable
+
+        self.leases = dict()  # Keys will be a tuple of (MAC address, ClientID) as strings
+        self.journal = None
+        self.entries = 0  # Entries in the journal since the last snapshot
+
+        self.condition = Condition()
+        self.pending = list()
+        self.queued = 0  # Number of entries handed to the store
+        self.committed = 0  # Number of entries on disk
+        self.running = False
+        self.keep_alive = True
+
+    @staticmethod
+    def _read(file):
+        # Lines that can't be parsed can only be the last line of a journal
+        # that was being written when the server went down.
+        try:
+            with open(file, 'r') as entries:
+                for line in entries:
+                    try:
+                        yield loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def _apply(self, entry):
+        key = (entry['mac'], entry['clientid'])
+        if entry['ip'] is None:
+            self.leases.pop(key, None)
+        else:
+            # Entries written before hostnames were stored have none
+            self.leases[key] = (entry['ip'], entry['expires'], entry.get('hostname', ''))
+
+    def load(self):
+        """
+        Read the leases back from disk
+
+        :return: dict: (MAC address, ClientID) -> (IP address, expiry time, HostName as hex)
+        """
+        with self.condition:
+            self.leases.clear()
+            for entry in self._read(self.file):
+                self._apply(entry)
+
+            self.entries = 0
+            for entry in self._read(self.journal_file):
+                self._apply(entry)
+                self.entries = self.entries + 1
+
+            self._repair()
+            return dict(self.leases)
+
+    def _repair(self):
+        # Cut a torn last line off the journal, or the next entry
+        # appended would end up on the same line and be lost with it.
+        try:
+            with open(self.journal_file, 'rb') as journal:
+                data = journal.read()
+        except FileNotFoundError:
+            return
+
+        if data and not data.endswith(b'\n'):
+            truncate(self.journal_file, data.rfind(b'\n') + 1)
+
+    def put(self, mac, clientid, ip, expires, hostname=b''):
+        """
+        :param mac: MAC address of the client
+        :param clientid: bytes: ClientID of the client
+        :param ip: IP address leased to the client
+        :param expires: float: time() the lease expires at
+        :param hostname: bytes: HostName the client gave
+        """
+        self._append({'mac': str(mac), 'clientid': clientid.hex(), 'ip': str(ip), 'expires': expires,
+                      'hostname': bytes(hostname).hex()})
+
+    def remove(self, mac, clientid):
+        self._append({'mac': str(mac), 'clientid': clientid.hex(), 'ip': None})
+
+    def _append(self, entry):
+        with self.condition:
+            self._apply(entry)
+            line = dumps(entry, separators=(',', ':')) + '\n'
+
+            if not self.running:
+                # No writer thread, write the entry straight away.
+                self._write([line])
+                return
+
+            self.pending.append(line)
+            self.queued = self.queued + 1
+            ticket = self.queued
+            self.condition.notify_all()
+
+            if self.durable:
+                while self.committed < ticket and self.running:
+                    self.condition.wait()
+
+    def _write(self, lines):
+        if self.journal is None:
+            self.journal = open(self.journal_file, 'a')
+
+        self.journal.write(''.join(lines))
+        self.journal.flush()
+        fsync(self.journal.fileno())
+        self.entries = self.entries + len(lines)
+
+    def compact(self):
+        """
+        Write the live leases to a new snapshot and empty the journal
+        """
+        with self.condition:
+            leases = dict(self.leases)
+
+            temp = f'{self.file}.tmp'
+            with open(temp, 'w') as snapshot:
+                for (mac, clientid), (ip, expires, hostname) in leases.items():
+                    snapshot.write(dumps({'mac': mac, 'clientid': clientid, 'ip': ip, 'expires': expires,
+                                          'hostname': hostname}, separators=(',', ':')) + '\n')
+                snapshot.flush()
+                fsync(snapshot.fileno())
+            replace(temp, self.file)
+            self._sync_directory()
+
+            # Entries already in the journal are part of the snapshot now.
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(self.journal_file, 'w')
+            fsync(self.journal.fileno())
+            self.entries = 0
+
+    def _sync_directory(self):
+        # Makes the rename of the snapshot itself durable.
+        try:
+            fd = os_open(path.dirname(path.abspath(self.file)), O_RDONLY)
+        except OSError:
+            return
+        try:
+            fsync(fd)
+        except OSError:
+            pass
+        finally:
+            close(fd)
+
+    def start(self):
+        with self.condition:
+            self.running = True
+        super().start()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and self.keep_alive:
+                    self.condition.wait()
+
+                if not self.pending:
+                    break
+
+                lines = self.pending
+                self.pending = list()
+                ticket = self.queued
+
+            # Entries appended while this write is going on make up the next batch.
+            self._write(lines)
+
+            with self.condition:
+                self.committed = ticket
+                self.condition.notify_all()
+
+            if self.entries >= self.compact_after:
+                self.compact()
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def shutdown(self):
+        with self.condition:
+            self.keep_alive = False
+            self.condition.notify_all()
+
+        if self.is_alive():
+            self.join()
+
+        self.compact()
+        with self.condition:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+
+    def __len__(self):
+        return len(self.leases)
@@ -0,0 +1,222 @@
+from bisect import bisect_right, bisect_left, insort
+from itertools import count
+from threading import RLock
+from time import time
+
+
+class Lease(object):
+    __slots__ = ('mac', 'clientid', 'ip', 'expires', 'hostname', 'serial')
+
+    def __init__(self, mac, clientid, ip, expires, hostname=b'', serial=0):
+        self.mac = mac
+        self.clientid = clientid  # ClientID option (61) of the client, b'' if it didn't send one
+        self.ip = ip
+        self.expires = expires  # time() the lease runs out
+        self.hostname = hostname
+        self.serial = serial  # Breaks ties between leases expiring at the same time
+
+    @property
+    def key(self):
+        return self.mac, self.clientid
+
+    @property
+    def remaining(self):
+        return max(0.0, self.expires - time())
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.mac!r}, {self.clientid!r}, {self.ip!r}, {self.expires!r})'
+
+
+class ExpiryIndex(object):
+    # Sorted (expires, serial) pairs, split into chunks of up to 2 * <load> pairs.
+    # Adding or removing a pair only shifts the pairs of one chunk around,
+    # so it stays cheap with hundreds of thousands of leases.
+
+    def __init__(self, load=512):
+        self.load = load
+        self.chunks = list()
+        self.maxes = list()  # Last pair of every chunk
+        self.size = 0
+
+    def add(self, item):
+        self.size = self.size + 1
+
+        if not self.chunks:
+            self.chunks.append([item])
+            self.maxes.append(item)
+            return
+
+        index = bisect_left(self.maxes, item)
+        if index == len(self.maxes):
+            # Past the end, which is where new leases usually go
+            index = index - 1
+            self.chunks[index].append(item)
+            self.maxes[index] = item
+        else:
+            insort(self.chunks[index], item)
+
+        chunk = self.chunks[index]
+        if len(chunk) > self.load * 2:
+            self.chunks[index:index + 1] = [chunk[:self.load], chunk[self.load:]]
+            self.maxes[index:index + 1] = [chunk[self.load - 1], chunk[-1]]
+
+    def remove(self, item):
+        index = bisect_left(self.maxes, item)
+        chunk = self.chunks[index]
+        del chunk[bisect_left(chunk, item)]
+        self.size = self.size - 1
+
+        if not chunk:
+            del self.chunks[index]
+            del self.maxes[index]
+        else:
+            self.maxes[index] = chunk[-1]
+
+    def until(self, item):
+        # Every pair up to and including <item>, in order
+        for chunk in self.chunks:
+            if chunk[-1] <= item:
+                yield from chunk
+            else:
+                yield from chunk[:bisect_right(chunk, item)]
+                return
+
+    def __len__(self):
+        return self.size
+
+
+class LeaseTable(object):
+    # Active leases with an index for each way they get looked up.
+    #
+    #   (MAC address, ClientID)  -> lease             O(1)
+    #   IP address               -> lease             O(1)
+    #   MAC address              -> leases            O(1)
+    #   ClientID                 -> lease             O(1)
+    #   expiry time              -> leases, in order  O(k)
+    #
+    # Every index changes together under one lock, so a lease is never in
+    # some of them but not the others.
+
+    def __init__(self):
+        self.leases = dict()  # Keys will be a tuple of (MAC address, ClientID)
+        self.ips = dict()  # Keys will be the leased IP address
+        self.macs = dict()  # Keys will be the MAC address, values a dict of ClientID -> lease
+        self.clientids = dict()  # Keys will be the ClientID. Clients without one aren't indexed
+        self.expiry = ExpiryIndex()
+        self.serials = dict()  # Keys will be the lease serial
+        self._serials = count()
+        self.lock = RLock()
+
+    def add(self, mac, clientid, ip, expires, hostname=b''):
+        """
+        Add or replace the lease of a client.
+        A different client holding the same IP loses its lease.
+
+        :param mac: MAC address of the client
+        :param clientid: bytes: ClientID of the client
+        :param ip: IP address leased to the client
+        :param expires: float: time() the lease runs out
+        :param hostname: bytes: HostName option of the client
+        :return: Lease
+        """
+        with self.lock:
+            self.remove(mac, clientid)
+
+            holder = self.ips.get(ip)
+            if holder is not None:
+                self.remove(*holder.key)
+
+            lease = Lease(mac, clientid, ip, expires, hostname, next(self._serials))
+
+            self.leases[lease.key] = lease
+            self.ips[ip] = lease
+            self.macs.setdefault(mac, dict())[clientid] = lease
+            if clientid:
+                self.clientids[clientid] = lease
+
+            self.expiry.add((expires, lease.serial))
+            self.serials[lease.serial] = lease
+            return lease
+
+    def remove(self, mac, clientid):
+        """
+        :return: Lease that was removed or None
+        """
+        with self.lock:
+            lease = self.leases.pop((mac, clientid), None)
+            if lease is None:
+                return None
+
+            del self.ips[lease.ip]
+
+            by_mac = self.macs[mac]
+            del by_mac[clientid]
+            if not by_mac:
+                del self.macs[mac]
+
+            if clientid and self.clientids.get(clientid) is lease:
+                del self.clientids[clientid]
+
+            self._unindex_expiry(lease)
+            return lease
+
+    def _unindex_expiry(self, lease):
+        self.expiry.remove((lease.expires, lease.serial))
+        del self.serials[lease.serial]
+
+    def renew(self, mac, clientid, expires):
+        """
+        Move the expiry time of a lease
+
+        :return: Lease or None if the client has no lease
+        """
+        with self.lock:
+            lease = self.leases.get((mac, clientid))
+            if lease is not None:
+                self._unindex_expiry(lease)
+                lease.expires = expires
+                self.expiry.add((expires, lease.serial))
+                self.serials[lease.serial] = lease
+            return lease
+
+    def get(self, mac, clientid=b''):
+        return self.leases.get((mac, clientid))
+
+    def by_ip(self, ip):
+        return self.ips.get(ip)
+
+    def by_mac(self, mac):
+        with self.lock:
+            return list(self.macs.get(mac, dict()).values())
+
+    def by_clientid(self, clientid):
+        return self.clientids.get(clientid)
+
+    def expiring(self, seconds, now=None):
+        """
+        Leases running out within the next <seconds>, soonest first
+
+        :param seconds: float
+        :param now: float: Defaults to time()
+        :return: list
+        """
+        if now is None:
+            now = time()
+        with self.lock:
+            return [self.serials[serial] for _, serial in self.expiry.until((now + seconds, float('inf')))]
+
+    def expired(self, now=None):
+        return self.expiring(0, now)
+
+    def __getitem__(self, key):
+        return self.leases[key]
+
+    def __contains__(self, key):
+        return key in self.leases
+
+    def __len__(self):
+        return len(self.leases)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.leases.values()))
@@ -1,627 +1,215 @@
-from dataclasses import dataclass, field
-from ipaddress import ip_address, ip_interface
-from struct import pack, unpack
-from typing import Dict, List
+from functools import wraps
+from importlib import import_module
+from struct import pack
+
+
+def _memoized(pack_function):
+    # The packed option is kept until an attribute of the option is set again.
+    # Servers keep packed options of their own (templates, option blobs, cached replies),
+    # so an option is changed by setting its data and registering it again,
+    # IE: router.data = [...] then server.register(router). Changes in place aren't seen.
+    @wraps(pack_function)
+    def pack(self):
+        try:
+            return self.__dict__['_packed']
+        except KeyError:
+            packed = pack_function(self)
+            self.__dict__['_packed'] = packed
+            return packed
+
+    pack.memoized = True
+    return pack
+
+
+class OptionRegistry(dict):
+    # Maps option codes to option classes.
+    #
+    # The option classes are defined in OptionClasses, which is imported the
+    # first time a code is looked up or an option class is used by name
+    # (Options.Router). Creating the dataclasses is most of the import time
+    # of the options, tools that never touch an option don't pay for it.
+
+    loaded = False
+
+    def load(self):
+        if not self.loaded:
+            module = import_module('.OptionClasses', __package__)
+            # Options.Router keeps working once the classes exist
+            globals().update({name: value for name, value in vars(module).items()
+                              if isinstance(value, type) and issubclass(value, BaseOption)})
+            self.loaded = True
+
+    def __missing__(self, code):
+        if self.loaded:
+            raise KeyError(code)
+        self.load()
+        return self[code]
+
+    def __contains__(self, code):
+        self.load()
+        return dict.__contains__(self, code)
 
 
 class BaseOption(object):
-    classes: Dict = dict()
+    classes: dict = OptionRegistry()
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         cls.classes[cls.code.default] = cls
 
-    @classmethod
-    def unpack(cls, data: bytes):
-        out = []
-        option_list = list(data)
-
-        while (len(option_list)):
-            code = option_list.pop(0)
-
-            if (code == 0 or code == 255):
-                out.append(cls.classes[code]())
-                continue
-
-            length = option_list.pop(0)
-            data = bytes([option_list.pop(0) for _ in range(length)])
+        pack_function = cls.__dict__.get('pack')
+        if pack_function is not None and not getattr(pack_function, 'memoized', False):
+            cls.pack = _memoized(pack_function)
 
-            if (code in cls.classes):
-                out.append(cls.classes[code](data))
-            else:
-                out.append(cls.classes[-1](code, length, data))
+    def __setattr__(self, name, value):
+        self.__dict__.pop('_packed', None)
+        object.__setattr__(self, name, value)
 
-        return out
+    @classmethod
+    def unpack(cls, data: bytes):
+        return OptionList.parse(data)
 
+    @_memoized
     def pack(self):
         return pack(f'! 2B {self.length}s', self.code, self.length, self.data)
 
 
-@dataclass
-class UnknownOption(BaseOption):
-    code: int = field(default=-1)
-    length: int = field(default=0)
-    data: bytes = field(default=b'')
-
-
-# --------------------------------------------------
-# Vendor Extension classes
-#
-# Most of these will be sent from the server
-# exclusively in response to requests.
-# --------------------------------------------------
-
-
-@dataclass(init=False)
-class Pad(BaseOption):
-    code: int = field(default=0)
-    length: int = field(default=0)
-    data: bytes = field(default=b'')
-
-    def pack(self):
-        return b'\x00'
-
-
-@dataclass(init=False)
-class Subnet(BaseOption):
-    code: int = field(default=1)
-    length: int = field(default=4)
-    data: ip_address = field(default=ip_address(0))
-
-    def __init__(self, data):
-        self.data = ip_address(data)
-
-    def pack(self):
-        return pack('! 2B 4s', self.code, self.length, self.data.packed)
-
-
-@dataclass(init=False)
-class TimeOffset(BaseOption):
-    code: int = field(default=2, init=False)
-    length: int = field(default=4, init=False)
-    data: int
-
-    def __init__(self, data):
-        if (type(data) == int):
-            self.data = data
-        elif (type(data) == bytes):
-            self.data = int.from_bytes(data[:4], 'big')
-        else:
-            raise TypeError(f'data must be of type int or bytes. Recieved a {type(data)} object instead.')
-
-    def pack(self):
-        return pack('! 2B L', self.code, self.length, self.data)
-
-
-@dataclass(init=False)
-class Router(BaseOption):
-    code: int = field(default=3, init=False)
-    length: int
-    data: List
-
-    def __init__(self, address, *addresses):
-        self.data = list()
-
-        if (type(address) == bytes):
-            self.length = len(address)
-            addresses = unpack(f'! {len(address) // 4}L', address)
-        else:
-            self.length = 4 + (len(addresses) * 4)
-            self.data.append(ip_address(address))
-
-        for addr in addresses:
-            self.data.append(ip_address(addr))
-
-    def pack(self):
-        return pack('! 2B', self.code, self.length) + b''.join(map(lambda a: a.packed, self.data))
-
-
-@dataclass(init=False)
-class TimeServers(Router):
-    code: int = field(default=4, init=False)
-
-
-@dataclass(init=False)
-class NameServers(Router):
-    code: int = field(default=5, init=False)
-
-
-@dataclass(init=False)
-class DNSServers(Router):
-    code: int = field(default=6, init=False)
-
-
-@dataclass(init=False)
-class LogServers(Router):
-    code: int = field(default=7, init=False)
-
-
-@dataclass(init=False)
-class CookieServers(Router):
-    code: int = field(default=8, init=False)
-
-
-@dataclass(init=False)
-class LPRServers(Router):
-    code: int = field(default=9, init=False)
-
-
-@dataclass(init=False)
-class ImpressServers(Router):
-    code: int = field(default=10, init=False)
-
-
-@dataclass(init=False)
-class ResourceLocationServers(Router):
-    code: int = field(default=11, init=False)
-
-
-@dataclass(init=False)
-class HostName(BaseOption):
-    code: int = field(default=12, init=False)
-    length: int
-    data: bytes
-
-    def __init__(self, data):
-        self.length = len(data)
-        self.data = data
-
-
-@dataclass(init=False)
-class BootFileSize(BaseOption):
-    code: int = field(default=13, init=False)
-    length: int = field(default=2, init=False)
-    data: int
-
-    def __init__(self, data):
-        if (type(data) == int):
-            self.data = data
-        elif (type(data) == bytes):
-            self.data = int.from_bytes(data[:2], 'big')
-        else:
-            raise TypeError(f'data must be of type int or bytes. Recieved a {type(data)} object instead.')
-
-    def pack(self):
-        return pack('! 2B H', self.code, self.length, self.data)
-
-
-@dataclass
-class MeritDumpFile(HostName):
-    code: int = field(default=14, init=False)
-
-
-@dataclass
-class DomainName(HostName):
-    code: int = field(default=15, init=False)
-
-
-@dataclass
-class SwapServer(Subnet):
-    code: int = field(default=16, init=False)
-
-
-@dataclass
-class RootPath(HostName):
-    code: int = field(default=17, init=False)
-
-
-@dataclass
-class ExtensionsPath(HostName):
-    code: int = field(default=18, init=False)
-
-
-@dataclass(init=False)
-class End(BaseOption):
-    code: int = field(default=255)
-    length: int = field(default=0)
-    data: bytes = field(default=b'')
-
-    def pack(self):
-        return b'\xff'
-
-
-# --------------------------------------------------
-# IP Layer Parameters classes
-#
-# These parameters control operation of IP on a
-# host as a whole.
-# --------------------------------------------------
-
-@dataclass(init=False)
-class Forwarding(BaseOption):
-    code: int = field(default=19)
-    length: int = field(default=1)
-    data: bool = field(default=False)
-
-    def __init__(self, data):
-        self.data = bool(data)
-
-    def pack(self):
-        return pack('! 2B ?', self.code, self.length, self.data)
-
-
-@dataclass(init=False)
-class NonlocalRouting(Forwarding):
-    code: int = field(default=20)
-
-
-@dataclass(init=False)
-class PolicyFilter(BaseOption):
-    code: int = field(default=21)
-    length: int = field(default=8)
-    data: List = field(default=False)
-
-    def __init__(self, address, *addresses):
-        self.data = list()
-
-        if (type(address) == bytes):
-            self.length = len(address)
-            addresses = unpack(f'! {len(address) // 8}L', address)
-        else:
-            self.length = 8 + (len(addresses) * 8)
-            self.data.append(ip_interface(address))
-
-        for addr in addresses:
-            self.data.append(ip_interface(addr))
-
-    def pack(self):
-        return pack('! 2B', self.code, self.length) + b''.join(map(lambda a: a.packed + a.netmask.packed, self.data))
-
-
-@dataclass(init=False)
-class MaxDatagramReassembly(BootFileSize):
-    code: int = field(default=22)
-
-
-@dataclass(init=False)
-class DefaultTTL(BaseOption):
-    code: int = field(default=23)
-    length: int = field(default=1)
-    data: int = field(default=255)
-
-    def __init__(self, data):
-        if (type(data) == bytes):
-            self.data = data[0]
-        elif (type(data) == int):
-            self.data = data
-        else:
-            raise TypeError(f'data must be of type int or bytes. Recieved a {type(data)} object instead.')
-
-    def pack(self):
-        return pack('! 3B', self.code, self.length, self.data)
-
-
-@dataclass(init=False)
-class MTUTimeout(TimeOffset):
-    code: int = field(default=24)
-
-
-@dataclass(init=False)
-class MTUTable(BaseOption):
-    code: int = field(default=25)
-    length: int = field(default=2)
-    data: List = field(default_factory=list)
-
-    def __init__(self, value, *values):
-        self.data = list()
-
-        if (type(value) == bytes):
-            values = unpack(f'! {len(value) // 2}H', value)
-        elif (type(value) == int):
-            self.data.append(value)
-        else:
-            raise TypeError(f'data must be of type int or bytes. Recieved a {type(value)} object instead.')
-
-        for val in values:
-            self.data.append(val)
-
-        self.length = len(self.data) * 2
-
-    def pack(self):
-        return pack(f'! 2B L {self.length // 2}H', self.code, self.length, *self.data)
-
-
-# --------------------------------------------------
-# IP Layer Parameters classes
-#
-# These parameters control operation of IP on a
-# host's particular interface.
-# --------------------------------------------------
+class OptionList(object):
+    # List of options parsed from a packet.
+    #
+    # Parsing only records where each option's data is, option objects are
+    # created the first time they are looked at. An index of code -> positions
+    # makes looking an option up by code, or testing if a packet holds an
+    # option, O(1) no matter how many options the packet has.
 
+    def __init__(self, options=()):
+        self.data = b''
+        self.items = list()  # Option objects, or a (code, start, end) span of data not created yet
+        self.codes = dict()  # Keys will be an int being the code of the option, values a list of positions
 
-@dataclass(init=False)
-class InterfaceMTU(BootFileSize):
-    code: int = field(default=26)
+        self.extend(options)
 
+    @classmethod
+    def parse(cls, data):
+        """
+        :param data: bytes-like object: Option area of a packet
+        :return: OptionList
+        """
+        out = cls()
+        out.data = data = memoryview(data)
+        items = out.items
+        codes = out.codes
+
+        offset = 0
+        end = len(data)
+
+        while offset < end:
+            code = data[offset]
 
-@dataclass(init=False)
-class SubnetsLocal(Forwarding):
-    code: int = field(default=27)
-
-
-@dataclass(init=False)
-class BroadcastAddress(Subnet):
-    code: int = field(default=28)
-
-
-@dataclass(init=False)
-class PerformMaskDisco(Forwarding):
-    code: int = field(default=29)
-
-
-@dataclass(init=False)
-class MaskSupplier(Forwarding):
-    code: int = field(default=30)
-
-
-@dataclass(init=False)
-class PerformRouterDisco(Forwarding):
-    code: int = field(default=31)
-
-
-@dataclass(init=False)
-class RouterSolicitaionAddress(Subnet):
-    code: int = field(default=32)
-
-
-@dataclass(init=False)
-class StaticRoute(PolicyFilter):
-    code: int = field(default=33)
-
-
-# --------------------------------------------------
-# Link Layer Parameters classes
-#
-# These parameters control operation of IP on a
-# specific link layer interface
-# --------------------------------------------------
-
-
-@dataclass(init=False)
-class TrailerEncapsulation(Forwarding):
-    code: int = field(default=34)
-
-
-@dataclass(init=False)
-class ARPCacheTimeout(TimeOffset):
-    code: int = field(default=35)
-
-
-@dataclass(init=False)
-class EthernetEncapsulation(Forwarding):
-    code: int = field(default=36)
-
-
-# --------------------------------------------------
-# TCP Parameters classes
-#
-# These parameters control operation of IP for
-# TCP stream connections
-# --------------------------------------------------
-
-
-@dataclass(init=False)
-class TCPDefaultTTL(DefaultTTL):
-    code: int = field(default=37)
-
-
-@dataclass(init=False)
-class TCPKeepaliveInterval(TimeOffset):
-    code: int = field(default=38)
-
-
-@dataclass(init=False)
-class TCPKeepaliveGarbage(Forwarding):
-    code: int = field(default=39)
-
-
-# --------------------------------------------------
-# Application and Service Parameters classes
-#
-# These parameters control operation of various
-# applications and services.
-# --------------------------------------------------
-
-
-@dataclass(init=False)
-class NISDomain(HostName):
-    code: int = field(default=40)
-
-
-@dataclass(init=False)
-class NetworkInformationServers(Router):
-    code: int = field(default=41)
-
-
-@dataclass(init=False)
-class NTPServers(Router):
-    code: int = field(default=42)
-
-
-@dataclass(init=False)
-class VendorSpecificInformation(HostName):
-    code: int = field(default=43)
-
-
-@dataclass(init=False)
-class NetBIOSNameServers(Router):
-    code: int = field(default=44)
-
-
-@dataclass(init=False)
-class NetBIOSDistroServers(HostName):
-    code: int = field(default=45)
-
-
-@dataclass(init=False)
-class NetBIOSNodeType(Router):
-    code: int = field(default=46)
-
-
-@dataclass(init=False)
-class NetBIOSScope(HostName):
-    code: int = field(default=47)
-
-
-@dataclass(init=False)
-class XWindowFontServers(Router):
-    code: int = field(default=48)
-
-
-@dataclass(init=False)
-class XWindowDisplayManager(Router):
-    code: int = field(default=49)
-
-
-@dataclass(init=False)
-class NISplusDomain(Router):
-    code: int = field(default=64)
-
-
-@dataclass(init=False)
-class NISplusServers(Router):
-    code: int = field(default=65)
-
-
-@dataclass(init=False)
-class MovileIPHomeAgent(Router):
-    code: int = field(default=68)
-
-
-@dataclass(init=False)
-class SMTPServers(Router):
-    code: int = field(default=69)
-
-
-@dataclass(init=False)
-class POP3Servers(Router):
-    code: int = field(default=70)
-
-
-@dataclass(init=False)
-class NNTPServers(Router):
-    code: int = field(default=71)
-
-
-@dataclass(init=False)
-class DefaultWWWServers(Router):
-    code: int = field(default=72)
-
-
-@dataclass(init=False)
-class DefaultFingerServers(Router):
-    code: int = field(default=73)
-
-
-@dataclass(init=False)
-class DefaultIRCServers(Router):
-    code: int = field(default=74)
-
-
-@dataclass(init=False)
-class StreetTalkServers(Router):
-    code: int = field(default=75)
-
-
-@dataclass(init=False)
-class STDAServers(Router):
-    code: int = field(default=76)
-
-
-# --------------------------------------------------
-# DHCP Extension classes
-#
-# These parameters control operation the
-# DHCP protocol
-# --------------------------------------------------
-
-
-@dataclass(init=False)
-class RequestedIP(Subnet):
-    code: int = field(default=50)
-
-
-@dataclass(init=False)
-class IPLeaseTime(TimeOffset):
-    code: int = field(default=51)
-
-
-@dataclass(init=False)
-class OptionOverload(DefaultTTL):
-    code: int = field(default=52)
-
-
-@dataclass(init=False)
-class DHCPMessageType(DefaultTTL):
-    code: int = field(default=53)
-
-
-@dataclass(init=False)
-class DHCPServerID(Subnet):
-    code: int = field(default=54)
-
-
-@dataclass(init=False)
-class ParameterRequestList(BaseOption):
-    code: int = field(default=55)
-    length: int = field(default=1)
-    data: List = field(default_factory=list)
-
-    def __init__(self, code, *codes):
-        self.data = list()
-
-        if (type(code) == bytes):
-            codes = list(code)
-        elif (type(code) == list):
-            codes = code
-        elif (type(code) == int):
-            self.data.append(code)
-        else:
-            raise TypeError(f'data must be of type bytes, list, or int. Recieved a {type(code)} object instead.')
-
-        for code in codes:
-            self.data.append(code)
-        self.length = len(self.data)
-
-    def pack(self):
-        return pack(f'! 2B {self.length}B', self.code, self.length, *self.data)
-
-
-@dataclass(init=False)
-class Message(HostName):
-    code: int = field(default=56)
-
-
-@dataclass(init=False)
-class MaxDHCPMessageSize(BootFileSize):
-    code: int = field(default=57)
-
-
-@dataclass(init=False)
-class RenewalT1(TimeOffset):
-    code: int = field(default=58)
-
-
-@dataclass(init=False)
-class RenewalT2(TimeOffset):
-    code: int = field(default=59)
-
-
-@dataclass(init=False)
-class VendorClassID(HostName):
-    code: int = field(default=60)
-
+            if (code == 0 or code == 255):
+                start = stop = offset + 1
+            elif offset + 1 < end:
+                start = offset + 2
+                stop = start + data[offset + 1]
+                if stop > end:
+                    # Option runs past the end of the packet
+                    break
+            else:
+                break
 
-@dataclass(init=False)
-class ClientID(HostName):
-    code: int = field(default=61)
+            codes.setdefault(code, list()).append(len(items))
+            items.append((code, start, stop))
+            offset = stop
 
+        return out
 
-@dataclass(init=False)
-class TFTPServerName(HostName):
-    code: int = field(default=66)
+    def _create(self, index):
+        item = self.items[index]
 
+        if (type(item) == tuple):
+            code, start, stop = item
 
-@dataclass(init=False)
-class BootfileName(HostName):
-    code: int = field(default=67)
+            if (code == 0 or code == 255):
+                item = BaseOption.classes[code]()
+            elif (code in BaseOption.classes):
+                item = BaseOption.classes[code](bytes(self.data[start:stop]))
+            else:
+                item = BaseOption.classes[-1](code, stop - start, bytes(self.data[start:stop]))
+
+            self.items[index] = item
+
+        return item
+
+    def get(self, code, default=None):
+        """
+        :param code: int: Code of the option
+        :return: First option with the code or default
+        """
+        positions = self.codes.get(code)
+        if positions:
+            return self._create(positions[0])
+        return default
+
+    def raw(self, code):
+        """
+        Data of the first option with the code, without creating the option
+
+        :param code: int: Code of the option
+        :return: bytes or None
+        """
+        positions = self.codes.get(code)
+        if not positions:
+            return None
+
+        item = self.items[positions[0]]
+        if (type(item) == tuple):
+            return bytes(self.data[item[1]:item[2]])
+        return item.pack()[2:]
+
+    def has(self, code):
+        return code in self.codes
+
+    def append(self, option):
+        self.codes.setdefault(option.code, list()).append(len(self.items))
+        self.items.append(option)
+
+    def extend(self, options):
+        for option in options:
+            self.append(option)
+
+    def __contains__(self, option):
+        try:
+            positions = self.codes.get(option.code, ())
+        except AttributeError:
+            return False
+        return any(self._create(index) == option for index in positions)
+
+    def __getitem__(self, index):
+        if (type(index) == slice):
+            return [self._create(i) for i in range(len(self.items))[index]]
+        return self._create(range(len(self.items))[index])
+
+    def __iter__(self):
+        for index in range(len(self.items)):
+            yield self._create(index)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+
+def __getattr__(name):
+    # Option classes, IE: Options.Router
+    if not name.startswith('__'):
+        BaseOption.classes.load()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
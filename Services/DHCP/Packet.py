@@ -1,10 +1,9 @@
 from dataclasses import dataclass, field, InitVar
 from ipaddress import ip_address
 from struct import pack, unpack
-from typing import List
 
 from RawPacket import MAC_Address
-from Services.DHCP.Options import BaseOption
+from Services.DHCP.Options import BaseOption, OptionList
 
 
 @dataclass
@@ -28,7 +27,7 @@ class DHCPPacket(object):
     _chaddr: InitVar = field(default=0)
     sname: bytes = bytes(64)
     filename: bytes = bytes(128)
-    options: List = field(default_factory=list)
+    options: OptionList = field(default_factory=OptionList)
 
     def __post_init__(self, _ciaddr, _yiaddr, _siaddr, _giaddr, _chaddr):
         self.ciaddr = ip_address(_ciaddr)
@@ -37,6 +36,24 @@ class DHCPPacket(object):
         self.giaddr = ip_address(_giaddr)
         self.chaddr = MAC_Address(_chaddr)
 
+        if (type(self.options) != OptionList):
+            self.options = OptionList(self.options)
+
+    def option(self, code, default=None):
+        """
+        :param code: int: Code of the option
+        :return: First option in the packet with the code or default
+        """
+        return self.options.get(code, default)
+
+    @property
+    def message_type(self):
+        # DHCPMessageType (53) of the packet, None for plain BOOTP
+        data = self.options.raw(53)
+        if data:
+            return data[0]
+        return None
+
     def build(self):
         return pack(f'! 4B L 2H 4L {self.hlen}s {16 - self.hlen}x', self.op, self.htype, self.hlen,
                     self.hops, self.xid, self.secs, self.broadcast << 15, self.ciaddr._ip,
@@ -62,7 +79,7 @@ class DHCPPacket(object):
         while (True):
             if (packet[checkup:checkup + 4] == b'\x63\x82\x53\x63'):
                 # check for magic cookie to notify start of options.
-                out['options'] = BaseOption.unpack(packet[checkup + 4:])
+                out['options'] = BaseOption.unpack(memoryview(packet)[checkup + 4:])
                 break
             elif (checkup == 44):
                 # If sname isn't being used for option overload
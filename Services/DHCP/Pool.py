@@ -1,60 +1,149 @@
-from ipaddress import ip_network
+from collections import deque
+from ipaddress import ip_network, ip_address
+from threading import Lock
+
+from .ACL import MacACL
+from .Allocator import Allocator
 
 
 class Pool(object):
-    def __init__(self, network='192.168.0.0', mask='255.255.255.0'):
+    def __init__(self, network='192.168.0.0', mask='255.255.255.0', ranges=None, exclusions=()):
+        """
+        :param network: Network address of the pool
+        :param mask: Network mask of the pool
+        :param ranges: list: (first, last) addresses to hand out. Defaults to every host in the network
+        :param exclusions: list: (first, last) addresses, or single addresses, never to hand out
+        """
         self._network = ip_network(fr'{network}/{mask}')
-        self.hosts = list(self._network.hosts())
+        self._address = self._network.network_address.__class__
+
+        if ranges is None:
+            ranges = [self.host_range]
+
+        # Free host addresses, stored as integer ranges.
+        self.hosts = Allocator(
+            [(int(ip_address(first)), int(ip_address(last))) for first, last in ranges],
+            [self._exclusion(exclusion) for exclusion in exclusions]
+        )
+        # Anything outside the network is never handed out.
+        self.hosts.exclude(0, int(self._network.network_address) - 1)
+        self.hosts.exclude(int(self._network.broadcast_address) + 1, (1 << self._network.max_prefixlen) - 1)
+
+        # Addresses taken from the free addresses ahead of time (IE: by the Refiller or ARP probes),
+        # offered before any other
+        self.ready = deque()
+        self.drained = None  # Called with the pool once <low> or fewer addresses are ready
+        self.low = 0
+        self.misses = 0  # Addresses handed out straight from the free addresses while a refill was due
+        # Set while an ArpProber fills the ready queue. Only probed addresses, the ready ones, are offered then.
+        self.probed = False
+
+        # Held while the free addresses or reservations change, handlers of different clients share the pool
+        self.lock = Lock()
 
         # IP/MAC reservations
         self.reservations = dict()
+        self._reserved = set()  # Reserved addresses as integers
+
+        # White/Blacklist handling. Servers share one between all of their pools
+        self.listing = MacACL()
+
+    @staticmethod
+    def _exclusion(exclusion):
+        try:
+            first, last = exclusion
+        except (TypeError, ValueError):
+            first = last = exclusion
+        return int(ip_address(first)), int(ip_address(last))
 
-        # White/Blacklist handling
-        self.listing = list()
-        self.list_mode = 'b'
+    @property
+    def host_range(self):
+        # First and last usable host address, the same ones network.hosts() would give.
+        first = int(self._network.network_address)
+        last = int(self._network.broadcast_address)
+
+        if self._network.version == 4 and self._network.prefixlen < 31:
+            # Network and broadcast addresses aren't hosts
+            return self._address(first + 1), self._address(last - 1)
+        elif self._network.version == 6 and self._network.prefixlen < 127:
+            # Subnet-Router anycast address isn't a host
+            return self._address(first + 1), self._address(last)
+        return self._address(first), self._address(last)
+
+    def add_range(self, first, last):
+        with self.lock:
+            self.hosts.add_range(int(ip_address(first)), int(ip_address(last)))
+
+    def exclude(self, first, last=None):
+        first, last = self._exclusion((first, first if last is None else last))
+        with self.lock:
+            self.hosts.exclude(first, last)
+
+    def claim(self, ip, ready_only=False):
+        """
+        Take a specific free address, whether it's still among the free addresses
+        or was already taken out for the ready queue
+
+        :param ip: Address to take
+        :param ready_only: bool: Only take the address from the ready queue
+        :return: bool: True if the address was free
+        """
+        address = int(ip)
+        with self.lock:
+            if not ready_only and self.hosts.take(address):
+                return True
+            try:
+                self.ready.remove(address)
+            except ValueError:
+                return False
+            return True
 
     def reserve(self, mac, ip):
+        if self.claim(ip):
+            with self.lock:
+                self.reservations[mac] = ip
+                self._reserved.add(int(ip))
+            return
 
-        try:
-            self.hosts.remove(ip)
-            self.reservations[mac] = ip
-        except ValueError:
-            if mac in self.reservations:
-                pass
-            elif ip == self.broadcast:
-                pass
-            else:
-                print(f'IP {ip} not in network {self._network}')
+        if mac in self.reservations:
+            pass
+        elif ip == self.broadcast:
+            pass
+        else:
+            print(f'IP {ip} not in network {self._network}')
 
     def unreserve(self, mac):
-        self.reservations.pop(mac, None)
+        with self.lock:
+            ip = self.reservations.pop(mac, None)
+            if ip is not None:
+                self._reserved.discard(int(ip))
 
     def is_reserved(self, mac):
         return mac in self.reservations
 
-    def add_listing(self, mac):
-        if mac not in self.listing:
-            self.listing.append(mac)
+    @property
+    def list_mode(self):
+        return self.listing.mode
+
+    @list_mode.setter
+    def list_mode(self, mode):
+        self.listing.mode = mode
+
+    def add_listing(self, rule):
+        # <rule> is a MAC_Address or a prefix / masked rule, see MacACL
+        self.listing.add(rule)
 
-    def remove_listing(self, mac):
-        if mac in self.listing:
-            self.listing.remove(mac)
+    def remove_listing(self, rule):
+        self.listing.remove(rule)
 
     def toggle_listing_mode(self):
-        if self.list_mode == 'w':
-            self.list_mode = 'b'
-            return
-        self.list_mode = 'w'
+        self.listing.toggle_mode()
 
     def get_ip(self, mac, requested_ip=None):
 
-        if mac in self.listing:
-            if self.list_mode == 'b':
-                # If we have the listing and we're using a blacklist, don't give an IP
-                return None
-        elif self.list_mode == 'w':
-            # If we don't have the listing and we're using a whitelist, don't give an IP
-            return
+        if not self.listing.allows(mac):
+            # Blacklisted, or not on the whitelist
+            return None
 
         try:
             # Try to remove object from the reservations
@@ -63,23 +152,43 @@ class Pool(object):
         except KeyError:
             # KeyError will be raised if trying to get
             # a reservation that does not exists.
-            try:
-                self.hosts.remove(requested_ip)
+            if requested_ip is not None and self.claim(requested_ip, ready_only=self.probed):
                 return requested_ip
 
-            except ValueError:
-                # ValueError will be raised if trying to get
-                # an IP address that does not exists in our pool of hosts.
-                try:
-                    return self.hosts.pop(0)
-
-                except IndexError:
-                    # If the number of available addresses gets exhausted return None
+            with self.lock:
+                if self.ready:
+                    address = self.ready.popleft()
+                    if self.drained is not None and len(self.ready) <= self.low:
+                        self.drained(self)
+                    return self._address(address)
+
+                if self.probed:
+                    # Nothing probed is left. No offer rather than one that might be in use,
+                    # the client retransmits once the prober has caught up.
+                    self.misses = self.misses + 1
                     return None
 
+                address = self.hosts.allocate()
+                if self.drained is not None:
+                    self.misses = self.misses + 1
+                    self.drained(self)
+            if address is None:
+                # If the number of available addresses gets exhausted return None
+                return None
+            return self._address(address)
+
+    def take(self, ip):
+        # Mark a specific address as in use, IE: a lease restored from disk
+        if ip not in self._network:
+            return False
+        return self.claim(ip)
+
     def add_ip(self, ip):
         if ip in self._network:
-            self.hosts.insert(0, ip)
+            with self.lock:
+                if int(ip) not in self._reserved:
+                    # Reserved addresses stay with their reservation
+                    self.hosts.release(int(ip))
 
     @property
     def broadcast(self):
@@ -93,5 +202,9 @@ class Pool(object):
     def network(self):
         return self._network.network_address
 
+    @property
+    def available(self):
+        return len(self.hosts) + len(self.ready)
+
     def __contains__(self, item):
-        return item in self.hosts
+        return int(item) in self.hosts or int(item) in self.ready
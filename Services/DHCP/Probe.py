@@ -0,0 +1,199 @@
+import socket
+from ipaddress import IPv4Address
+from select import select
+from threading import Thread
+from time import monotonic
+
+from RawPacket import Ethernet, ARP, MAC_Address
+
+ETH_P_ARP = 0x0806
+
+BROADCAST_MAC = MAC_Address('FF:FF:FF:FF:FF:FF')
+NO_MAC = MAC_Address(0)
+NO_ADDRESS = IPv4Address(0)
+
+
+class ArpProber(Thread):
+    # Checks addresses are unused before they're offered (RFC 5227 probes).
+    #
+    # Addresses are taken out of the pools ahead of time and probed with ARP
+    # requests from 0.0.0.0. Addresses nobody answers for go on the ready
+    # queue of their pool, which offers are made from first, so an offer
+    # never waits on a probe. Addresses something answers for are held out
+    # of the pool like a declined address.
+    #
+    # ARP from a host using an address the pool thinks is free (IE: a
+    # static address inside the range) gets that address held out as well.
+    #
+    # While probing, pools only offer ready addresses. A pool that runs out
+    # makes no offer (see Pool.get_ip) until the next addresses are probed.
+
+    def __init__(self, server, interface=None, sock=None, ready=8, attempts=2, wait=0.5):
+        """
+        :param server: RawServer: Server whose pools are probed
+        :param interface: str: Interface to probe on. Defaults to the server's
+        :param sock: socket: Stand in for the ARP socket, IE: one end of a socketpair
+        :param ready: int: Checked addresses kept ready per pool
+        :param attempts: int: Probes sent for an address before it's taken to be unused
+        :param wait: float: Seconds to wait for an answer to each probe
+        """
+        super().__init__(name='DHCP ARP Prober', daemon=True)
+        self.server = server
+        self.ready = ready
+        self.attempts = attempts
+        self.wait = wait
+
+        if sock is None:
+            # The server's socket only gets IPv4 frames, ARP needs a socket of its own.
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+            sock.bind((interface or server.server_address[0], ETH_P_ARP))
+        self.socket = sock
+        self.socket.setblocking(False)
+
+        self.pending = dict()  # Keys will be the address being probed as an int, values [pool, probes left, deadline]
+        self.probing = dict()  # Keys will be the pool, values the number of its addresses being probed
+
+        self.probes = 0  # Probes sent
+        self.conflicts = 0  # Addresses found in use
+        self.keep_alive = True
+
+        for scope in server.scopes:
+            # Offers wait for probed addresses from now on, pools added later are marked by refill()
+            scope.pool.probed = True
+
+    def refill(self):
+        # Take addresses to probe from every pool short of ready addresses
+        for scope in self.server.scopes:
+            pool = scope.pool
+            pool.probed = True
+            wanted = self.ready - len(pool.ready) - self.probing.get(pool, 0)
+
+            for _ in range(wanted):
+                with pool.lock:
+                    address = pool.hosts.allocate()
+                if address is None:
+                    break
+
+                self.pending[address] = [pool, self.attempts, 0.0]
+                self.probing[pool] = self.probing.get(pool, 0) + 1
+
+    def probe(self, now):
+        """
+        Send the probes that are due and move addresses nobody answered for to the ready queues
+
+        :param now: float: monotonic()
+        :return: float: monotonic() the next probe is due, or None if nothing is being probed
+        """
+        due = None
+
+        for address, entry in list(self.pending.items()):
+            pool, left, deadline = entry
+            if deadline > now:
+                due = deadline if due is None else min(due, deadline)
+                continue
+
+            if left == 0:
+                # No answer to any probe
+                del self.pending[address]
+                self._done(pool)
+                with pool.lock:
+                    pool.ready.append(address)
+                continue
+
+            self.send(IPv4Address(address))
+            entry[1] = left - 1
+            entry[2] = now + self.wait
+            due = entry[2] if due is None else min(due, entry[2])
+
+        return due
+
+    def send(self, address):
+        arp = ARP(1, self.server.mac_address, NO_ADDRESS, NO_MAC, address)
+        try:
+            self.socket.send(Ethernet(BROADCAST_MAC, self.server.mac_address, arp).build())
+            self.probes = self.probes + 1
+        except OSError:
+            # Nothing sent, the address gets another probe or is taken to be unused.
+            pass
+
+    def receive(self, frame):
+        try:
+            eth = Ethernet.disassemble(frame)
+        except Exception:
+            return
+        if eth.type != ETH_P_ARP:
+            return
+
+        arp = eth.payload
+        if arp.sender_mac == self.server.mac_address:
+            return
+
+        address = int(arp.sender_ip)
+        if address:
+            # Something is using the address
+            self.conflict(address)
+        elif arp.target_ip._ip in self.pending:
+            # Another host is probing for the same address (RFC 5227 2.1.1)
+            self.conflict(arp.target_ip._ip)
+
+    def conflict(self, address):
+        entry = self.pending.pop(address, None)
+        if entry is not None:
+            self._done(entry[0])
+        else:
+            scope = self.server.scopes.match(IPv4Address(address))
+            if scope is None:
+                return
+
+            # Only a free or ready address can be held out, one in use belongs to its lease
+            if not scope.pool.claim(IPv4Address(address)):
+                return
+
+        self.conflicts = self.conflicts + 1
+        self.server.quarantine(IPv4Address(address))
+
+    def _done(self, pool):
+        self.probing[pool] = self.probing[pool] - 1
+
+    def run(self):
+        while self.keep_alive:
+            self.refill()
+            due = self.probe(monotonic())
+
+            timeout = self.wait if due is None else max(0.0, min(self.wait, due - monotonic()))
+            readable, _, _ = select([self.socket], [], [], timeout)
+
+            while readable:
+                try:
+                    frame = self.socket.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    return
+                self.receive(frame)
+
+    def statistics(self):
+        return {
+            'probes': self.probes,
+            'conflicts': self.conflicts,
+            'probing': len(self.pending),
+            'ready': sum(len(scope.pool.ready) for scope in self.server.scopes),
+        }
+
+    def shutdown(self):
+        self.keep_alive = False
+        if self.is_alive():
+            self.join()
+
+        # Addresses still being probed or waiting to be offered go back to their pool
+        for address, (pool, _, _) in list(self.pending.items()):
+            pool.add_ip(IPv4Address(address))
+        self.pending.clear()
+        self.probing.clear()
+
+        for scope in self.server.scopes:
+            scope.pool.probed = False
+            while scope.pool.ready:
+                scope.pool.add_ip(IPv4Address(scope.pool.ready.popleft()))
+
+        self.socket.close()
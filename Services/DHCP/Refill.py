@@ -0,0 +1,93 @@
+from ipaddress import ip_address
+from threading import Thread, Condition
+from time import monotonic
+
+
+class Refiller(Thread):
+    # Keeps the ready queue of every pool topped up, so offers pop an address
+    # off a deque instead of going to the allocator while the client waits.
+    #
+    # A pool asks for a refill once its queue drops to <low>. The time from
+    # asking to being topped up again is the refill lag.
+
+    def __init__(self, server, depth=32, low=8):
+        """
+        :param server: RawServer: Server whose pools are refilled
+        :param depth: int: Addresses kept ready per pool
+        :param low: int: Ready addresses left when a pool asks for a refill
+        """
+        super().__init__(name='DHCP Refiller', daemon=True)
+        self.server = server
+        self.depth = depth
+        self.low = low
+
+        self.condition = Condition()
+        self.waiting = dict()  # Keys will be the pool, values monotonic() it asked for a refill
+        self.keep_alive = True
+
+        self.refills = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def attach(self, pool):
+        pool.drained = self.drained
+        pool.low = self.low
+        self.drained(pool)
+
+    def drained(self, pool):
+        # Called by the pool, on the request path. Never waits on the refill.
+        with self.condition:
+            if pool not in self.waiting:
+                self.waiting[pool] = monotonic()
+                self.condition.notify()
+
+    def fill(self, pool):
+        with pool.lock:
+            while len(pool.ready) < self.depth:
+                address = pool.hosts.allocate()
+                if address is None:
+                    break
+                pool.ready.append(address)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.waiting and self.keep_alive:
+                    self.condition.wait()
+                if not self.keep_alive:
+                    return
+
+                waiting = self.waiting
+                self.waiting = dict()
+
+            for pool, stamp in waiting.items():
+                self.fill(pool)
+
+                lag = monotonic() - stamp
+                self.refills = self.refills + 1
+                self.lag_total = self.lag_total + lag
+                self.lag_max = max(self.lag_max, lag)
+
+    def statistics(self):
+        return {
+            'refills': self.refills,
+            'lag_average': self.lag_total / self.refills if self.refills else 0.0,
+            'lag_max': self.lag_max,
+            'misses': sum(scope.pool.misses for scope in self.server.scopes),
+            'ready': sum(len(scope.pool.ready) for scope in self.server.scopes),
+        }
+
+    def shutdown(self):
+        with self.condition:
+            self.keep_alive = False
+            self.condition.notify_all()
+
+        if self.is_alive():
+            self.join()
+
+        # Ready addresses go back to the free addresses of their pool
+        for scope in self.server.scopes:
+            pool = scope.pool
+            pool.drained = None
+            while pool.ready:
+                pool.add_ip(ip_address(pool.ready.popleft()))
@@ -0,0 +1,359 @@
+import socket
+from collections import OrderedDict
+from ipaddress import ip_address
+from select import select
+from socketserver import BaseRequestHandler
+from struct import pack, pack_into, unpack_from
+from threading import Thread, Lock
+from time import monotonic
+
+from BaseServers import BaseRawServer
+from RawPacket import MAC_Address, checksum
+from .Server import get_defaults
+from .Template import IP, UDP
+
+MAGIC_COOKIE = b'\x63\x82\x53\x63'
+NO_ADDRESS = bytes(4)
+BROADCAST_IP = ip_address('255.255.255.255')
+BROADCAST_MAC = MAC_Address('FF:FF:FF:FF:FF:FF')
+
+
+def scan_options(data, offset=240):
+    """
+    Walk the options of a DHCP packet without creating any option objects
+
+    :param data: memoryview: DHCP packet, starting at op
+    :param offset: int: Start of the options, just past the magic cookie
+    :return: tuple: ((start, stop) of the RelayAgentInformation option or None, offset of the End option)
+    """
+    agent = None
+    end = len(data)
+
+    while offset < end:
+        code = data[offset]
+        if code == 0:
+            offset = offset + 1
+        elif code == 255:
+            return agent, offset
+        elif offset + 1 < end:
+            stop = offset + 2 + data[offset + 1]
+            if code == 82:
+                agent = (offset, stop)
+            offset = stop
+        else:
+            break
+
+    return agent, min(offset, end)
+
+
+class RelayHandler(BaseRequestHandler):
+    # Queues the request, the server sends everything queued once per batch of frames
+
+    def handle(self):
+        self.server.forward(self.request[0])
+
+
+class RelayServer(BaseRawServer):
+    # DHCP relay agent (RFC 1542, RFC 3046).
+    #
+    # Requests broadcast on the client segment get giaddr set to the relay's
+    # address and a RelayAgentInformation option (82) added, then go to every
+    # upstream server over UDP. Replies from the servers are sent back on to
+    # the client segment with option 82 taken out again.
+    #
+    # Packets are never turned into Ethernet / DHCPPacket objects. A relay
+    # only reads a handful of fixed fields and looks for two options, so
+    # fields are read and patched at fixed offsets and each packet is copied
+    # once. Every wake up of the server drains up to <batch> frames, each
+    # through the usual request pipeline (admission, hooks, RelayHandler),
+    # before sending what they turned into back to back.
+    #
+    # Replies are matched to requests by XID and chaddr in the routes table.
+    # A route lasts <route_ttl> seconds from the last request of the transaction.
+
+    def __init__(self, interface=None, servers=None, **kwargs):
+        """
+        :param interface: str: Interface of the client segment
+        :param servers: list: Upstream servers as IP addresses or (IP address, port)
+        :param relay_ip: str: Address of the relay on the client segment, used as giaddr
+        :param upstream_sock: socket: Stand in for the UDP socket to the servers
+        :param circuit_id: bytes: Agent Circuit ID sub-option. Defaults to the interface name
+        :param remote_id: bytes: Agent Remote ID sub-option. Defaults to the relay's MAC address
+        """
+        defaults = get_defaults()
+        if interface is None:
+            interface = defaults.get('optional', 'interface')
+
+        BaseRawServer.__init__(self, interface, RelayHandler,
+                               sock=kwargs.get('sock'), mac_address=kwargs.get('mac_address', 0))
+
+        self.server_port = kwargs.get('server_port', defaults.getint('numbers', 'server_port'))
+        self.client_port = kwargs.get('client_port', defaults.getint('numbers', 'client_port'))
+        self.relay_ip = ip_address(kwargs.get('relay_ip', defaults.get('relay', 'relay_ip')))
+
+        if servers is None:
+            servers = defaults.get('relay', 'servers').split()
+        self.servers = [(str(server), self.server_port) if (type(server) != tuple) else server
+                        for server in servers]
+        self.server_ips = {server[0] for server in self.servers}
+
+        self.batch = kwargs.get('batch', defaults.getint('relay', 'batch'))
+        self.max_hops = kwargs.get('max_hops', defaults.getint('relay', 'max_hops'))
+        self.route_ttl = kwargs.get('route_ttl', defaults.getfloat('relay', 'route_ttl'))
+
+        # Requests over these limits are dropped before a handler is made for them
+        self.enable_admission(
+            kwargs.get('admission_rate', defaults.getfloat('admission', 'rate')),
+            kwargs.get('admission_burst', defaults.getint('admission', 'burst')),
+            kwargs.get('max_active', defaults.getint('admission', 'max_active')),
+            kwargs.get('max_per_client', defaults.getint('admission', 'max_per_client')),
+        )
+
+        # RelayAgentInformation option added to every request
+        circuit_id = kwargs.get('circuit_id', interface.encode())
+        remote_id = kwargs.get('remote_id', self.mac_address.packed)
+        suboptions = pack('! 2B', 1, len(circuit_id)) + circuit_id + pack('! 2B', 2, len(remote_id)) + remote_id
+        self.agent_option = pack('! 2B', 82, len(suboptions)) + suboptions
+
+        # Servers answer to giaddr on the server port, so the upstream socket is bound there
+        upstream = kwargs.get('upstream_sock')
+        if upstream is None:
+            upstream = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            upstream.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            upstream.bind((str(self.relay_ip), kwargs.get('upstream_port', self.server_port)))
+        self.upstream = upstream
+
+        # Ethernet / IPv4 / UDP headers of replies to clients, patched per reply
+        header = bytearray(UDP + 8)
+        pack_into('! 6x 6s H', header, 0, self.mac_address.packed, 0x0800)
+        pack_into('! 2B 3H 2B H 4s 4x', header, IP, 0x45, 0, 0, 0, 0, 64, 17, 0, self.relay_ip.packed)
+        pack_into('! 2H 4x', header, UDP, self.server_port, self.client_port)
+        self.header = bytes(header)
+
+        self.routes = OrderedDict()  # Keys will be a tuple of (XID, chaddr), values the monotonic() it expires
+        self.lock = Lock()  # Held for the routes and the dropped count, both threads use them
+
+        self.outgoing = list()  # Requests waiting for the next flush
+
+        self.forwarded = 0
+        self.relayed = 0
+        self.dropped = 0
+
+        self.keep_alive = True
+        self.replies = Thread(target=self.serve_replies, name=f'{self.__class__.__name__} Replies', daemon=True)
+
+    # ----------------------------------------------------------------------
+    # Client segment -> servers
+
+    def _handle_request_noblock(self):
+        # Handle up to <batch> frames per wake up and send what they turned into together.
+        # Each frame goes through verify_request and process_request like any other request.
+        for _ in range(self.batch):
+            try:
+                request, client_address = self.get_request(socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                return
+
+            if self.verify_request(request, client_address):
+                try:
+                    self.process_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                    self.shutdown_request(request)
+            else:
+                self.shutdown_request(request)
+
+        self.flush()
+
+    def drop(self):
+        with self.lock:
+            self.dropped = self.dropped + 1
+
+    def forward(self, frame):
+        """
+        Queue a client's request for the upstream servers
+
+        :param frame: bytes: Ethernet frame from the client segment
+        :return: None
+        """
+        view = memoryview(frame)
+        if len(view) < UDP or unpack_from('! H', view, 12)[0] != 0x0800 or view[6:12] == self.mac_address.packed:
+            # Not IPv4, or the relay's own traffic
+            return
+
+        udp = IP + (view[IP] & 0x0f) * 4
+        if view[IP + 9] != 17 or len(view) < udp + 8:
+            return
+        destination = view[IP + 16:IP + 20]
+        if unpack_from('! H', view, udp + 2)[0] != self.server_port or \
+                (destination != BROADCAST_IP.packed and destination != self.relay_ip.packed):
+            return
+
+        payload = view[udp + 8:udp + unpack_from('! H', view, udp + 4)[0]]
+        if len(payload) < 240 or payload[0] != 1:
+            # Too short or not a BOOTREQUEST
+            return
+
+        if payload[3] >= self.max_hops:
+            self.drop()
+            return
+
+        if payload[24:28] != NO_ADDRESS:
+            # Already relayed by another agent, its giaddr and option 82 stay (RFC 3046 2.1)
+            out = bytearray(payload)
+        elif payload[236:240] != MAGIC_COOKIE:
+            # BOOTP, no options to add to
+            out = bytearray(payload)
+            out[24:28] = self.relay_ip.packed
+        else:
+            agent, end = scan_options(payload)
+            if agent is not None:
+                # Option 82 from a client rather than a relay can't be trusted (RFC 3046 2.1.1)
+                self.drop()
+                return
+
+            out = bytearray(payload[:end])
+            out += self.agent_option
+            out += b'\xff'
+            out[24:28] = self.relay_ip.packed
+
+        out[3] = payload[3] + 1
+
+        xid, = unpack_from('! L', payload, 4)
+        self.route(xid, bytes(payload[28:34]))
+        self.outgoing.append(out)
+
+    def route(self, xid, chaddr):
+        now = monotonic()
+        with self.lock:
+            # Every route lives as long as the others, so the oldest (first) routes expire first
+            while self.routes:
+                key = next(iter(self.routes))
+                if self.routes[key] > now:
+                    break
+                del self.routes[key]
+
+            key = (xid, chaddr)
+            self.routes[key] = now + self.route_ttl
+            self.routes.move_to_end(key)
+
+    def flush(self):
+        outgoing = self.outgoing
+        self.outgoing = list()
+
+        for data in outgoing:
+            for server in self.servers:
+                try:
+                    self.upstream.sendto(data, server)
+                except OSError:
+                    # Server unreachable right now, clients retransmit
+                    continue
+        self.forwarded = self.forwarded + len(outgoing)
+
+    # ----------------------------------------------------------------------
+    # Servers -> client segment
+
+    def serve_replies(self):
+        while self.keep_alive:
+            try:
+                readable, _, _ = select([self.upstream], [], [], 0.5)
+            except (OSError, ValueError):
+                return
+            if not readable:
+                continue
+
+            frames = list()
+            for _ in range(self.batch):
+                try:
+                    data, server = self.upstream.recvfrom(self.max_packet_size, socket.MSG_DONTWAIT)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:
+                    return
+
+                if server and server[0] not in self.server_ips:
+                    # Only the configured servers are relayed
+                    self.drop()
+                    continue
+
+                frame = self.reply(data)
+                if frame is not None:
+                    frames.append(frame)
+
+            for frame in frames:
+                self.socket.send(frame)
+            self.relayed = self.relayed + len(frames)
+
+    def reply(self, data):
+        """
+        :param data: bytes: DHCP packet from an upstream server
+        :return: bytes: Frame for the client segment or None if the reply has no route
+        """
+        view = memoryview(data)
+        if len(view) < 240 or view[0] != 2:
+            return None
+
+        xid, = unpack_from('! L', view, 4)
+        chaddr = bytes(view[28:34])
+        with self.lock:
+            expires = self.routes.get((xid, chaddr))
+        if expires is None or expires < monotonic():
+            self.drop()
+            return None
+
+        if view[236:240] == MAGIC_COOKIE:
+            agent, _ = scan_options(view)
+            if agent is not None:
+                # Option 82 is for the relay, not the client (RFC 3046 2.2)
+                view = memoryview(b''.join((view[:agent[0]], view[agent[1]:])))
+
+        # Where the client gets it (RFC 2131 4.1)
+        if view[12:16] != NO_ADDRESS:
+            destination_ip, destination_mac = view[12:16], chaddr
+        elif view[10] & 0x80:
+            destination_ip, destination_mac = BROADCAST_IP.packed, BROADCAST_MAC.packed
+        else:
+            destination_ip, destination_mac = view[16:20], chaddr
+
+        frame = bytearray(self.header)
+        frame += view
+        length = len(frame)
+
+        frame[0:6] = destination_mac
+        pack_into('! H', frame, IP + 2, length - IP)
+        frame[IP + 16:UDP] = destination_ip
+        pack_into('! H', frame, UDP + 4, length - UDP)
+        # UDP checksum is left at 0 (none), which IPv4 allows. Only the IP header is checksummed.
+        pack_into('! H', frame, IP + 10, checksum(frame[IP:UDP]))
+
+        return bytes(frame)
+
+    # ----------------------------------------------------------------------
+
+    def statistics(self):
+        return {
+            'forwarded': self.forwarded,
+            'relayed': self.relayed,
+            'dropped': self.dropped,
+            'routes': len(self.routes),
+        }
+
+    def start(self):
+        self.replies.start()
+        super().start()
+
+    def shutdown(self):
+        self.keep_alive = False
+        if self.replies.is_alive():
+            self.replies.join()
+        super().shutdown()
+        self.upstream.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
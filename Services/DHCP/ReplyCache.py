@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class ReplyCache(object):
+    # Reply frames recently sent to clients, so a retransmitted request gets
+    # the same reply again without going through the pool a second time.
+    #
+    # Every entry lives for the same <ttl>, so the oldest entry is always the
+    # first to expire and eviction only ever looks at the front of the dict.
+
+    def __init__(self, ttl=8.0, size=4096):
+        """
+        :param ttl: float: Seconds a reply is replayed for
+        :param size: int: Replies kept at most. The oldest is dropped first
+        """
+        self.ttl = ttl
+        self.size = size
+
+        self.entries = OrderedDict()  # Keys will be a tuple of (MAC address, XID, DHCPMessageType of the request)
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, now=None):
+        """
+        :param key: tuple: (MAC address, XID, DHCPMessageType) of the client's request
+        :param now: float: Defaults to monotonic()
+        :return: bytes: Frame sent in reply to the request or None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, frame = entry
+                if expires > (monotonic() if now is None else now):
+                    self.hits = self.hits + 1
+                    return frame
+                self.entries.pop(key, None)
+
+            self.misses = self.misses + 1
+            return None
+
+    def put(self, key, frame, now=None):
+        if now is None:
+            now = monotonic()
+
+        with self.lock:
+            self.entries[key] = (now + self.ttl, frame)
+            self.entries.move_to_end(key)
+
+            # Drop expired replies, then the oldest ones while over size
+            while self.entries:
+                oldest = next(iter(self.entries.values()))
+                if oldest[0] > now and len(self.entries) <= self.size:
+                    break
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard_client(self, mac, message_type):
+        # Drop every reply to <message_type> requests of the client, whatever their XID.
+        # Only for releases and declines, it goes through every entry.
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == mac and key[2] == message_type]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def statistics(self):
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self.entries)
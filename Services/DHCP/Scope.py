@@ -0,0 +1,130 @@
+from ipaddress import IPv4Address
+
+from . import Options
+from .Pool import Pool
+
+
+class Scope(object):
+    # One subnet the server hands out addresses on.
+    # Every scope has its own pool, its own options on top of the server's
+    # options and its own counters.
+
+    def __init__(self, network, mask, ranges=None, exclusions=(), options=()):
+        """
+        :param network: Network address of the scope
+        :param mask: Network mask of the scope
+        :param ranges: list: (first, last) addresses to hand out. Defaults to every host in the network
+        :param exclusions: list: (first, last) addresses, or single addresses, never to hand out
+        :param options: list: Options sent to clients of this scope. Replace server options with the same code
+        """
+        self.pool = Pool(network, mask, ranges, exclusions)
+        self.network = self.pool._network
+
+        self.options = dict()  # Keys will be an int being the code of the option.
+        self.templates = dict()  # Keys will be a tuple of (DHCPMessageType of the reply, lease)
+        # Packed requested options for each ParameterRequestList clients of the scope sent
+        self.option_blobs = dict()  # Keys will be the bytes of the ParameterRequestList
+
+        self.stats = dict.fromkeys(('discovers', 'offers', 'requests', 'acks', 'declines', 'releases', 'informs'), 0)
+
+        self.register(Options.Subnet(self.pool.netmask))
+        self.register(Options.BroadcastAddress(self.pool.broadcast))
+        for option in options:
+            self.register(option)
+
+    def register(self, option):
+        self.options[option.code] = option
+        self.templates.clear()
+        self.option_blobs.clear()
+
+        # Addresses of the scope used by options (IE: Router) are never handed out
+        data = option.data if (type(option.data) == list) else [option.data]
+        for index, address in enumerate(data, start=1):
+            if (type(address) == IPv4Address) and address in self.network:
+                self.pool.reserve(f'{option.code}-{index}', address)
+
+    def count(self, name):
+        self.stats[name] = self.stats[name] + 1
+
+    def statistics(self):
+        out = dict(self.stats)
+        out['size'] = len(self.pool.hosts.scope)
+        out['used'] = self.pool.hosts.used - len(self.pool.ready)
+        out['available'] = self.pool.available
+        return out
+
+    def __contains__(self, address):
+        return address in self.network
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.network})'
+
+
+class ScopeTable(object):
+    # Longest prefix match from an address (IE: giaddr) to the scope it's in.
+    # Scopes are kept in a dict per prefix length, so a lookup costs one dict
+    # lookup per prefix length in use, 33 at most, no matter how many scopes.
+
+    def __init__(self):
+        self.prefixes = dict()  # Keys will be the prefix length, values a dict of network >> host bits -> scope
+        self.lengths = list()  # Prefix lengths in use, longest first
+        self.default = None  # Scope of the server's own network
+
+    def add(self, scope, default=False):
+        network = scope.network
+        length = network.prefixlen
+
+        if length not in self.prefixes:
+            self.prefixes[length] = dict()
+            self.lengths = sorted(self.prefixes, reverse=True)
+
+        self.prefixes[length][int(network.network_address) >> (32 - length)] = scope
+
+        if default or self.default is None:
+            self.default = scope
+        return scope
+
+    def remove(self, scope):
+        length = scope.network.prefixlen
+        table = self.prefixes.get(length, dict())
+        table.pop(int(scope.network.network_address) >> (32 - length), None)
+
+        if not table:
+            self.prefixes.pop(length, None)
+            self.lengths = sorted(self.prefixes, reverse=True)
+
+        if self.default is scope:
+            self.default = None
+
+    def match(self, address):
+        """
+        :param address: IPv4Address
+        :return: Scope with the longest prefix holding the address or None
+        """
+        address = int(address)
+        for length in self.lengths:
+            scope = self.prefixes[length].get(address >> (32 - length))
+            if scope is not None:
+                return scope
+        return None
+
+    def select(self, giaddr, link_selection=None):
+        """
+        Scope a client's request should be served from
+
+        :param giaddr: IPv4Address: Relay agent address of the request, 0.0.0.0 if not relayed
+        :param link_selection: bytes: Link selection (RFC 3527) address of the request, if any
+        :return: Scope or None if the request came from a network without a scope
+        """
+        if link_selection is not None and len(link_selection) == 4:
+            return self.match(IPv4Address(bytes(link_selection)))
+        if giaddr._ip:
+            return self.match(giaddr)
+        return self.default
+
+    def __iter__(self):
+        for length in self.lengths:
+            yield from list(self.prefixes[length].values())
+
+    def __len__(self):
+        return sum(len(table) for table in self.prefixes.values())
@@ -0,0 +1,874 @@
+from functools import lru_cache
+from ipaddress import ip_address
+from json import load, dump
+from os import path
+from socket import IPPROTO_UDP
+from socketserver import BaseRequestHandler, ThreadingMixIn
+from threading import RLock
+from time import time
+
+from BaseServers import BaseRawServer
+from RawPacket import Ethernet, MAC_Address
+from . import Packet, Options, Events
+from .ACL import MacACL
+from .GarbageCollection import GarbageCollector
+from .LeaseStore import LeaseStore
+from .LeaseTable import LeaseTable
+from .Refill import Refiller
+from .ReplyCache import ReplyCache
+from .Scope import Scope, ScopeTable
+from .Template import ReplyTemplate
+
+BROADCAST_IP = ip_address('255.255.255.255')
+BROADCAST_MAC = MAC_Address('FF:FF:FF:FF:FF:FF')
+NO_ADDRESS = ip_address(0)
+
+# Owner of addresses declined by clients while they're held out of the pool.
+# Each one is kept as a lease of its own, with the address as the ClientID.
+DECLINED = MAC_Address(0)
+
+
+@lru_cache(maxsize=None)
+def get_defaults():
+    """
+    Server defaults from config.ini.
+    Read the first time a server is created rather than on import.
+
+    :return: ConfigParser
+    """
+    from configparser import ConfigParser
+
+    defaults = ConfigParser()
+    defaults.read(path.join(path.dirname(__file__), 'config.ini'))
+    return defaults
+
+
+class RawHandler(BaseRequestHandler):
+    eth = None
+    ip = None
+    udp = None
+    packet = None
+    scope = None
+    is_dhcp = False
+
+    def setup(self):
+        self.eth = Ethernet.disassemble(self.request[0])
+        self.ip = self.eth.payload
+        if self.ip.protocol == IPPROTO_UDP:
+            self.udp = self.ip.payload
+            if self.udp.destination == self.server.server_port:
+                self.is_dhcp = True
+                self.packet = Packet.DHCPPacket.disassemble(self.udp.payload)
+                return
+
+    # Keys will be the DHCPMessageType of the client's packet, values the name of the method handling it
+    dispatch = {
+        1: 'handle_disco',
+        3: 'handle_req',
+        4: 'handle_decline',
+        7: 'handle_release',
+        8: 'handle_inform',
+    }
+
+    # Keys will be the DHCPMessageType of the client's packet, values the scope counter it adds to
+    counters = {
+        1: 'discovers',
+        3: 'requests',
+        4: 'declines',
+        7: 'releases',
+        8: 'informs',
+    }
+
+    def handle(self):
+        if self.is_dhcp:
+
+            message_type = self.packet.message_type
+            name = self.dispatch.get(message_type)
+            if name is None:
+                return
+
+            key = (self.packet.chaddr, self.packet.xid, message_type)
+            frame = self.server.replies.get(key)
+            if frame is not None:
+                # Retransmitted request, it gets the same reply as the first time
+                self.request[1].send(frame)
+                return
+
+            if not self.packet.giaddr._ip and self.packet.ciaddr._ip:
+                # Unicast from a bound client (RENEW, RELEASE, INFORM), served by the scope of its address
+                self.scope = self.server.scopes.match(self.packet.ciaddr) or self.server.scopes.default
+            else:
+                self.scope = self.server.scopes.select(self.packet.giaddr, self.link_selection())
+            if self.scope is None:
+                # Relayed from a network the server has no scope for
+                return
+
+            failover = self.server.failover
+            if failover is not None and message_type in failover.balanced and not failover.serves(self.packet):
+                # Client of the failover peer's buckets
+                return
+
+            self.scope.count(self.counters[message_type])
+
+            # Requests of the same client are handled one at a time, other clients carry on
+            with self.server.client_lock(self.packet.chaddr):
+                frame = getattr(self, name)()
+            if frame:
+                self.server.replies.put(key, frame)
+                self.request[1].send(frame)
+
+    def get(self, option, default=None):
+        # Data of <option> in the client's packet
+        found = self.packet.option(option.code)
+        if found is None:
+            return default
+        return found.data
+
+    def requested(self):
+        # Codes of the client's ParameterRequestList, as the raw bytes of the option.
+        # Clients of the same OS send the same bytes, which makes them a good cache key.
+        codes = self.packet.options.raw(Options.ParameterRequestList.code)
+        return b'' if codes is None else bytes(codes)
+
+    def link_selection(self):
+        # Address of the client's link given by a relay agent (RFC 3527),
+        # either as option 118 or as sub-option 5 of the relay agent information (option 82).
+        link = self.packet.options.raw(118)
+        if link is not None:
+            return link
+
+        agent = self.packet.options.raw(82)
+        if agent:
+            offset = 0
+            while offset + 1 < len(agent):
+                code, length = agent[offset], agent[offset + 1]
+                if code == 5:
+                    return agent[offset + 2:offset + 2 + length]
+                offset = offset + 2 + length
+
+        return None
+
+    def reply(self, message_type, yiaddr, requested=(), lease=True):
+        """
+        Build a reply frame to the client from the server's template for <message_type>
+
+        :param message_type: int: DHCPMessageType of the reply
+        :param yiaddr: IPv4Address: Address given to the client
+        :param requested: bytes: Option codes from the client's ParameterRequestList
+        :param lease: bool: If the reply is about a lease. Lease times are left out if not
+        :return: bytes
+        """
+        destination = BROADCAST_IP
+        giaddr = None
+        port = None
+
+        broadcast = self.server.broadcast or self.packet.broadcast
+        destination_mac = BROADCAST_MAC if broadcast else self.packet.chaddr
+
+        if self.packet.giaddr._ip:
+            # Relayed requests are answered through the relay agent, on the server port
+            giaddr = self.packet.giaddr
+            destination = giaddr
+            destination_mac = self.eth.source
+            port = self.server.server_port
+
+        elif self.packet.ciaddr._ip:
+            # If client has a put a reachable IP address in this field
+            # Send to this specific address
+            destination = self.packet.ciaddr
+
+        return self.server.template(message_type, lease, self.scope).build(
+            destination_mac, destination, self.packet.xid, yiaddr, self.packet.chaddr,
+            broadcast, self.packet.hops, giaddr, self.server.requested_options(requested, self.scope), port
+        )
+
+    def handle_disco(self):
+        # Building DHCP offer
+
+        requested = self.requested()
+        offer = self.server.offers.get((self.packet.chaddr, self.packet.xid))
+        if offer is not None:
+            # Retransmitted DISCOVER the reply cache no longer has, it gets the address already offered
+            offer_ip = offer[0]
+        else:
+            offer_ip = self.scope.pool.get_ip(self.packet.chaddr, self.get(Options.RequestedIP))
+
+        if offer_ip:
+            # If we're offering a valid IP (EG not None), proceed with offer
+            self.server.register_offer(self.packet.chaddr, self.packet.xid, offer_ip,
+                                       self.get(Options.HostName, b''))
+            self.scope.count('offers')
+            return self.reply(2, offer_ip, requested)
+
+    def handle_req(self):
+        # Building DHCP acknowledge
+
+        server_id = self.get(Options.DHCPServerID)
+        if server_id is not None and server_id != self.server.server_ip:
+            # If the client is trying to request from a server other than us.
+            return None
+
+        requested = self.requested()
+        req_ip = self.get(Options.RequestedIP)
+        clientid = self.get(Options.ClientID, b'')
+
+        chaddr = self.packet.chaddr
+        offer = self.server.offers.get((chaddr, self.packet.xid))
+        if offer is not None:
+            offer_ip, offer_hostname = offer
+        else:
+            # No offer, IE: a client renewing or rebinding its lease
+            lease = self.server.leases.get(chaddr, clientid)
+            if lease is None:
+                return None
+            offer_ip, offer_hostname = lease.ip, lease.hostname
+
+        # If the client didn't specify a hostname, keep the one from the discover packet
+        client_hostname = self.get(Options.HostName, offer_hostname)
+
+        if req_ip and req_ip != offer_ip:
+            client_ip = self.scope.pool.get_ip(chaddr, offer_ip)
+        else:
+            client_ip = offer_ip
+
+        if client_ip:
+            self.server.register_client(chaddr, clientid, client_ip, client_hostname, self.packet.xid, self.scope)
+            self.scope.count('acks')
+
+            return self.reply(5, client_ip, requested)
+
+    def handle_decline(self):
+        # The address given to the client is already in use by something else on the network.
+
+        server_id = self.get(Options.DHCPServerID)
+        if server_id is not None and server_id != self.server.server_ip:
+            return None
+
+        declined = self.get(Options.RequestedIP)
+        if declined is not None:
+            self.server.decline(self.packet.chaddr, self.get(Options.ClientID, b''), declined)
+
+    def handle_release(self):
+        # The client is done with its address, it goes back in the pool straight away.
+
+        server_id = self.get(Options.DHCPServerID)
+        if server_id is not None and server_id != self.server.server_ip:
+            return None
+
+        clientid = self.get(Options.ClientID, b'')
+        lease = self.server.leases.get(self.packet.chaddr, clientid)
+        if lease is not None and lease.ip == self.packet.ciaddr:
+            self.server.release_client(self.packet.chaddr, clientid)
+
+    def handle_inform(self):
+        # The client already has an address, it only wants the options that go with it.
+
+        if not self.packet.ciaddr._ip:
+            return None
+
+        return self.reply(5, NO_ADDRESS, self.requested(), lease=False)
+
+
+class RawServer(BaseRawServer):
+    # Options that only go with a lease. Left out of replies to DHCPINFORM (RFC 2131 3.4)
+    lease_options = (51, 58, 59)
+
+    def __init__(self, interface=None, **kwargs):
+        defaults = get_defaults()
+        if interface is None:
+            interface = defaults.get('optional', 'interface')
+
+        BaseRawServer.__init__(self, interface, RawHandler,
+                               sock=kwargs.get('sock'), mac_address=kwargs.get('mac_address', 0))
+
+        self.offers = dict()  # Keys will be a tuple of (MAC Address, XID).
+
+        self.server_options = dict()
+        self.options = dict()  # Keys will be an int being the code of the option.
+
+        # Savefile
+        self.file = kwargs.get('savefile', defaults.get('optional', 'savefile'))
+
+        # Server addressing information
+        self.server_ip = ip_address(kwargs.get('server_ip', defaults.get('ip addresses', 'server_ip')))
+        self.server_port = kwargs.get('server_port', defaults.getint('numbers', 'server_port'))
+        self.client_port = kwargs.get('client_port', defaults.getint('numbers', 'client_port'))
+        self.broadcast = kwargs.get('broadcast', defaults.getboolean('optional', 'broadcast'))
+
+        # Handle every request in a thread of its own. Clients are spread over <lock_shards> locks,
+        # so requests of the same client never run at once while those of different clients do.
+        self.threaded = kwargs.get('threaded', defaults.getboolean('optional', 'threaded'))
+        self.shards = tuple(RLock() for _ in range(kwargs.get('lock_shards', defaults.getint('numbers', 'lock_shards'))))
+
+        # Requests over these limits are dropped before a handler is made for them
+        self.enable_admission(
+            kwargs.get('admission_rate', defaults.getfloat('admission', 'rate')),
+            kwargs.get('admission_burst', defaults.getint('admission', 'burst')),
+            kwargs.get('max_active', defaults.getint('admission', 'max_active')),
+            kwargs.get('max_per_client', defaults.getint('admission', 'max_per_client')),
+        )
+
+        # Server IP pool setup. The server's own network is the default scope,
+        # relayed networks get scopes of their own through add_scope.
+        self.scopes = ScopeTable()
+        self.scopes.add(Scope(ip_address(kwargs.get('network', defaults.get('ip addresses', 'network'))),
+                              ip_address(kwargs.get('mask', defaults.get('ip addresses', 'mask')))), default=True)
+        self.pool = self.scopes.default.pool
+
+        # MAC allow / deny rules, the same for every scope
+        self.listing = MacACL()
+        self.pool.listing = self.listing
+
+        # Timing information
+        self.offer_hold_time = kwargs.get('offer_hold_time', defaults.getint('numbers', 'offer_hold_time'))
+        self.decline_hold_time = kwargs.get('decline_hold_time', defaults.getint('numbers', 'decline_hold_time'))
+        # Default lease time of 8 days
+        IPLeaseTime = kwargs.get('ipleasetime', defaults.getint('numbers', 'ipleasetime'))
+        # Default renew time of 4 days
+        RenewalT1 = kwargs.get('renewalt1', defaults.getint('numbers', 'renewalt1'))
+        # Default rebind time of 3 days
+        RenewalT2 = kwargs.get('renewalt2', defaults.getint('numbers', 'renewalt2'))
+
+        # Replies replayed to retransmitted requests. An offer is never replayed after it's been let go.
+        self.replies = ReplyCache(
+            min(kwargs.get('reply_cache_ttl', defaults.getfloat('numbers', 'reply_cache_ttl')), self.offer_hold_time),
+            kwargs.get('reply_cache_size', defaults.getint('numbers', 'reply_cache_size'))
+        )
+
+        self.register_server_option(Options.Subnet(self.pool.netmask))
+        self.register_server_option(Options.BroadcastAddress(self.pool.broadcast))
+        self.register_server_option(Options.DHCPServerID(self.server_ip))
+
+        self.register_server_option(Options.IPLeaseTime(IPLeaseTime))
+        self.register_server_option(Options.RenewalT1(RenewalT1))
+        self.register_server_option(Options.RenewalT2(RenewalT2))
+
+        self.gb = GarbageCollector()
+
+        # Leases of bound clients, keyed by (MAC address, ClientID). ClientID defaults to b''
+        self.leases = LeaseTable()
+
+        # Active leases are kept on disk next to the savefile
+        self.store = LeaseStore(kwargs.get('lease_file', f'{self.file}.leases'))
+
+        # Lease grants, renewals, releases and expiries for monitoring. Sinks are added through events.add_sink
+        self.events = Events.EventBus(kwargs.get('event_buffer', defaults.getint('numbers', 'event_buffer')))
+        event_file = kwargs.get('event_file', defaults.get('optional', 'event_file'))
+        if event_file:
+            self.events.add_sink(Events.JSONLinesSink(event_file))
+
+        # Load balancing with a second server, set up through enable_failover
+        self.failover = None
+
+        # Conflict detection before offers, set up through enable_probing
+        self.prober = None
+
+        # Keeps addresses ready to offer in every pool. Not used while probing, the prober fills the pools then.
+        depth = kwargs.get('ready_depth', defaults.getint('numbers', 'ready_depth'))
+        self.refiller = Refiller(self, depth, max(1, depth // 4)) if depth else None
+
+    def client_lock(self, address):
+        # Lock of the shard the client's state (offers, leases) belongs to
+        return self.shards[hash(address) % len(self.shards)]
+
+    def process_request(self, request, client_address):
+        if self.threaded:
+            ThreadingMixIn.process_request(self, request, client_address)
+        else:
+            BaseRawServer.process_request(self, request, client_address)
+
+    def register_offer(self, address, xid, offer_ip, client_hostname):
+        with self.client_lock(address):
+            replaced = self.offers.get((address, xid))
+            if replaced is not None and replaced[0] != offer_ip:
+                # Only one address is ever held for a transaction
+                self.free_ip(replaced[0])
+            self.offers[(address, xid)] = (offer_ip, client_hostname)
+            self.gb.insert(self.offer_hold_time, self.release_offer, address, xid, key=('offer', address, xid))
+
+    def release_offer(self, address, xid):
+        # clear short term reservation of ip address.
+        with self.client_lock(address):
+            offer = self.offers.pop((address, xid), None)
+            if offer is not None:
+                self.free_ip(offer[0])
+            self.replies.discard((address, xid, 1))
+
+    def register_client(self, address, clientid, client_ip, hostname=b'', xid=None, scope=None):
+        with self.client_lock(address):
+            if xid is not None:
+                # The offer became a lease, it must not be put back in the pool when it times out.
+                self.gb.cancel(('offer', address, xid))
+                offer = self.offers.pop((address, xid), None)
+                if offer is not None and offer[0] != client_ip:
+                    self.free_ip(offer[0])
+
+            lease = self.leases.get(address, clientid)
+            if lease is not None and lease.ip != client_ip:
+                # Release previously given IP client may have for reuse
+                self.free_ip(lease.ip)
+            kind = Events.RENEW if lease is not None and lease.ip == client_ip else Events.GRANT
+
+            # The lease runs as long as the IPLeaseTime the client was sent
+            lease_time = self.get(Options.IPLeaseTime, scope)
+            lease = self.leases.add(address, clientid, client_ip, time() + lease_time, hostname)
+            self.store.put(address, clientid, client_ip, lease.expires, hostname)
+            self.events.publish(kind, address, clientid, client_ip, lease.expires, hostname)
+            if self.failover is not None:
+                self.failover.publish_lease(lease)
+            # Replaces the expiry timer of a renewing client instead of stacking another one.
+            self.gb.insert(lease_time, self.release_client, address, clientid, client_ip,
+                           key=('client', address, clientid))
+
+    def release_client(self, address, clientid, client_ip=None):
+        # clear long term reservation of ip address.
+        with self.client_lock(address):
+            lease = self.leases.get(address, clientid)
+            if lease is None:
+                return
+
+            if client_ip is None:
+                # If we're just trying to clear the client from the server.
+                self.gb.cancel(('client', address, clientid))
+            elif lease.ip != client_ip:
+                # Prevent pre-mature removal of a client that was previously connected to network.
+                return
+            elif ('client', address, clientid) in self.gb:
+                # Renewed while its old timer was going off
+                return
+
+            self.leases.remove(address, clientid)
+            self.free_ip(lease.ip)
+            self.store.remove(address, clientid)
+            self.events.publish(Events.RELEASE if client_ip is None else Events.EXPIRE, address, clientid, lease.ip)
+
+            if client_ip is None:
+                # A retransmitted REQUEST must not get the ACK of the released lease again
+                self.replies.discard_client(address, 3)
+
+            if client_ip is None and self.failover is not None:
+                # Expired leases run out on the peer by themselves
+                self.failover.publish_release(address, clientid)
+
+    def enable_failover(self, role, address=('', 647), peer=('127.0.0.1', 647), **kwargs):
+        """
+        Share the server's networks with a second server (RFC 3074 load balancing).
+        Call before the server is started.
+
+        :param role: str: 'primary' or 'secondary', the peer takes the other one
+        :param address: tuple: (IP address, port) to receive messages from the peer on
+        :param peer: tuple: (IP address, port) of the peer
+        :param kwargs: split, heartbeat and timeout of the Failover
+        :return: Failover
+        """
+        # Imported here, most servers never use it
+        from .Failover import Failover
+
+        self.failover = Failover(self, role, address, peer, **kwargs)
+        for scope in self.scopes:
+            self.failover.split(scope.pool)
+        return self.failover
+
+    def enable_probing(self, interface=None, sock=None, **kwargs):
+        """
+        Check addresses with ARP before they're offered.
+        Call before the server is started.
+
+        :param interface: str: Interface to probe on. Defaults to the server's
+        :param sock: socket: Stand in for the ARP socket
+        :param kwargs: ready, attempts and wait of the ArpProber
+        :return: ArpProber
+        """
+        from .Probe import ArpProber
+
+        self.prober = ArpProber(self, interface, sock, **kwargs)
+        return self.prober
+
+    def sync_lease(self, address, clientid, client_ip, expires, hostname=b''):
+        # Lease given out (or renewed) by the failover peer
+        with self.client_lock(address):
+            now = time()
+            if expires <= now:
+                return
+
+            lease = self.leases.get(address, clientid)
+            if lease is not None and lease.ip != client_ip:
+                self.free_ip(lease.ip)
+
+            holder = self.leases.by_ip(client_ip)
+            if holder is not None and holder.key != (address, clientid):
+                # The peer's lease wins, the address stays in use
+                self.gb.cancel(('client', *holder.key))
+                self.store.remove(*holder.key)
+
+            self.take_ip(client_ip)
+            self.leases.add(address, clientid, client_ip, expires, hostname)
+            self.store.put(address, clientid, client_ip, expires, hostname)
+            self.events.publish(Events.GRANT, address, clientid, client_ip, expires, hostname)
+            self.gb.insert(expires - now, self.release_client, address, clientid, client_ip,
+                           key=('client', address, clientid))
+
+    def sync_release(self, address, clientid):
+        # Lease released by a client of the failover peer
+        with self.client_lock(address):
+            lease = self.leases.get(address, clientid)
+            if lease is None:
+                return
+
+            self.gb.cancel(('client', address, clientid))
+            self.leases.remove(address, clientid)
+            self.free_ip(lease.ip)
+            self.store.remove(address, clientid)
+            self.events.publish(Events.RELEASE, address, clientid, lease.ip)
+
+    def add_scope(self, network, mask, ranges=None, exclusions=(), options=()):
+        """
+        Serve another network, IE: one behind a relay agent
+
+        :param network: Network address of the scope
+        :param mask: Network mask of the scope
+        :param ranges: list: (first, last) addresses to hand out. Defaults to every host in the network
+        :param exclusions: list: (first, last) addresses, or single addresses, never to hand out
+        :param options: list: Options for clients of the scope, IE: Router
+        :return: Scope
+        """
+        scope = self.scopes.add(Scope(ip_address(network), ip_address(mask), ranges, exclusions, options))
+        scope.pool.listing = self.listing
+        if self.failover is not None:
+            self.failover.split(scope.pool)
+        if self.prober is None and self.refiller is not None and self.refiller.is_alive():
+            self.refiller.attach(scope.pool)
+        return scope
+
+    def free_ip(self, ip):
+        # Put an address back in the pool of the scope it belongs to
+        scope = self.scopes.match(ip)
+        if scope is not None:
+            scope.pool.add_ip(ip)
+
+    def take_ip(self, ip):
+        # Take a specific address out of the pool of the scope it belongs to.
+        # Addresses held for the failover peer are never free, but can still be leased.
+        scope = self.scopes.match(ip)
+        return scope is not None and (scope.pool.take(ip) or int(ip) in scope.pool.hosts.held)
+
+    def statistics(self):
+        return {str(scope.network): scope.statistics() for scope in self.scopes}
+
+    def decline(self, address, clientid, client_ip):
+        with self.client_lock(address):
+            lease = self.leases.get(address, clientid)
+
+            if lease is not None and lease.ip == client_ip:
+                # The client gives the address up, but it can't go back in the pool either.
+                self.gb.cancel(('client', address, clientid))
+                self.leases.remove(address, clientid)
+                self.store.remove(address, clientid)
+                self.events.publish(Events.DECLINE, address, clientid, client_ip)
+                # A retransmitted REQUEST must not get the ACK of the declined address again
+                self.replies.discard_client(address, 3)
+            elif self.leases.by_ip(client_ip) is not None or not self.take_ip(client_ip):
+                # Somebody else's address, or not one of ours to hand out
+                return
+
+            self.quarantine(client_ip)
+
+    def quarantine(self, client_ip):
+        # Hold an address out of the pool for decline_hold_time, then put it back.
+        clientid = client_ip.packed
+        lease = self.leases.add(DECLINED, clientid, client_ip, time() + self.decline_hold_time)
+        self.store.put(DECLINED, clientid, client_ip, lease.expires)
+        self.events.publish(Events.QUARANTINE, DECLINED, clientid, client_ip, lease.expires)
+        if self.failover is not None:
+            self.failover.publish_lease(lease)
+        self.gb.insert(self.decline_hold_time, self.release_client, DECLINED, clientid, client_ip,
+                       key=('client', DECLINED, clientid))
+
+    def restore(self):
+        # Take back the leases that were active when the server last stopped.
+        now = time()
+
+        for (mac, clientid), (ip, expires, hostname) in self.store.load().items():
+            address = MAC_Address(mac)
+            clientid = bytes.fromhex(clientid)
+            ip = ip_address(ip)
+            hostname = bytes.fromhex(hostname)
+
+            if expires <= now or not self.take_ip(ip):
+                # Lease ran out while the server was down or no longer fits the pool
+                self.store.remove(address, clientid)
+                continue
+
+            self.leases.add(address, clientid, ip, expires, hostname)
+            self.gb.insert(expires - now, self.release_client, address, clientid, ip,
+                           key=('client', address, clientid))
+
+    def register_server_option(self, option):
+        # These options always are included in server DHCP packets
+        self.server_options[option.code] = option
+        for scope in self.scopes:
+            scope.templates.clear()
+            scope.option_blobs.clear()
+        self.replies.clear()
+
+        try:
+            try:
+                if option.data in self.pool._network:
+                    # If option data is an ip address, reserve it
+                    self.pool.reserve(option.__class__.__name__, option.data)
+            except AttributeError:
+                # Otherwise, try to iterate through the data as a list
+                # and if it is an ip address in the network pool
+                # reserve it
+                for index, addr in enumerate(option.data, start=1):
+                    if addr not in self.pool._network:
+                        continue
+                    self.pool.reserve(f'{option.code}-{index}', addr)
+
+        except:
+            # option data isn't an IP Address
+            pass
+
+    def register(self, option):
+        # These options are included in server DHCP packets by request of client
+        self.options[option.code] = option
+        for scope in self.scopes:
+            scope.option_blobs.clear()
+        self.replies.clear()
+
+        try:
+            try:
+                if option.data in self.pool._network:
+                    # If option data is an ip address, reserve it
+                    self.pool.reserve(option.__class__.__name__, option.data)
+            except AttributeError:
+                # Otherwise, try to iterate through the data as a list
+                # and if it is an ip address in the network pool
+                # reserve it
+                for index, addr in enumerate(option.data, start=1):
+                    if addr not in self.pool._network:
+                        continue
+                    self.pool.reserve(f'{option.__class__.__name__}-{index}', addr)
+
+        except:
+            # option data isn't an IP Address
+            pass
+
+    def template(self, message_type, lease=True, scope=None):
+        if scope is None:
+            scope = self.scopes.default
+
+        try:
+            return scope.templates[(message_type, lease)]
+        except KeyError:
+            # Scope options replace server options with the same code
+            options = dict(self.server_options)
+            options.update(scope.options)
+
+            options = [option for option in options.values()
+                       if lease or option.code not in self.lease_options]
+            template = ReplyTemplate(message_type, self.server_address[-1], self.server_ip,
+                                     self.server_port, self.client_port, options)
+            scope.templates[(message_type, lease)] = template
+            return template
+
+    # Distinct ParameterRequestLists kept in the option_blobs of a scope, more than that and it starts over
+    option_blob_limit = 1024
+
+    def requested_options(self, codes, scope=None):
+        """
+        Packed options the client asked for, in the order it asked for them.
+        Options the scope's templates already send are left out.
+
+        :param codes: bytes: Option codes from the client's ParameterRequestList
+        :param scope: Scope: Scope of the client. Defaults to the server's own
+        :return: bytes
+        """
+        if scope is None:
+            scope = self.scopes.default
+        key = codes if (type(codes) == bytes) else bytes(codes)
+
+        blob = scope.option_blobs.get(key)
+        if blob is None:
+            options = self.options
+            sent = scope.options.keys() | self.server_options.keys()
+            blob = b''.join([options[code].pack() for code in key if code in options and code not in sent])
+
+            if len(scope.option_blobs) >= self.option_blob_limit:
+                scope.option_blobs.clear()
+            scope.option_blobs[key] = blob
+
+        return blob
+
+    def get(self, option, scope=None):
+        # Data of <option> as sent to clients of <scope>. Same precedence as template() and requested_options()
+        if scope is not None and option.code in scope.options:
+            return scope.options[option.code].data
+
+        if option.code in self.server_options:
+            return self.server_options[option.code].data
+
+        elif option.code in self.options:
+            return self.options[option.code].data
+
+    def reserve(self, mac, ip):
+        mac = MAC_Address(mac)
+        ip = ip_address(ip)
+        scope = self.scopes.match(ip) or self.scopes.default
+        scope.pool.reserve(mac, ip)
+
+    def unreserve(self, mac):
+        mac = MAC_Address(mac)
+        for scope in self.scopes:
+            scope.pool.unreserve(mac)
+
+    def add_listing(self, rule):
+        # <rule> is a MAC address or a prefix / masked rule, IE: 'aa:bb:cc' for a whole OUI
+        self.listing.add(rule)
+
+    def remove_listing(self, rule):
+        self.listing.remove(rule)
+
+    def load_listing(self, file):
+        """
+        Add the MAC rules in a file, one per line
+
+        :param file: str: Path of the file
+        :return: int: Number of rules read
+        """
+        return self.listing.load(file)
+
+    def start(self):
+        self.restore()
+        self.gb.start()
+        self.store.start()
+        self.events.start()
+        if self.failover is not None:
+            self.failover.start()
+        if self.prober is not None:
+            self.prober.start()
+        elif self.refiller is not None:
+            self.refiller.start()
+            for scope in self.scopes:
+                self.refiller.attach(scope.pool)
+        super().start()
+
+    def shutdown(self):
+        if self.prober is not None:
+            self.prober.shutdown()
+        elif self.refiller is not None:
+            self.refiller.shutdown()
+        self.save()
+        if self.failover is not None:
+            self.failover.shutdown()
+        self.gb.shutdown()
+        self.store.shutdown()
+        self.events.shutdown()
+        super().shutdown()
+
+    def save(self):
+        data = dict()
+
+        setup = dict()
+        setup['server_ip'] = self.server_ip._ip
+        setup['server_port'] = self.server_port
+        setup['client_port'] = self.client_port
+        setup['broadcast'] = self.broadcast
+        setup['network'] = self.pool.network._ip
+        setup['mask'] = self.pool.netmask._ip
+        setup['offer_hold_time'] = self.offer_hold_time
+        setup['decline_hold_time'] = self.decline_hold_time
+        setup['ipleasetime'] = self.get(Options.IPLeaseTime)
+        setup['renewalt1'] = self.get(Options.RenewalT1)
+        setup['renewalt2'] = self.get(Options.RenewalT2)
+        data['setup_info'] = setup
+
+        reservations = dict()
+        for address, ip in self.pool.reservations.items():
+            try:
+                # If we're saving a MAC_Address instance
+                reservations[address.address] = ip._ip
+            except AttributeError:
+                # If we're trying to save something other than a MAC_Address
+                continue
+
+        data['reservations'] = reservations
+
+        data['listings'] = (self.listing.listing(), self.listing.mode)
+
+        # Scopes other than the server's own network. Subnet and broadcast options come with the scope.
+        data['scopes'] = [
+            {
+                'network': scope.network.network_address._ip,
+                'mask': scope.network.netmask._ip,
+                'ranges': scope.pool.hosts.scope.ranges(),
+                'options': [list(option.pack()) for code, option in scope.options.items()
+                            if code not in (Options.Subnet.code, Options.BroadcastAddress.code)],
+            }
+            for scope in self.scopes if scope is not self.scopes.default
+        ]
+
+        data['server_options'] = [
+            list(option.pack()) for option in self.server_options.values()
+        ]
+
+        data['options'] = [
+            list(option.pack()) for option in self.options.values()
+        ]
+
+        with open(self.file, 'w') as file:
+            dump(data, file)
+
+    @classmethod
+    def load(cls, savefile, **kwargs):
+        try:
+            with open(savefile, 'r') as file:
+                data = load(file)
+
+            setup_info = data['setup_info']
+            reservations = data['reservations']
+            listing, list_mode = data['listings']
+
+            server_options_bytes = b''.join([bytes(option_data) for option_data in data['server_options']])
+            server_options = Options.BaseOption.unpack(server_options_bytes)
+
+            options_bytes = b''.join([bytes(option_data) for option_data in data['options']])
+            options = Options.BaseOption.unpack(options_bytes)
+
+            setup_info.update(kwargs)
+
+            out = cls(savefile=savefile, **setup_info)
+
+            for mac, ip in reservations.items():
+                out.reserve(mac, ip)
+
+            out.listing.update(listing)
+
+            out.pool.list_mode = list_mode
+
+            for option in server_options:
+                out.register_server_option(option)
+
+            for option in options:
+                out.register(option)
+
+            for scope in data.get('scopes', ()):
+                scope_options = b''.join([bytes(option_data) for option_data in scope['options']])
+                out.add_scope(scope['network'], scope['mask'],
+                              [(ip_address(first), ip_address(last)) for first, last in scope['ranges']],
+                              options=Options.BaseOption.unpack(scope_options))
+
+            return out
+
+        except FileNotFoundError:
+            return cls(**kwargs)
+
+        except Exception as e:
+            print(f'{e.__class__.__name__}: {e}')
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,83 @@
+from struct import pack, pack_into
+
+from RawPacket import checksum
+from . import Options
+
+# Offsets into an untagged Ethernet / IPv4 / UDP / DHCP frame
+IP = 14
+UDP = IP + 20
+DHCP = UDP + 8
+OPTIONS = DHCP + 240  # Just past the magic cookie
+
+
+class ReplyTemplate(object):
+    # Pre-built frame for one type of server reply (IE: OFFER or ACK).
+    #
+    # Everything the server sends the same way to every client, the headers
+    # and the server wide options, is packed once. Building a reply copies the
+    # template, patches in the per client fields and works out both checksums.
+
+    def __init__(self, message_type, server_mac, server_ip, server_port, client_port, options=()):
+        """
+        :param message_type: int: DHCPMessageType of the reply
+        :param server_mac: MAC_Address: Source of the frame
+        :param server_ip: IPv4Address: Source of the packet, also used as siaddr
+        :param server_port: int: Source UDP port
+        :param client_port: int: Destination UDP port
+        :param options: list: Options sent in every reply of this type
+        """
+        header = bytearray(OPTIONS)
+
+        pack_into('! 6x 6s H', header, 0, server_mac.packed, 0x0800)
+        pack_into('! 2B 3H 2B H 4s 4x', header, IP, 0x45, 0, 0, 0, 0, 255, 17, 0, server_ip.packed)
+        pack_into('! 2H 4x', header, UDP, server_port, client_port)
+        pack_into('! 4B 16x 4s', header, DHCP, 2, 1, 6, 0, server_ip.packed)
+        header[OPTIONS - 4:OPTIONS] = b'\x63\x82\x53\x63'
+
+        self.header = bytes(header)
+        self.options = Options.DHCPMessageType(message_type).pack() + b''.join(option.pack() for option in options)
+        self.source = self.header[IP + 12:IP + 16]
+
+    def build(self, destination_mac, destination_ip, xid, yiaddr, chaddr,
+              broadcast=False, hops=0, giaddr=None, options=b'', port=None):
+        """
+        :param destination_mac: MAC_Address: Destination of the frame
+        :param destination_ip: IPv4Address: Destination of the packet
+        :param xid: int: Transaction ID of the client's request
+        :param yiaddr: IPv4Address: Address given to the client
+        :param chaddr: MAC_Address: Hardware address of the client
+        :param broadcast: bool: Broadcast flag
+        :param hops: int: Relay hops of the client's request
+        :param giaddr: IPv4Address: Relay agent of the client's request
+        :param options: bytes: Packed options requested by the client
+        :param port: int: Destination UDP port, if not the client port. IE: Replies to relay agents
+        :return: bytes: Frame, ready to send
+        """
+        frame = bytearray(self.header)
+        frame += self.options
+        frame += options
+        frame += b'\xff'  # End option
+
+        length = len(frame)
+        destination = destination_ip.packed
+
+        pack_into('! 6s', frame, 0, destination_mac.packed)
+        pack_into('! H', frame, IP + 2, length - IP)
+        frame[IP + 16:UDP] = destination
+        pack_into('! H', frame, UDP + 4, length - UDP)
+        if port is not None:
+            pack_into('! H', frame, UDP + 2, port)
+
+        frame[DHCP + 3] = hops
+        pack_into('! L 2x H', frame, DHCP + 4, xid, broadcast << 15)
+        frame[DHCP + 16:DHCP + 20] = yiaddr.packed
+        if giaddr is not None:
+            frame[DHCP + 24:DHCP + 28] = giaddr.packed
+        frame[DHCP + 28:DHCP + 34] = chaddr.packed
+
+        # UDP checksum covers a pseudo header of the addresses, protocol and length.
+        pseudo_header = self.source + destination + pack('! 2B H', 0, 17, length - UDP)
+        pack_into('! H', frame, UDP + 6, checksum(pseudo_header + frame[UDP:]))
+        pack_into('! H', frame, IP + 10, checksum(frame[IP:UDP]))
+
+        return bytes(frame)
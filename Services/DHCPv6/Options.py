@@ -0,0 +1,260 @@
+from dataclasses import dataclass, field
+from ipaddress import IPv6Address, IPv6Network
+from struct import pack, unpack_from
+from typing import Dict, List
+
+
+# DHCPv6 options (RFC 8415 section 21). Unlike DHCPv4 options, codes and
+# lengths are 2 bytes each and options can hold options of their own (IE:
+# the addresses of an IA_NA).
+
+class BaseOption(object):
+    classes: Dict = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Bases shared by several options (IE: _IA) have no code of their own
+        if 'code' in cls.__dict__:
+            cls.classes[cls.code.default] = cls
+
+    @classmethod
+    def decode(cls, data: bytes):
+        # Option from the data of the option, without the code and length
+        return cls(bytes(data))
+
+    def encode(self):
+        # Data of the option, without the code and length
+        return self.data
+
+    def pack(self):
+        data = self.encode()
+        return pack('! 2H', self.code, len(data)) + data
+
+    @staticmethod
+    def unpack(data: bytes):
+        """
+        :param data: bytes: Options as sent
+        :return: list: Options, ones the server doesn't know as UnknownOption
+        """
+        out = list()
+        offset = 0
+
+        while offset + 4 <= len(data):
+            code, length = unpack_from('! 2H', data, offset)
+            body = data[offset + 4:offset + 4 + length]
+            if len(body) < length:
+                # Truncated option, nothing after it can be trusted
+                break
+
+            cls = BaseOption.classes.get(code)
+            if cls is None:
+                out.append(UnknownOption(code, bytes(body)))
+            else:
+                out.append(cls.decode(body))
+
+            offset = offset + 4 + length
+
+        return out
+
+
+@dataclass
+class UnknownOption(BaseOption):
+    code: int = field(default=-1)
+    data: bytes = field(default=b'')
+
+
+@dataclass
+class ClientID(BaseOption):
+    code: int = field(default=1, init=False)
+    data: bytes  # DUID of the client
+
+
+@dataclass
+class ServerID(BaseOption):
+    code: int = field(default=2, init=False)
+    data: bytes  # DUID of the server
+
+
+class _IA(BaseOption):
+    # Identity association, the addresses (IA_NA) or prefixes (IA_PD) a client has under one IAID
+
+    @classmethod
+    def decode(cls, data: bytes):
+        iaid, t1, t2 = unpack_from('! 3L', data)
+        return cls(iaid, t1, t2, BaseOption.unpack(data[12:]))
+
+    def encode(self):
+        return pack('! 3L', self.iaid, self.t1, self.t2) + b''.join(option.pack() for option in self.options)
+
+    def option(self, code):
+        for option in self.options:
+            if option.code == code:
+                return option
+        return None
+
+
+@dataclass
+class IANA(_IA):
+    code: int = field(default=3, init=False)
+    iaid: int
+    t1: int = field(default=0)
+    t2: int = field(default=0)
+    options: List = field(default_factory=list)
+
+
+@dataclass
+class IAAddress(BaseOption):
+    code: int = field(default=5, init=False)
+    address: IPv6Address
+    preferred: int = field(default=0)
+    valid: int = field(default=0)
+    options: List = field(default_factory=list)
+
+    @classmethod
+    def decode(cls, data: bytes):
+        address, preferred, valid = unpack_from('! 16s 2L', data)
+        return cls(IPv6Address(address), preferred, valid, BaseOption.unpack(data[24:]))
+
+    def encode(self):
+        return pack('! 16s 2L', self.address.packed, self.preferred, self.valid) + \
+               b''.join(option.pack() for option in self.options)
+
+
+@dataclass
+class OptionRequest(BaseOption):
+    code: int = field(default=6, init=False)
+    data: List = field(default_factory=list)  # Codes of the options the client asks for
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls(list(unpack_from(f'! {len(data) // 2}H', data)))
+
+    def encode(self):
+        return pack(f'! {len(self.data)}H', *self.data)
+
+
+@dataclass
+class Preference(BaseOption):
+    code: int = field(default=7, init=False)
+    data: int = field(default=0)
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls(data[0])
+
+    def encode(self):
+        return pack('! B', self.data)
+
+
+@dataclass
+class ElapsedTime(BaseOption):
+    code: int = field(default=8, init=False)
+    data: int = field(default=0)  # Hundredths of a second
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls(unpack_from('! H', data)[0])
+
+    def encode(self):
+        return pack('! H', self.data)
+
+
+@dataclass
+class StatusCode(BaseOption):
+    code: int = field(default=13, init=False)
+    status: int = field(default=0)
+    message: str = field(default='')
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls(unpack_from('! H', data)[0], bytes(data[2:]).decode('utf-8', 'replace'))
+
+    def encode(self):
+        return pack('! H', self.status) + self.message.encode()
+
+
+@dataclass
+class RapidCommit(BaseOption):
+    code: int = field(default=14, init=False)
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls()
+
+    def encode(self):
+        return b''
+
+
+@dataclass
+class DNSServers(BaseOption):
+    code: int = field(default=23, init=False)
+    data: List = field(default_factory=list)
+
+    def __post_init__(self):
+        self.data = [IPv6Address(address) for address in self.data]
+
+    @classmethod
+    def decode(cls, data: bytes):
+        return cls([IPv6Address(bytes(data[i:i + 16])) for i in range(0, len(data) - 15, 16)])
+
+    def encode(self):
+        return b''.join(address.packed for address in self.data)
+
+
+@dataclass
+class DomainList(BaseOption):
+    code: int = field(default=24, init=False)
+    data: List = field(default_factory=list)  # Domain names as str
+
+    @classmethod
+    def decode(cls, data: bytes):
+        domains = list()
+        labels = list()
+        offset = 0
+
+        while offset < len(data):
+            length = data[offset]
+            if length == 0:
+                domains.append('.'.join(labels))
+                labels = list()
+            else:
+                labels.append(bytes(data[offset + 1:offset + 1 + length]).decode('ascii', 'replace'))
+            offset = offset + 1 + length
+
+        return cls(domains)
+
+    def encode(self):
+        out = b''
+        for domain in self.data:
+            for label in domain.strip('.').split('.'):
+                out = out + pack('! B', len(label)) + label.encode('ascii')
+            out = out + b'\x00'
+        return out
+
+
+@dataclass
+class IAPD(_IA):
+    code: int = field(default=25, init=False)
+    iaid: int
+    t1: int = field(default=0)
+    t2: int = field(default=0)
+    options: List = field(default_factory=list)
+
+
+@dataclass
+class IAPrefix(BaseOption):
+    code: int = field(default=26, init=False)
+    prefix: IPv6Network
+    preferred: int = field(default=0)
+    valid: int = field(default=0)
+    options: List = field(default_factory=list)
+
+    @classmethod
+    def decode(cls, data: bytes):
+        preferred, valid, length, prefix = unpack_from('! 2L B 16s', data)
+        prefix = IPv6Network((IPv6Address(prefix), length), strict=False)
+        return cls(prefix, preferred, valid, BaseOption.unpack(data[25:]))
+
+    def encode(self):
+        return pack('! 2L B 16s', self.preferred, self.valid, self.prefix.prefixlen,
+                    self.prefix.network_address.packed) + b''.join(option.pack() for option in self.options)
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from struct import pack, unpack_from
+from typing import List
+
+from Services.DHCPv6.Options import BaseOption
+
+# Message types (RFC 8415 section 7.3)
+SOLICIT = 1
+ADVERTISE = 2
+REQUEST = 3
+CONFIRM = 4
+RENEW = 5
+REBIND = 6
+REPLY = 7
+RELEASE = 8
+DECLINE = 9
+INFORMATION_REQUEST = 11
+
+
+@dataclass
+class DHCPv6Packet(object):
+    message_type: int = field(default=SOLICIT)
+    xid: int = field(default=0)  # Transaction ID, 3 bytes
+    options: List = field(default_factory=list)
+
+    def option(self, code, default=None):
+        """
+        :param code: int: Code of the option
+        :return: First option in the packet with the code or default
+        """
+        for option in self.options:
+            if option.code == code:
+                return option
+        return default
+
+    def options_of(self, code):
+        # Every option in the packet with the code, IE: one IA_NA per IAID
+        return [option for option in self.options if option.code == code]
+
+    def build(self):
+        return pack('! L', (self.message_type << 24) | (self.xid & 0xffffff)) + \
+               b''.join(option.pack() for option in self.options)
+
+    @classmethod
+    def disassemble(cls, packet: bytes):
+        header, = unpack_from('! L', packet)
+        return cls(header >> 24, header & 0xffffff, BaseOption.unpack(packet[4:]))
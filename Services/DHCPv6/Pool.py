@@ -0,0 +1,137 @@
+from ipaddress import IPv6Address, IPv6Network, ip_network
+from threading import Lock
+
+from Services.DHCP.Allocator import Allocator
+
+
+class Pool(object):
+    # Addresses (IA_NA) and delegated prefixes (IA_PD) of one link.
+    #
+    # Both are kept as integer ranges by an Allocator, so a /64 of addresses
+    # or a /40 split into /56 prefixes costs a couple of ranges of memory,
+    # not one entry per address or prefix.
+
+    def __init__(self, network, prefixes=None, delegated_length=56, exclusions=()):
+        """
+        :param network: str: Network the addresses are handed out from. IE: '2001:db8:0:1::/64'
+        :param prefixes: str: Network prefixes are delegated from, None to not delegate any. IE: '2001:db8:100::/40'
+        :param delegated_length: int: Length of each delegated prefix
+        :param exclusions: list: (first, last) addresses, or single addresses, never to hand out
+        """
+        self.network = ip_network(network)
+        self.lock = Lock()
+
+        first = int(self.network.network_address)
+        last = int(self.network.broadcast_address)
+        if self.network.prefixlen <= 120:
+            # The Subnet-Router anycast address and the reserved anycast addresses at the top (RFC 2526)
+            first = first + 1
+            last = last - 128
+
+        self.addresses = Allocator([(first, last)], [self._exclusion(exclusion) for exclusion in exclusions])
+
+        if prefixes is not None:
+            self.prefix_network = ip_network(prefixes)
+            if delegated_length < self.prefix_network.prefixlen:
+                raise ValueError(f'Delegated prefixes can\'t be shorter than {self.prefix_network}')
+
+            # Prefixes are numbered 0 to count - 1 from the start of the network
+            self.delegated_length = delegated_length
+            count = 1 << (delegated_length - self.prefix_network.prefixlen)
+            self.prefixes = Allocator([(0, count - 1)])
+        else:
+            self.prefix_network = None
+            self.delegated_length = None
+            self.prefixes = Allocator()
+
+    @staticmethod
+    def _exclusion(exclusion):
+        try:
+            first, last = exclusion
+        except (TypeError, ValueError):
+            first = last = exclusion
+        return int(IPv6Address(first)), int(IPv6Address(last))
+
+    # ----------------------------------------------------------------------
+    # Addresses
+
+    def get_address(self, hint=None):
+        """
+        :param hint: IPv6Address: Address the client asked for, given if free
+        :return: IPv6Address or None if every address is in use
+        """
+        with self.lock:
+            if hint is not None and hint in self.network and self.addresses.take(int(hint)):
+                return hint
+
+            address = self.addresses.allocate()
+        if address is None:
+            return None
+        return IPv6Address(address)
+
+    def take_address(self, address):
+        if address not in self.network:
+            return False
+        with self.lock:
+            return self.addresses.take(int(address))
+
+    def free_address(self, address):
+        if address in self.network:
+            with self.lock:
+                self.addresses.release(int(address))
+
+    # ----------------------------------------------------------------------
+    # Delegated prefixes
+
+    def _prefix(self, index):
+        base = int(self.prefix_network.network_address) + (index << (128 - self.delegated_length))
+        return IPv6Network((base, self.delegated_length))
+
+    def _index(self, prefix):
+        if self.prefix_network is None or prefix.prefixlen != self.delegated_length \
+                or not prefix.subnet_of(self.prefix_network):
+            return None
+        offset = int(prefix.network_address) - int(self.prefix_network.network_address)
+        return offset >> (128 - self.delegated_length)
+
+    def get_prefix(self, hint=None):
+        """
+        :param hint: IPv6Network: Prefix the client asked for, given if free
+        :return: IPv6Network or None if every prefix is delegated or the pool delegates none
+        """
+        with self.lock:
+            if hint is not None:
+                index = self._index(hint)
+                if index is not None and self.prefixes.take(index):
+                    return hint
+
+            index = self.prefixes.allocate()
+        if index is None:
+            return None
+        return self._prefix(index)
+
+    def take_prefix(self, prefix):
+        index = self._index(prefix)
+        if index is None:
+            return False
+        with self.lock:
+            return self.prefixes.take(index)
+
+    def free_prefix(self, prefix):
+        index = self._index(prefix)
+        if index is not None:
+            with self.lock:
+                self.prefixes.release(index)
+
+    # ----------------------------------------------------------------------
+
+    def statistics(self):
+        return {
+            'addresses': self.addresses.scope.size,
+            'addresses_used': self.addresses.used,
+            'prefixes': self.prefixes.scope.size,
+            'prefixes_used': self.prefixes.used,
+        }
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.network}, {self.prefix_network})'
@@ -0,0 +1,463 @@
+from configparser import ConfigParser
+from functools import lru_cache
+from ipaddress import IPv6Address, ip_address, ip_network
+from os import path
+from socket import AF_INET6, IPPROTO_IPV6, IPV6_JOIN_GROUP, inet_pton, if_nametoindex
+from socketserver import BaseRequestHandler
+from struct import pack
+from threading import RLock
+from time import time
+from uuid import getnode
+
+from BaseServers import BaseUDPServer
+from RawPacket import MAC_Address
+from Services.DHCP.GarbageCollection import GarbageCollector
+from Services.DHCP.LeaseStore import LeaseStore
+from Services.DHCP.LeaseTable import LeaseTable
+from . import Options, Packet
+from .Pool import Pool
+
+ALL_DHCP_RELAY_AGENTS_AND_SERVERS = 'ff02::1:2'
+
+# Status codes (RFC 8415 section 21.13)
+SUCCESS = 0
+NO_ADDRS_AVAIL = 2
+NO_BINDING = 3
+NO_PREFIX_AVAIL = 6
+
+# Owner of addresses declined by clients while they're held out of the pool.
+# Each one is kept as a lease of its own, with the address as the ClientID.
+DECLINED = b''
+
+
+@lru_cache(maxsize=None)
+def get_defaults():
+    """
+    Server defaults from config.ini.
+    Read the first time a server is created rather than on import.
+
+    :return: ConfigParser
+    """
+    defaults = ConfigParser()
+    defaults.read(path.join(path.dirname(__file__), 'config.ini'))
+    return defaults
+
+
+def binding(code, iaid):
+    # ClientID the lease of one IA is kept under. A client has a lease per IA, not per DUID.
+    return pack('! H L', code, iaid)
+
+
+class UDPHandler(BaseRequestHandler):
+    packet = None
+    duid = None
+
+    # Keys will be the message type of the client's packet, values the name of the method handling it
+    dispatch = {
+        Packet.SOLICIT: 'handle_solicit',
+        Packet.REQUEST: 'handle_request',
+        Packet.RENEW: 'handle_renew',
+        Packet.REBIND: 'handle_rebind',
+        Packet.RELEASE: 'handle_release',
+        Packet.DECLINE: 'handle_decline',
+        Packet.INFORMATION_REQUEST: 'handle_information',
+    }
+
+    def setup(self):
+        try:
+            self.packet = Packet.DHCPv6Packet.disassemble(self.request[0])
+        except Exception:
+            # Too short to be a DHCPv6 message
+            self.packet = None
+
+    def handle(self):
+        if self.packet is None:
+            return
+
+        message_type = self.packet.message_type
+        name = self.dispatch.get(message_type)
+        if name is None:
+            return
+
+        clientid = self.packet.option(1)
+        if clientid is None and message_type != Packet.INFORMATION_REQUEST:
+            return
+        self.duid = clientid.data if clientid is not None else b''
+
+        # Which messages may or must name a server (RFC 8415 section 16)
+        serverid = self.packet.option(2)
+        if message_type in (Packet.SOLICIT, Packet.REBIND):
+            if serverid is not None:
+                return
+        elif message_type == Packet.INFORMATION_REQUEST:
+            if serverid is not None and serverid.data != self.server.duid:
+                return
+        elif serverid is None or serverid.data != self.server.duid:
+            return
+
+        self.server.count(message_type)
+
+        # Requests of the same client are handled one at a time, other clients carry on
+        with self.server.client_lock(self.duid):
+            reply = getattr(self, name)()
+        if reply is not None:
+            self.request[1].sendto(reply.build(), self.client_address)
+
+    # ----------------------------------------------------------------------
+
+    def reply(self, message_type, options=()):
+        out = Packet.DHCPv6Packet(message_type, self.packet.xid, list())
+        if self.duid:
+            out.options.append(Options.ClientID(self.duid))
+        out.options.append(Options.ServerID(self.server.duid))
+        out.options.extend(options)
+
+        requested = self.packet.option(6)
+        if requested is not None:
+            for code in requested.data:
+                option = self.server.options.get(code)
+                if option is not None:
+                    out.options.append(option)
+        return out
+
+    def identities(self):
+        # Every IA_NA and IA_PD in the client's packet
+        return self.packet.options_of(3) + self.packet.options_of(25)
+
+    @staticmethod
+    def hint(ia):
+        # Address or prefix the client put in the IA, if any
+        option = ia.option(5 if ia.code == 3 else 26)
+        if option is None:
+            return None
+        return option.address if ia.code == 3 else option.prefix
+
+    def answer(self, ia, value, lifetimes=None):
+        """
+        :param ia: IANA or IAPD of the client
+        :param value: IPv6Address, IPv6Network or None if nothing could be given
+        :param lifetimes: tuple: (preferred, valid). Defaults to the server's
+        :return: IANA or IAPD to send back
+        """
+        if value is None:
+            if ia.code == 3:
+                status = Options.StatusCode(NO_ADDRS_AVAIL, 'No addresses available')
+            else:
+                status = Options.StatusCode(NO_PREFIX_AVAIL, 'No prefixes available')
+            return ia.__class__(ia.iaid, 0, 0, [status])
+
+        preferred, valid = lifetimes or (self.server.preferred_lifetime, self.server.valid_lifetime)
+        if ia.code == 3:
+            option = Options.IAAddress(value, preferred, valid)
+        else:
+            option = Options.IAPrefix(value, preferred, valid)
+        return ia.__class__(ia.iaid, int(preferred * 0.5), int(preferred * 0.8), [option])
+
+    def no_binding(self, ia):
+        return ia.__class__(ia.iaid, 0, 0, [Options.StatusCode(NO_BINDING, 'No binding for the IA')])
+
+    # ----------------------------------------------------------------------
+
+    def handle_solicit(self):
+        if self.server.rapid_commit and self.packet.option(14) is not None:
+            # Two message exchange (RFC 8415 section 18.3.1), bind straight away
+            answers = [self.answer(ia, self.server.assign(self.duid, ia.code, ia.iaid, self.hint(ia), True))
+                       for ia in self.identities()]
+            return self.reply(Packet.REPLY, [*answers, Options.RapidCommit()])
+
+        answers = [self.answer(ia, self.server.assign(self.duid, ia.code, ia.iaid, self.hint(ia), False))
+                   for ia in self.identities()]
+        options = [Options.Preference(self.server.preference)] if self.server.preference else []
+        return self.reply(Packet.ADVERTISE, [*answers, *options])
+
+    def handle_request(self):
+        answers = [self.answer(ia, self.server.assign(self.duid, ia.code, ia.iaid, self.hint(ia), True))
+                   for ia in self.identities()]
+        return self.reply(Packet.REPLY, answers)
+
+    def handle_renew(self):
+        answers = list()
+        for ia in self.identities():
+            lease = self.server.renew(self.duid, ia.code, ia.iaid)
+            answers.append(self.no_binding(ia) if lease is None else self.answer(ia, lease.ip))
+        return self.reply(Packet.REPLY, answers)
+
+    def handle_rebind(self):
+        # Any server may answer a REBIND. Leases it doesn't know of are given if they're still free.
+        answers = list()
+        for ia in self.identities():
+            lease = self.server.renew(self.duid, ia.code, ia.iaid)
+            if lease is not None:
+                answers.append(self.answer(ia, lease.ip))
+                continue
+
+            hint = self.hint(ia)
+            if hint is not None and self.server.take(hint):
+                self.server.bind(self.duid, ia.code, ia.iaid, hint)
+                answers.append(self.answer(ia, hint))
+            elif hint is not None:
+                # Not the client's to keep, tell it to stop using it (RFC 8415 section 18.3.5)
+                answers.append(self.answer(ia, hint, (0, 0)))
+            else:
+                answers.append(self.no_binding(ia))
+        return self.reply(Packet.REPLY, answers)
+
+    def handle_release(self):
+        for ia in self.identities():
+            self.server.release(self.duid, binding(ia.code, ia.iaid), self.hint(ia))
+        return self.reply(Packet.REPLY, [Options.StatusCode(SUCCESS, 'Released')])
+
+    def handle_decline(self):
+        for ia in self.packet.options_of(3):
+            for option in ia.options:
+                if option.code == 5:
+                    self.server.decline(self.duid, binding(ia.code, ia.iaid), option.address)
+        return self.reply(Packet.REPLY, [Options.StatusCode(SUCCESS, 'Declined')])
+
+    def handle_information(self):
+        return self.reply(Packet.REPLY)
+
+
+class UDPServer(BaseUDPServer):
+    address_family = AF_INET6
+    allow_reuse_address = True
+
+    def __init__(self, ip='::', port=None, **kwargs):
+        defaults = get_defaults()
+        if port is None:
+            port = defaults.getint('numbers', 'server_port')
+
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
+
+        # Join the multicast group clients send to on the interface
+        interface = kwargs.get('interface', defaults.get('optional', 'interface'))
+        if interface:
+            group = inet_pton(AF_INET6, ALL_DHCP_RELAY_AGENTS_AND_SERVERS) + pack('@I', if_nametoindex(interface))
+            self.socket.setsockopt(IPPROTO_IPV6, IPV6_JOIN_GROUP, group)
+
+        # DUID-LL (RFC 8415 section 11.4) from the MAC address, unless given one
+        mac_address = MAC_Address(kwargs.get('mac_address', getnode()))
+        self.duid = kwargs.get('server_duid', pack('! 2H', 3, 1) + mac_address.packed)
+
+        # Addresses and delegated prefixes
+        prefixes = kwargs.get('prefixes', defaults.get('ip addresses', 'prefixes')) or None
+        self.pool = Pool(kwargs.get('network', defaults.get('ip addresses', 'network')), prefixes,
+                         kwargs.get('delegated_length', defaults.getint('numbers', 'delegated_length')),
+                         kwargs.get('exclusions', ()))
+
+        # Timing information
+        self.offer_hold_time = kwargs.get('offer_hold_time', defaults.getint('numbers', 'offer_hold_time'))
+        self.decline_hold_time = kwargs.get('decline_hold_time', defaults.getint('numbers', 'decline_hold_time'))
+        self.preferred_lifetime = kwargs.get('preferred_lifetime', defaults.getint('numbers', 'preferred_lifetime'))
+        self.valid_lifetime = kwargs.get('valid_lifetime', defaults.getint('numbers', 'valid_lifetime'))
+
+        self.rapid_commit = kwargs.get('rapid_commit', defaults.getboolean('optional', 'rapid_commit'))
+        self.preference = kwargs.get('preference', defaults.getint('numbers', 'preference'))
+
+        # Requests over these limits are dropped before a handler is made for them
+        self.enable_admission(
+            kwargs.get('admission_rate', defaults.getfloat('admission', 'rate')),
+            kwargs.get('admission_burst', defaults.getint('admission', 'burst')),
+            kwargs.get('max_active', defaults.getint('admission', 'max_active')),
+            kwargs.get('max_per_client', defaults.getint('admission', 'max_per_client')),
+        )
+
+        # Options given to clients that ask for them
+        self.options = dict()  # Keys will be an int being the code of the option.
+        dns_servers = kwargs.get('dns_servers', defaults.get('ip address lists', 'dnsservers').split())
+        if dns_servers:
+            self.register(Options.DNSServers(dns_servers))
+        domains = kwargs.get('domains', defaults.get('ip address lists', 'domains').split())
+        if domains:
+            self.register(Options.DomainList(domains))
+
+        # Addresses and prefixes advertised but not yet requested
+        self.offers = dict()  # Keys will be a tuple of (DUID, ClientID of the IA), values the address or prefix
+
+        # Leases of bound IAs, keyed by (DUID, ClientID of the IA)
+        self.leases = LeaseTable()
+        self.gb = GarbageCollector()
+        self.store = LeaseStore(kwargs.get('lease_file', defaults.get('optional', 'leasefile')))
+
+        self.shards = tuple(RLock() for _ in range(kwargs.get('lock_shards', defaults.getint('numbers', 'lock_shards'))))
+
+        self.counters = dict()  # Keys will be the message type, values the number received
+
+    def client_lock(self, duid):
+        # Lock of the shard the client's state (offers, leases) belongs to
+        return self.shards[hash(duid) % len(self.shards)]
+
+    def count(self, message_type):
+        self.counters[message_type] = self.counters.get(message_type, 0) + 1
+
+    def register(self, option):
+        self.options[option.code] = option
+
+    # ----------------------------------------------------------------------
+    # Addresses and prefixes
+
+    def take(self, value):
+        if (type(value) == IPv6Address):
+            return self.pool.take_address(value)
+        return self.pool.take_prefix(value)
+
+    def free(self, value):
+        if (type(value) == IPv6Address):
+            self.pool.free_address(value)
+        else:
+            self.pool.free_prefix(value)
+
+    def assign(self, duid, code, iaid, hint=None, commit=True):
+        """
+        Address (IA_NA) or prefix (IA_PD) for an IA of a client
+
+        :param duid: bytes: DUID of the client
+        :param code: int: 3 for an IA_NA, 25 for an IA_PD
+        :param iaid: int: IAID of the IA
+        :param hint: IPv6Address or IPv6Network the client asked for
+        :param commit: bool: Bind the IA, or only hold the value for a later REQUEST
+        :return: IPv6Address, IPv6Network or None if the pool is out of them
+        """
+        with self.client_lock(duid):
+            clientid = binding(code, iaid)
+
+            lease = self.leases.get(duid, clientid)
+            value = lease.ip if lease is not None else self.offers.get((duid, clientid))
+
+            if value is None:
+                if code == 3:
+                    value = self.pool.get_address(hint)
+                else:
+                    value = self.pool.get_prefix(hint)
+                if value is None:
+                    return None
+
+            if commit:
+                self.bind(duid, code, iaid, value)
+            elif lease is None and (duid, clientid) not in self.offers:
+                self.offers[(duid, clientid)] = value
+                self.gb.insert(self.offer_hold_time, self.release_offer, duid, clientid, value,
+                               key=('offer', duid, clientid))
+            return value
+
+    def release_offer(self, duid, clientid, value):
+        with self.client_lock(duid):
+            if self.offers.get((duid, clientid)) == value:
+                del self.offers[(duid, clientid)]
+                self.free(value)
+
+    def bind(self, duid, code, iaid, value):
+        with self.client_lock(duid):
+            clientid = binding(code, iaid)
+            if self.offers.pop((duid, clientid), None) is not None:
+                self.gb.cancel(('offer', duid, clientid))
+
+            lease = self.leases.get(duid, clientid)
+            if lease is not None and lease.ip != value:
+                self.free(lease.ip)
+
+            lease = self.leases.add(duid, clientid, value, time() + self.valid_lifetime)
+            self.store.put(duid.hex(), clientid, value, lease.expires)
+            # Replaces the expiry timer of a renewing client instead of stacking another one.
+            self.gb.insert(self.valid_lifetime, self.expire, duid, clientid, value,
+                           key=('client', duid, clientid))
+            return lease
+
+    def renew(self, duid, code, iaid):
+        """
+        :return: Lease or None if the IA isn't bound
+        """
+        with self.client_lock(duid):
+            lease = self.leases.get(duid, binding(code, iaid))
+            if lease is None:
+                return None
+            return self.bind(duid, code, iaid, lease.ip)
+
+    def release(self, duid, clientid, value=None):
+        with self.client_lock(duid):
+            lease = self.leases.get(duid, clientid)
+            if lease is None:
+                return
+
+            if value is not None and lease.ip != value:
+                # Not the client's current address or prefix
+                return
+
+            self.gb.cancel(('client', duid, clientid))
+
+            self.leases.remove(duid, clientid)
+            self.free(lease.ip)
+            self.store.remove(duid.hex(), clientid)
+
+    def expire(self, duid, clientid, value):
+        with self.client_lock(duid):
+            if ('client', duid, clientid) in self.gb:
+                # Renewed while its old timer was going off
+                return
+            lease = self.leases.get(duid, clientid)
+            if lease is None or lease.ip != value:
+                return
+
+            self.leases.remove(duid, clientid)
+            self.free(lease.ip)
+            self.store.remove(duid.hex(), clientid)
+
+    def decline(self, duid, clientid, address):
+        with self.client_lock(duid):
+            lease = self.leases.get(duid, clientid)
+            if lease is None or lease.ip != address:
+                return
+
+            # The client gives the address up, but it can't go back in the pool either.
+            self.gb.cancel(('client', duid, clientid))
+            self.leases.remove(duid, clientid)
+            self.store.remove(duid.hex(), clientid)
+            self.quarantine(address)
+
+    def quarantine(self, address):
+        # Hold an address out of the pool for decline_hold_time, then put it back.
+        clientid = address.packed
+        lease = self.leases.add(DECLINED, clientid, address, time() + self.decline_hold_time)
+        self.store.put(DECLINED.hex(), clientid, address, lease.expires)
+        self.gb.insert(self.decline_hold_time, self.expire, DECLINED, clientid, address,
+                       key=('client', DECLINED, clientid))
+
+    def restore(self):
+        # Take back the leases that were active when the server last stopped.
+        now = time()
+
+        for (duid, clientid), (value, expires, _) in self.store.load().items():
+            duid = bytes.fromhex(duid)
+            clientid = bytes.fromhex(clientid)
+            value = ip_network(value) if '/' in value else ip_address(value)
+
+            if expires <= now or not self.take(value):
+                # Lease ran out while the server was down or no longer fits the pool
+                self.store.remove(duid.hex(), clientid)
+                continue
+
+            self.leases.add(duid, clientid, value, expires)
+            self.gb.insert(expires - now, self.expire, duid, clientid, value,
+                           key=('client', duid, clientid))
+
+    def statistics(self):
+        return {**self.pool.statistics(), 'leases': len(self.leases), 'offers': len(self.offers),
+                'messages': dict(self.counters)}
+
+    def start(self):
+        self.restore()
+        self.gb.start()
+        self.store.start()
+        super().start()
+
+    def shutdown(self):
+        self.gb.shutdown()
+        self.store.shutdown()
+        super().shutdown()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -0,0 +1,33 @@
+from importlib import import_module
+
+# Submodules, and the names re-exported from them, are imported the first
+# time they are used (PEP 562), the same way as Services.DHCP.
+
+_submodules = ('Options', 'Packet', 'Pool', 'Server')
+
+_lazy = {
+    'UDPHandler': 'Server',
+    'UDPServer': 'Server',
+    'get_defaults': 'Server',
+    'DHCPv6Packet': 'Packet',
+}
+
+__all__ = [*_submodules, *_lazy]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return import_module(f'.{name}', __name__)
+
+    try:
+        module = _lazy[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -1,11 +1,13 @@
 from datetime import datetime, timedelta
 from json import load, dump
 
-from .Classes import Query, ResourceRecord, Type, Class
+from .Classes import Query, ResourceRecord
 
 
 class BaseStorage(object):
     def __init__(self):
+        from .Types import Type, Class
+
         packed_rdata = Type.A.factory('0.0.0.0').packed
         self.dummy_record = (Type.A, Class.IN, (1 << 32) - 1, len(packed_rdata), packed_rdata)
 
@@ -45,6 +47,8 @@ class DictStorage(BaseStorage):
         except FileNotFoundError:
             return
 
+        from .Types import Type, Class
+
         self.blocked_hostnames.extend(data['blocked_hostnames'])
         self.blocked_domains.extend(data['blocked_domains'])
 
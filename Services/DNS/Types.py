@@ -0,0 +1,135 @@
+from enum import Enum
+from ipaddress import ip_address
+from struct import pack, unpack
+
+from .Classes import unpack_name, unpack_name_server
+
+# Record types and classes. Building the enums is left until a packet
+# is parsed or a query is made, importing the package doesn't do it.
+
+
+class Type(Enum):
+    A = (1, 'IPv4 Address', ip_address)
+    NS = (2, 'Authoritative Name Server', unpack_name_server)
+    MD = (3, 'Mail Destinatin (Obsolete)')
+    MF = (4, 'Mail Forwarder (Obsolete)')
+    CNAME = (5, 'Canonical name')
+    SOA = (6, 'Start of Authority')
+    MB = (7, 'Mailbox Domain Name')
+    MG = (8, 'Mail Group Member')
+    MR = (9, 'Mail Rename Doamin Name')
+    NULL = (10, 'Null Resource Record')
+    WKS = (11, 'Well Known Service')
+    PTR = (12, 'Domain Name Pointer', unpack_name)
+    HINFO = (13, 'IPv4 Address')
+    MINFO = (14, 'IPv4 Address')
+    MX = (15, 'IPv4 Address')
+    TXT = (16, 'IPv4 Address')
+    RP = (17, 'IPv4 Address')
+    AFSDB = (18, 'IPv4 Address')
+    X25 = (19, 'IPv4 Address')
+    ISDN = (20, 'IPv4 Address')
+    RT = (21, 'IPv4 Address')
+    NSAP = (22, 'IPv4 Address')
+    NSAP_PTR = (23, 'IPv4 Address')
+    SIG = (24, 'IPv4 Address')
+    KEY = (25, 'IPv4 Address')
+    PX = (26, 'IPv4 Address')
+    GPOS = (27, 'IPv4 Address')
+    AAAA = (28, 'IPv6 Address', ip_address)
+    LOC = (29, 'IPv4 Address')
+    NXT = (30, 'IPv4 Address')
+    EID = (31, 'IPv4 Address')
+    NIMLOC = (32, 'IPv4 Address')
+    NB = (32, 'IPv4 Address')
+    SRV = (33, 'IPv4 Address')
+    NBSTAT = (33, 'IPv4 Address')
+    ATMA = (34, 'IPv4 Address')
+    NAPTR = (35, 'IPv4 Address')
+    KX = (36, 'IPv4 Address')
+    CERT = (37, 'IPv4 Address')
+    A6 = (38, 'IPv4 Address')
+    DNAME = (39, 'IPv4 Address')
+    SINK = (40, 'IPv4 Address')
+    OPT = (41, 'IPv4 Address')
+    APL = (42, 'IPv4 Address')
+    DS = (43, 'IPv4 Address')
+    SSHFP = (44, 'IPv4 Address')
+    IPSECKEY = (45, 'IPv4 Address')
+    RRSIG = (46, 'IPv4 Address')
+    NSEC = (47, 'IPv4 Address')
+    DNSKEY = (48, 'IPv4 Address')
+    DHCID = (49, 'IPv4 Address')
+    NSEC3 = (50, 'IPv4 Address')
+    NSEC3PARAM = (51, 'IPv4 Address')
+    TLSA = (52, 'IPv4 Address')
+    HIP = (55, 'IPv4 Address')
+    NINFO = (56, 'IPv4 Address')
+    RKEY = (57, 'IPv4 Address')
+    TALINK = (58, 'IPv4 Address')
+    CHILD_DS = (59, 'IPv4 Address')
+    SPF = (99, 'IPv4 Address')
+    UINFO = (100, 'IPv4 Address')
+    UID = (101, 'IPv4 Address')
+    GID = (102, 'IPv4 Address')
+    UNSPEC = (103, 'IPv4 Address')
+    TKEY = (249, 'IPv4 Address')
+    TSIG = (250, 'IPv4 Address')
+    IXFT = (251, 'IPv4 Address')
+    AXFR = (252, 'IPv4 Address')
+    MAILB = (253, 'IPv4 Address')
+    MAILA = (254, 'IPv4 Address')
+    ALL = (255, 'IPv4 Address')
+    URI = (256, 'IPv4 Address')
+    CAA = (257, 'IPv4 Address')
+    DNSSEC_TA = (32768, 'IPv4 Address')
+    DNSSEC_LV = (32769, 'IPv4 Address')
+
+    def __new__(cls, _type, description='', factory=bytes):
+        obj = object.__new__(cls)
+        obj._value_ = _type
+        obj.description = description
+        obj.factory = factory
+        return obj
+
+    def __repr__(self):
+        return f'{self._name_}(type={self._value_}, description={self.description})'
+
+    def __str__(self):
+        return repr(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _type = unpack('! H', data)[0]
+        return cls(_type)
+
+    def to_bytes(self):
+        return pack('! H', self._value_)
+
+
+class Class(Enum):
+    IN = (1, 'Internet')
+    CH = (3, 'Chaos')
+    HS = (4, 'Hesoid')
+    NONE = (254, 'None')
+    ANY = (255, 'Any')
+
+    def __new__(cls, _class, description):
+        obj = object.__new__(cls)
+        obj._value_ = _class
+        obj.description = description
+        return obj
+
+    def __repr__(self):
+        return f'{self._name_}(class={self._value_}, description={self.description})'
+
+    def __str__(self):
+        return repr(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _class = unpack('! H', data)[0]
+        return cls(_class)
+
+    def to_bytes(self):
+        return pack('! H', self._value_)
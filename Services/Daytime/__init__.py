@@ -74,14 +74,14 @@ class UDPHandler(BaseRequestHandler):
 
 
 class TCPServer(BaseTCPServer):
-    def __init__(self, ip, format='%d %b %y %H:%M:%S %Z'):
-        BaseTCPServer.__init__(self, ip, 13, TCPHandler)
+    def __init__(self, ip, format='%d %b %y %H:%M:%S %Z', port: int = 13):
+        BaseTCPServer.__init__(self, ip, port, TCPHandler)
         # String format for server to respond with
         self.format = format
 
 
 class UDPServer(BaseUDPServer):
-    def __init__(self, ip, format='%d %b %y %H:%M:%S %Z'):
-        BaseUDPServer.__init__(self, ip, 13, UDPHandler)
+    def __init__(self, ip, format='%d %b %y %H:%M:%S %Z', port: int = 13):
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
         # String format for server to respond with
         self.format = format
@@ -63,10 +63,10 @@ class UDPHandler(BaseRequestHandler):
 
 
 class TCPServer(BaseTCPServer):
-    def __init__(self, ip):
-        BaseTCPServer.__init__(self, ip, 9, TCPHandler)
+    def __init__(self, ip, port: int = 9):
+        BaseTCPServer.__init__(self, ip, port, TCPHandler)
 
 
 class UDPServer(BaseUDPServer):
-    def __init__(self, ip):
-        BaseUDPServer.__init__(self, ip, 9, UDPHandler)
+    def __init__(self, ip, port: int = 9):
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
@@ -68,10 +68,10 @@ class UDPHandler(BaseRequestHandler):
 
 
 class TCPServer(BaseTCPServer):
-    def __init__(self, ip):
-        BaseTCPServer.__init__(self, ip, 7, TCPHandler)
+    def __init__(self, ip, port: int = 7):
+        BaseTCPServer.__init__(self, ip, port, TCPHandler)
 
 
 class UDPServer(BaseUDPServer):
-    def __init__(self, ip):
-        BaseUDPServer.__init__(self, ip, 7, UDPHandler)
+    def __init__(self, ip, port: int = 7):
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
@@ -66,8 +66,8 @@ class UDPHandler(BaseRequestHandler):
 
 
 class TCPServer(BaseTCPServer):
-    def __init__(self, ip, message: bytes = b''):
-        BaseTCPServer.__init__(self, ip, 17, TCPHandler)
+    def __init__(self, ip, message: bytes = b'', port: int = 17):
+        BaseTCPServer.__init__(self, ip, port, TCPHandler)
         # Message to send to clients
         self.message = message
 
@@ -76,8 +76,8 @@ class TCPServer(BaseTCPServer):
 
 
 class UDPServer(BaseUDPServer):
-    def __init__(self, ip, message: bytes = b''):
-        BaseUDPServer.__init__(self, ip, 17, UDPHandler)
+    def __init__(self, ip, message: bytes = b'', port: int = 17):
+        BaseUDPServer.__init__(self, ip, port, UDPHandler)
         # Message to send to clients
         self.message = message
 
@@ -0,0 +1,59 @@
+from argparse import ArgumentParser
+from json import dumps
+from os import path
+
+from . import harness
+from .services import BENCHMARKS
+
+# Run the service benchmarks from the repository root:
+#
+#   python -m benchmarks                     Run everything and print the report
+#   python -m benchmarks echo_udp dns_udp    Run only the named benchmarks
+#   python -m benchmarks --save-baseline     Store the report as the new baseline
+#
+# Every run is compared to the stored baseline if there is one.
+# The exit status is 1 when a regression was found.
+
+BASELINE = path.join(path.dirname(__file__), 'baseline.json')
+
+
+def main():
+    parser = ArgumentParser(prog='python -m benchmarks', description='Service load benchmarks')
+    parser.add_argument('names', nargs='*', help='Benchmarks to run. Defaults to all of them.')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of measured load per benchmark')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Seconds of load before measuring')
+    parser.add_argument('--processes', type=int, default=2, help='Number of load generating processes')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative change')
+    parser.add_argument('--list', action='store_true', help='List the available benchmarks')
+    args = parser.parse_args()
+
+    if args.list:
+        for bench in BENCHMARKS:
+            print(bench.name)
+        return 0
+
+    benchmarks = [bench for bench in BENCHMARKS if not args.names or bench.name in args.names]
+    report = harness.run(benchmarks, args.duration, args.processes, args.warmup)
+
+    print(dumps(report, indent=2))
+    if args.output:
+        harness.save(report, args.output)
+
+    status = 0
+    if path.exists(args.baseline) and not args.save_baseline:
+        regressions = harness.compare(report, harness.load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        harness.save(report, args.baseline)
+
+    return status
+
+
+if __name__ == '__main__':
+    exit(main())
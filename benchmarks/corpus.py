@@ -0,0 +1,95 @@
+from ipaddress import ip_address
+from struct import pack
+
+from RawPacket import Ethernet, IPv4, UDP, MAC_Address
+
+# Realistic packets for the codec micro benchmarks.
+# Everything is built once at import time and only read afterwards.
+
+CLIENT_MAC = MAC_Address('3c:22:fb:8a:41:7e')
+BROADCAST_MAC = MAC_Address('ff:ff:ff:ff:ff:ff')
+
+
+# --------------------------------------------------
+# DHCP
+#
+#
+# --------------------------------------------------
+
+
+def _option(code, data):
+    return pack('! 2B', code, len(data)) + data
+
+
+# Option area of a DISCOVER as sent by a current desktop OS
+DHCP_OPTIONS = b''.join([
+    _option(53, b'\x01'),  # DHCP Message Type: DISCOVER
+    _option(61, b'\x01' + CLIENT_MAC.packed),  # Client ID
+    _option(50, ip_address('192.168.0.23').packed),  # Requested IP
+    _option(12, b'workstation-0042'),  # Host Name
+    _option(60, b'MSFT 5.0'),  # Vendor Class ID
+    _option(57, pack('! H', 1500)),  # Max DHCP Message Size
+    _option(55, bytes([1, 3, 6, 15, 31, 33, 43, 44, 46, 47, 119, 121, 249, 252])),  # Parameter Request List
+]) + b'\xff'
+
+DHCP_PAYLOAD = pack('! 4B L 2H 4L 6s 10x', 1, 1, 6, 0, 0x3903f326, 0, 0x8000, 0, 0, 0, 0, CLIENT_MAC.packed) + \
+               bytes(64) + bytes(128) + b'\x63\x82\x53\x63' + DHCP_OPTIONS
+
+
+def _dhcp_frame():
+    udp = UDP(68, 67, DHCP_PAYLOAD)
+    ip = IPv4(ip_address('0.0.0.0'), ip_address('255.255.255.255'), udp)
+    eth = Ethernet(BROADCAST_MAC, CLIENT_MAC, ip)
+    eth.calc_checksum()
+    return eth.build()
+
+
+DHCP_FRAME = _dhcp_frame()
+
+# IPv4 header and UDP segment as they are summed by calc_checksum
+CHECKSUM_DATA = DHCP_FRAME[14:]
+
+
+# --------------------------------------------------
+# DNS
+#
+#
+# --------------------------------------------------
+
+
+def _name(name):
+    return b''.join(pack('! B', len(label)) + label for label in name.split(b'.')) + b'\x00'
+
+
+# Response to "www.example.com A" with a CNAME chain and compressed names
+DNS_RESPONSE = pack('! 6H', 0x1d2f, 0x8180, 1, 3, 0, 0) + \
+               _name(b'www.example.com') + pack('! 2H', 1, 1) + \
+               b'\xc0\x0c' + pack('! 2H L H', 5, 1, 3600, 18) + _name(b'edge.example.net') + \
+               b'\xc0\x2d' + pack('! 2H L H', 1, 1, 300, 4) + ip_address('93.184.216.34').packed + \
+               b'\xc0\x2d' + pack('! 2H L H', 1, 1, 300, 4) + ip_address('93.184.216.35').packed
+
+DNS_NAME = _name(b'mail.corp.example.com') + pack('! 2H', 1, 1)
+
+
+# --------------------------------------------------
+# ASN.1 BER
+#
+#
+# --------------------------------------------------
+
+
+def _tlv(tag, content):
+    return pack('! 2B', tag, len(content)) + content
+
+
+# LDAP SearchRequest for (objectClass=*) under dc=example,dc=com
+LDAP_SEARCH = _tlv(0x30, _tlv(0x02, b'\x02') + _tlv(0x63, b''.join([
+    _tlv(0x04, b'dc=example,dc=com'),  # baseObject
+    _tlv(0x0a, b'\x02'),  # scope: wholeSubtree
+    _tlv(0x0a, b'\x00'),  # derefAliases: never
+    _tlv(0x02, b'\x00'),  # sizeLimit
+    _tlv(0x02, b'\x00'),  # timeLimit
+    _tlv(0x01, b'\x00'),  # typesOnly
+    _tlv(0x87, b'objectClass'),  # filter: present
+    _tlv(0x30, _tlv(0x04, b'cn') + _tlv(0x04, b'mail')),  # attributes
+])))
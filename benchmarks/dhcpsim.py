@@ -0,0 +1,451 @@
+import logging
+from argparse import ArgumentParser
+from collections import deque
+from heapq import heappush, heappop
+from ipaddress import ip_address, ip_network
+from itertools import count
+from json import dumps
+from platform import platform, python_version
+from random import Random
+from select import select
+from socket import socketpair, AF_UNIX, SOCK_DGRAM, MSG_DONTWAIT
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep, time
+
+from RawPacket import MAC_Address
+from .harness import percentile, rss_kb, save
+from .services import dhcp_frame, dhcp_reply, DHCP_SERVER_IP, DHCP_SERVER_MAC
+
+# Offline load simulator and conformance check for the DHCP server.
+#
+#   python -m benchmarks.dhcpsim                       2000 clients against a /16
+#   python -m benchmarks.dhcpsim --clients 20000 --rate 5000 --threaded
+#   python -m benchmarks.dhcpsim --output sim.json
+#
+# Virtual clients go through DISCOVER, REQUEST, RENEW and RELEASE against a
+# RawServer in this process, over the socketpair stand in for its raw socket.
+# Lease times are compressed to --renew-after and --hold seconds.
+#
+# Every reply is checked as it comes in, and the server's lease table and
+# pool are checked once every client has let its address go. The exit
+# status is 1 when any check failed.
+
+NETWORK = '10.0.0.0'
+MASK = '255.255.0.0'
+
+# Client states
+STARTING = 'starting'
+SELECTING = 'selecting'
+REQUESTING = 'requesting'
+BOUND = 'bound'
+RENEWING = 'renewing'
+DONE = 'done'
+
+
+class VirtualClient(object):
+    __slots__ = ('mac', 'state', 'xid', 'token', 'frame', 'sent', 'attempts', 'started', 'offered', 'ip', 'renewals')
+
+    def __init__(self, mac):
+        self.mac = mac
+        self.state = STARTING
+        self.xid = 0
+        self.token = 0  # Tells the timer of the request in flight apart from older ones
+        self.frame = b''  # Last request sent, resent as is on a timeout
+        self.sent = 0.0  # perf_counter() the request was first sent
+        self.attempts = 0
+        self.started = 0.0  # perf_counter() of the DISCOVER
+        self.offered = None
+        self.ip = None
+        self.renewals = 0
+
+
+class Simulation(object):
+    def __init__(self, server, sock, clients=2000, rate=0.0, concurrency=64, renew_after=0.5, renewals=1,
+                 hold=0.5, timeout=0.5, attempts=4, seed=0):
+        """
+        :param server: RawServer: Server under test, in this process
+        :param sock: socket: Client end of the server's stand in socket
+        :param clients: int: Number of virtual clients
+        :param rate: float: Clients arriving per second, 0 for as fast as <concurrency> allows
+        :param concurrency: int: Clients getting an address at once
+        :param renew_after: float: Seconds a client is bound before it renews (T1)
+        :param renewals: int: Renewals of each client before it releases its address
+        :param hold: float: Seconds after the last renewal before the client releases
+        :param timeout: float: Seconds before a request is sent again
+        :param attempts: int: Times a request is sent before the client gives up
+        :param seed: int: Seed of the arrival and timing jitter
+        """
+        from Services.DHCP import Options
+        from Services.DHCP.Packet import DHCPPacket
+
+        self.Options = Options
+        self.DHCPPacket = DHCPPacket
+
+        self.server = server
+        self.sock = sock
+        self.concurrency = concurrency
+        self.renew_after = renew_after
+        self.renewals = renewals
+        self.hold = hold
+        self.timeout = timeout
+        self.attempts = attempts
+
+        self.network = ip_network(f'{NETWORK}/{MASK}')
+        self.server_ip = ip_address(DHCP_SERVER_IP)
+        self.random = Random(seed)
+        self.xids = count(self.random.getrandbits(31))
+
+        base = 0x02 << 40
+        self.clients = [VirtualClient(MAC_Address(base | index)) for index in range(clients)]
+
+        # Arrival times, Poisson when a rate is given
+        arrival = 0.0
+        self.arrivals = list()
+        for client in self.clients:
+            if rate:
+                arrival = arrival + self.random.expovariate(rate)
+            self.arrivals.append(arrival)
+        self.arrivals.reverse()
+        self.waiting = list(reversed(self.clients))
+
+        self.timers = list()  # Heap of (perf_counter() due, token, client)
+        self._sequence = count()
+        self.pending = dict()  # Keys will be the XID of a request waiting on its reply
+        # Frames not sent yet. Sends never block, a full link would otherwise deadlock with the
+        # server blocked sending replies nobody is reading.
+        self.outbox = deque()
+        self.active = 0  # Clients between DISCOVER and ACK
+        self.holders = dict()  # Keys will be a bound address, values the client holding it
+
+        # Addresses in use before any client showed up, IE: the server's own
+        self.baseline = {scope.network: scope.statistics()['used'] for scope in server.scopes}
+
+        self.allocation = list()  # Seconds from DISCOVER to ACK
+        self.exchange = list()  # Seconds from first sending a request to its reply
+        self.leases = 0
+        self.begin = 0.0  # perf_counter() of the first DISCOVER
+        self.last_lease = 0.0  # perf_counter() of the last ACK of a new lease
+        self.renewed = 0
+        self.released = 0
+        self.naks = 0
+        self.retransmits = 0
+        self.failed = 0
+        self.violations = list()
+
+    # ----------------------------------------------------------------------
+
+    def violation(self, text):
+        self.violations.append(text)
+
+    def schedule(self, delay, client):
+        client.token = next(self._sequence)
+        heappush(self.timers, (perf_counter() + delay, client.token, client))
+
+    def jitter(self, seconds):
+        return seconds * self.random.uniform(0.5, 1.5)
+
+    def send(self, client, message_type, options=(), ciaddr=0, xid=None):
+        # A REQUEST for an offer goes out with the XID of the DISCOVER (RFC 2131 4.4.1)
+        client.xid = next(self.xids) & 0xffffffff if xid is None else xid
+        packet = self.DHCPPacket(xid=client.xid, _ciaddr=ciaddr, _chaddr=client.mac)
+        packet.options.extend([self.Options.DHCPMessageType(message_type), *options, self.Options.End()])
+
+        client.frame = dhcp_frame(client.mac, packet)
+        client.attempts = 1
+        client.sent = perf_counter()
+        self.pending[client.xid] = client
+        self.outbox.append(client.frame)
+        self.schedule(self.timeout, client)
+
+    def discover(self, client):
+        client.state = SELECTING
+        client.started = perf_counter()
+        self.active = self.active + 1
+        self.send(client, 1)
+
+    def release(self, client):
+        # No reply to a RELEASE, the client is done once it's sent
+        packet = self.DHCPPacket(xid=next(self.xids) & 0xffffffff, _ciaddr=client.ip, _chaddr=client.mac)
+        packet.options.extend([self.Options.DHCPMessageType(7), self.Options.DHCPServerID(self.server_ip),
+                               self.Options.End()])
+        self.outbox.append(dhcp_frame(client.mac, packet))
+
+        if self.holders.get(client.ip) is client:
+            del self.holders[client.ip]
+        client.state = DONE
+        self.released = self.released + 1
+
+    # ----------------------------------------------------------------------
+
+    def receive(self, frame):
+        reply = dhcp_reply(frame)
+        client = self.pending.pop(reply.xid, None)
+        if client is None:
+            # Answer to a retransmit that was already answered
+            return
+
+        message_type = reply.message_type
+        if client.state == REQUESTING and message_type == 2:
+            # Late OFFER to a retransmitted DISCOVER, the REQUEST shares its XID
+            self.pending[reply.xid] = client
+            return
+
+        now = perf_counter()
+        self.exchange.append(now - client.sent)
+
+        if reply.chaddr != client.mac:
+            self.violation(f'{client.mac}: reply for {reply.chaddr}')
+
+        if message_type == 6:
+            # DHCPNAK, start over
+            self.naks = self.naks + 1
+            if client.state == RENEWING and self.holders.get(client.ip) is client:
+                del self.holders[client.ip]
+            elif client.state != RENEWING:
+                self.active = self.active - 1
+            client.ip = None
+            self.discover(client)
+            return
+
+        if client.state == SELECTING:
+            if message_type != 2:
+                self.violation(f'{client.mac}: DHCP message type {message_type} in reply to DISCOVER')
+            client.offered = reply.yiaddr
+            client.state = REQUESTING
+            self.send(client, 3, [self.Options.RequestedIP(reply.yiaddr), self.Options.DHCPServerID(self.server_ip)],
+                      xid=client.xid)
+
+        elif client.state == REQUESTING:
+            self.active = self.active - 1
+            self.allocation.append(now - client.started)
+            self.leases = self.leases + 1
+            self.last_lease = now
+            self.bound(client, reply, client.offered, 'offer')
+
+        elif client.state == RENEWING:
+            self.renewed = self.renewed + 1
+            client.renewals = client.renewals + 1
+            self.bound(client, reply, client.ip, 'lease')
+
+    def bound(self, client, reply, expected, what):
+        ip = reply.yiaddr
+        if reply.message_type != 5:
+            self.violation(f'{client.mac}: DHCP message type {reply.message_type} in reply to REQUEST')
+        if ip != expected:
+            self.violation(f'{client.mac}: ACK for {ip} but the {what} was {expected}')
+        if ip not in self.network or ip == self.network.network_address or ip == self.network.broadcast_address:
+            self.violation(f'{client.mac}: {ip} is not a host address of {self.network}')
+
+        holder = self.holders.get(ip)
+        if holder is not None and holder is not client:
+            self.violation(f'{ip} given to {client.mac} while {holder.mac} holds it')
+        self.holders[ip] = client
+
+        # The lease table has to agree with what the client was told
+        lease = self.server.leases.get(client.mac, b'')
+        if lease is None or lease.ip != ip:
+            self.violation(f'{client.mac}: server lease {lease} does not match {ip}')
+
+        client.ip = ip
+        client.state = BOUND
+        if client.renewals < self.renewals:
+            self.schedule(self.jitter(self.renew_after), client)
+        else:
+            self.schedule(self.jitter(self.hold), client)
+
+    def expire(self, client, token):
+        if client.state == BOUND:
+            if client.renewals < self.renewals:
+                client.state = RENEWING
+                self.send(client, 3, ciaddr=client.ip)
+            else:
+                self.release(client)
+            return
+
+        xid = client.xid
+        if token != client.token or xid not in self.pending:
+            # Timer of a request that has been answered
+            return
+
+        if client.attempts >= self.attempts:
+            del self.pending[xid]
+            self.failed = self.failed + 1
+            if client.state != RENEWING:
+                self.active = self.active - 1
+            elif self.holders.get(client.ip) is client:
+                del self.holders[client.ip]
+            client.state = DONE
+            return
+
+        client.attempts = client.attempts + 1
+        self.retransmits = self.retransmits + 1
+        self.outbox.append(client.frame)
+        self.schedule(self.timeout * client.attempts, client)
+
+    # ----------------------------------------------------------------------
+
+    def run(self, limit=600.0):
+        """
+        :param limit: float: Seconds the simulation may take before clients still going are left
+        :return: float: Seconds from the first DISCOVER to the last client finishing
+        """
+        self.begin = begin = perf_counter()
+        end = begin + limit
+        finished = 0
+
+        while finished < len(self.clients) or self.outbox:
+            now = perf_counter()
+            if now >= end:
+                self.violation(f'{len(self.clients) - finished} clients still running after {limit} seconds')
+                break
+
+            # New clients, as long as the arrival time has passed and there's room
+            while self.waiting and self.active < self.concurrency and self.arrivals[-1] <= now - begin:
+                self.arrivals.pop()
+                self.discover(self.waiting.pop())
+
+            wait = 0.05
+            if self.timers:
+                wait = max(0.0, min(wait, self.timers[0][0] - now))
+            if self.waiting and self.active < self.concurrency:
+                wait = max(0.0, min(wait, self.arrivals[-1] - (now - begin)))
+
+            if self.outbox:
+                self.flush()
+            readable, _, _ = select([self.sock], [self.sock] if self.outbox else [], [], wait)
+            while readable:
+                try:
+                    frame = self.sock.recv(65536, MSG_DONTWAIT)
+                except BlockingIOError:
+                    break
+                self.receive(frame)
+
+            now = perf_counter()
+            while self.timers and self.timers[0][0] <= now:
+                _, token, client = heappop(self.timers)
+                if client.state != DONE:
+                    self.expire(client, token)
+                    if client.state == DONE:
+                        finished = finished + 1
+
+        return perf_counter() - begin
+
+    def flush(self):
+        while self.outbox:
+            try:
+                self.sock.send(self.outbox[0], MSG_DONTWAIT)
+            except BlockingIOError:
+                return
+            self.outbox.popleft()
+
+    def check_server(self, settle=2.0):
+        # Once every client has released its address the server should hold none
+        deadline = perf_counter() + settle
+        while len(self.server.leases) and perf_counter() < deadline:
+            sleep(0.01)
+
+        if len(self.server.leases):
+            self.violation(f'{len(self.server.leases)} leases left after every client released')
+
+        for scope in self.server.scopes:
+            used = scope.statistics()['used'] - self.baseline.get(scope.network, 0)
+            if used:
+                self.violation(f'{used} addresses of {scope.network} not back in the pool')
+
+    def report(self, seconds):
+        allocation = sorted(self.allocation)
+        exchange = sorted(self.exchange)
+        # Leases per second over the time clients were getting them, not counting the final holds
+        granting = self.last_lease - self.begin
+
+        return {
+            'clients': len(self.clients),
+            'seconds': seconds,
+            'leases': self.leases,
+            'leases_per_sec': self.leases / granting if granting > 0 else 0.0,
+            'renewals': self.renewed,
+            'releases': self.released,
+            'naks': self.naks,
+            'retransmits': self.retransmits,
+            'failed': self.failed,
+            'allocation_p50_ms': percentile(allocation, 0.50) * 1000,
+            'allocation_p90_ms': percentile(allocation, 0.90) * 1000,
+            'allocation_p99_ms': percentile(allocation, 0.99) * 1000,
+            'allocation_max_ms': allocation[-1] * 1000 if allocation else 0.0,
+            'exchange_p50_ms': percentile(exchange, 0.50) * 1000,
+            'exchange_p99_ms': percentile(exchange, 0.99) * 1000,
+            'rss_kb': rss_kb(),
+            'violations': len(self.violations),
+            'violation_samples': self.violations[:20],
+        }
+
+
+def run(clients=2000, rate=0.0, concurrency=64, renew_after=0.5, renewals=1, hold=0.5, timeout=0.5,
+        attempts=4, seed=0, threaded=False, limit=600.0):
+    from Services.DHCP import RawServer
+
+    # The server logs every request at INFO level, which would dominate the measurements.
+    logging.disable(logging.INFO)
+
+    report = {
+        'meta': {
+            'timestamp': time(),
+            'python': python_version(),
+            'platform': platform(),
+            'clients': clients,
+            'rate': rate,
+            'concurrency': concurrency,
+            'threaded': threaded,
+            'seed': seed,
+        },
+        'results': dict(),
+    }
+
+    with TemporaryDirectory() as root:
+        server_end, client_end = socketpair(AF_UNIX, SOCK_DGRAM)
+        server = RawServer('sim0', sock=server_end, mac_address=DHCP_SERVER_MAC, server_ip=DHCP_SERVER_IP,
+                           network=NETWORK, mask=MASK, threaded=threaded, savefile=f'{root}/dhcp.json')
+        server.start()
+        try:
+            simulation = Simulation(server, client_end, clients, rate, concurrency, renew_after, renewals,
+                                    hold, timeout, attempts, seed)
+            seconds = simulation.run(limit)
+            simulation.check_server()
+        finally:
+            server.shutdown()
+            client_end.close()
+
+    report['results']['dhcpsim'] = simulation.report(seconds)
+    return report, simulation.violations
+
+
+def main():
+    parser = ArgumentParser(prog='python -m benchmarks.dhcpsim', description='Offline DHCP load simulator')
+    parser.add_argument('--clients', type=int, default=2000, help='Number of virtual clients')
+    parser.add_argument('--rate', type=float, default=0.0, help='Clients arriving per second, 0 for no limit')
+    parser.add_argument('--concurrency', type=int, default=64, help='Clients getting an address at once')
+    parser.add_argument('--renew-after', type=float, default=0.5, help='Seconds bound before renewing')
+    parser.add_argument('--renewals', type=int, default=1, help='Renewals before releasing')
+    parser.add_argument('--hold', type=float, default=0.5, help='Seconds after the last renewal before releasing')
+    parser.add_argument('--timeout', type=float, default=0.5, help='Seconds before a request is sent again')
+    parser.add_argument('--attempts', type=int, default=4, help='Times a request is sent before giving up')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the arrival and timing jitter')
+    parser.add_argument('--threaded', action='store_true', help='Handle every request in a thread of its own')
+    parser.add_argument('--limit', type=float, default=600.0, help='Seconds before the simulation is cut short')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report, violations = run(args.clients, args.rate, args.concurrency, args.renew_after, args.renewals,
+                             args.hold, args.timeout, args.attempts, args.seed, args.threaded, args.limit)
+
+    print(dumps(report, indent=2))
+    if args.output:
+        save(report, args.output)
+
+    for violation in violations:
+        print(f'VIOLATION {violation}')
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,253 @@
+import logging
+from array import array
+from json import load, dump
+from multiprocessing import get_context
+from os import sysconf
+from platform import platform, python_version
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep, time
+
+
+# --------------------------------------------------
+# Load generation
+#
+# Every benchmark runs its server in this process and
+# drives it from forked worker processes.
+# --------------------------------------------------
+
+
+class ServiceBenchmark(object):
+    name = ''
+    # Number of load processes. None uses the number given to the harness.
+    processes = None
+
+    server = None
+
+    def start(self, root):
+        """
+        Start the server on loopback
+
+        :param root: str: Temporary directory the server may write to
+        :return: Context handed to every worker's client
+        """
+        pass
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @staticmethod
+    def client(context):
+        """
+        Called once in every worker process
+
+        :param context: Value returned by start
+        :return: Callable that performs a single request against the server
+        """
+        pass
+
+
+def worker(client, context, duration, warmup, go, queue):
+    latencies = array('d')
+    ops = 0
+    errors = 0
+
+    try:
+        op = client(context)
+    except Exception:
+        queue.put((ops, 1, latencies.tobytes()))
+        return
+
+    go.wait()
+
+    now = perf_counter()
+    begin = now + warmup
+    end = begin + duration
+
+    while now < end:
+        try:
+            op()
+            failed = False
+        except Exception:
+            failed = True
+
+        after = perf_counter()
+        if now >= begin:
+            if failed:
+                errors = errors + 1
+            else:
+                ops = ops + 1
+                latencies.append(after - now)
+
+        if failed:
+            try:
+                # Connections are likely broken, start over with a new client.
+                op = client(context)
+            except Exception:
+                sleep(0.01)
+
+        now = perf_counter()
+
+    queue.put((ops, errors, latencies.tobytes()))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return getrusage(RUSAGE_SELF).ru_maxrss
+
+
+def run_benchmark(bench, duration=5.0, processes=2, warmup=1.0):
+    """
+    Run a single service benchmark
+
+    :param bench: ServiceBenchmark: Benchmark to run
+    :param duration: float: Seconds of measured load
+    :param processes: int: Number of load processes
+    :param warmup: float: Seconds of load before measuring starts
+    :return: dict
+    """
+    ctx = get_context('fork')
+    processes = bench.processes or processes
+
+    with TemporaryDirectory() as root:
+        context = bench.start(root)
+        try:
+            go = ctx.Event()
+            queue = ctx.Queue()
+            workers = [ctx.Process(target=worker, args=(bench.client, context, duration, warmup, go, queue),
+                                   daemon=True) for _ in range(processes)]
+            for process in workers:
+                process.start()
+
+            go.set()
+            sleep(warmup)
+
+            usage = getrusage(RUSAGE_SELF)
+            wall = perf_counter()
+
+            results = [queue.get(timeout=duration + warmup + 30) for _ in workers]
+
+            wall = perf_counter() - wall
+            after = getrusage(RUSAGE_SELF)
+
+            for process in workers:
+                process.join(5)
+        finally:
+            bench.stop()
+
+    ops = 0
+    errors = 0
+    latencies = array('d')
+    for worker_ops, worker_errors, worker_latencies in results:
+        ops = ops + worker_ops
+        errors = errors + worker_errors
+        latencies.frombytes(worker_latencies)
+
+    latencies = sorted(latencies)
+    cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+
+    return {
+        'processes': processes,
+        'ops': ops,
+        'errors': errors,
+        'throughput': ops / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'cpu_s': cpu,
+        'cpu_percent': 100 * cpu / wall if wall else 0.0,
+        'rss_kb': rss_kb(),
+    }
+
+
+def run(benchmarks, duration=5.0, processes=2, warmup=1.0):
+    """
+    Run a list of service benchmarks
+
+    :param benchmarks: list: ServiceBenchmark classes
+    :return: dict: JSON serializable report
+    """
+    # Services log every request at INFO level, which would dominate the measurements.
+    logging.disable(logging.INFO)
+
+    report = {
+        'meta': {
+            'timestamp': time(),
+            'python': python_version(),
+            'platform': platform(),
+            'duration': duration,
+            'warmup': warmup,
+            'processes': processes,
+        },
+        'results': dict(),
+    }
+
+    for bench in benchmarks:
+        bench = bench()
+        try:
+            report['results'][bench.name] = run_benchmark(bench, duration, processes, warmup)
+        except Exception as e:
+            report['results'][bench.name] = {'error': f'{e.__class__.__name__}: {e}'}
+
+    return report
+
+
+# --------------------------------------------------
+# Reporting
+#
+#
+# --------------------------------------------------
+
+
+def save(report, file):
+    with open(file, 'w') as fd:
+        dump(report, fd, indent=2)
+
+
+def load_report(file):
+    with open(file, 'r') as fd:
+        return load(fd)
+
+
+def compare(report, baseline, tolerance=0.10):
+    """
+    Compare a report against a stored baseline
+
+    :param report: dict: Report from run
+    :param baseline: dict: Report to compare against
+    :param tolerance: float: Allowed relative change before a result counts as a regression
+    :return: list: Descriptions of every regression found
+    """
+    regressions = list()
+
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if not base or 'error' in base:
+            continue
+
+        if 'error' in result:
+            regressions.append(f'{name}: failed ({result["error"]})')
+            continue
+
+        if base['throughput'] and result['throughput'] < base['throughput'] * (1 - tolerance):
+            change = result['throughput'] / base['throughput'] - 1
+            regressions.append(f'{name}: throughput {change:+.1%} '
+                               f'({base["throughput"]:.0f} -> {result["throughput"]:.0f} ops/s)')
+
+        if base['p99_ms'] and result['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            change = result['p99_ms'] / base['p99_ms'] - 1
+            regressions.append(f'{name}: p99 latency {change:+.1%} '
+                               f'({base["p99_ms"]:.3f} -> {result["p99_ms"]:.3f} ms)')
+
+    return regressions
@@ -0,0 +1,124 @@
+import subprocess
+import sys
+from argparse import ArgumentParser
+from json import dumps
+from os import path
+from platform import platform, python_version
+from statistics import median
+from time import time
+
+from .harness import save, load_report
+
+# Import time of the packages, measured in a fresh interpreter per sample.
+#
+#   python -m benchmarks.imports                  Measure every module
+#   python -m benchmarks.imports Services.DHCP    Measure only the named modules
+#   python -m benchmarks.imports --save-baseline  Store the report as the new baseline
+
+BASELINE = path.join(path.dirname(__file__), 'imports_baseline.json')
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+MODULES = (
+    'BaseServers',
+    'RawPacket',
+    'Encodings.ASN1',
+    'Services.Chargen',
+    'Services.Daytime',
+    'Services.Discard',
+    'Services.Echo',
+    'Services.QOTD',
+    'Services.DHCP',
+    'Services.DHCP.Pool',
+    'Services.DHCP.Options',
+    'Services.DHCP.Server',
+    'Services.DNS',
+    'Services.DNS.Server',
+    'Services.FTP',
+    'Services.FTP.Server',
+)
+
+
+def import_time(module):
+    """
+    Import a module in a new interpreter
+
+    :param module: str: Name of the module
+    :return: float: Cumulative import time of the module in milliseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+
+    # The module asked for is the last one to finish importing.
+    # Lines are "import time: self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        if line.rstrip().endswith(f'| {module}'):
+            return int(line.split('|')[1]) / 1000
+
+    raise ValueError(f'No import time reported for {module}')
+
+
+def run(modules=MODULES, samples=7):
+    report = {
+        'meta': {
+            'timestamp': time(),
+            'python': python_version(),
+            'platform': platform(),
+            'samples': samples,
+        },
+        'results': dict(),
+    }
+
+    for module in modules:
+        # First import writes the bytecode cache, don't count it.
+        import_time(module)
+        timings = [import_time(module) for _ in range(samples)]
+        report['results'][module] = {
+            'median_ms': median(timings),
+            'min_ms': min(timings),
+        }
+
+    return report
+
+
+def compare(report, baseline, tolerance=0.25):
+    regressions = list()
+
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base and result['min_ms'] > base['min_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: {base["min_ms"]:.1f} -> {result["min_ms"]:.1f} ms')
+
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(prog='python -m benchmarks.imports', description='Import time benchmarks')
+    parser.add_argument('modules', nargs='*', help='Modules to measure. Defaults to all of them.')
+    parser.add_argument('--samples', type=int, default=7, help='Number of interpreters started per module')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative change')
+    args = parser.parse_args()
+
+    report = run(args.modules or MODULES, args.samples)
+
+    print(dumps(report, indent=2))
+    if args.output:
+        save(report, args.output)
+
+    status = 0
+    if path.exists(args.baseline) and not args.save_baseline:
+        regressions = compare(report, load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        save(report, args.baseline)
+
+    return status
+
+
+if __name__ == '__main__':
+    exit(main())
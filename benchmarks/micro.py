@@ -0,0 +1,186 @@
+import tracemalloc
+from argparse import ArgumentParser
+from json import dumps
+from os import path
+from platform import platform, python_version
+from statistics import mean, stdev
+from sys import getallocatedblocks
+from time import perf_counter, time
+
+from . import corpus
+from .harness import save, load_report
+
+# Micro benchmarks for the pure codecs on the packet hot paths.
+#
+#   python -m benchmarks.micro                  Run everything and print the report
+#   python -m benchmarks.micro dhcp.disassemble Run only the named benchmarks
+#   python -m benchmarks.micro --save-baseline  Store the report as the new baseline
+#
+# Like pyperf, each benchmark is calibrated to a number of loops that
+# takes at least <min_time> seconds and then timed over several runs.
+
+BASELINE = path.join(path.dirname(__file__), 'micro_baseline.json')
+
+
+def codecs():
+    """
+    Build the benchmarked calls
+
+    :return: dict: Keys will be the benchmark name, values a callable taking no arguments
+    """
+    from Encodings.ASN1 import decode_bytes
+    from RawPacket import Ethernet, BasePacket
+    from Services.DHCP.Options import BaseOption
+    from Services.DHCP.Packet import DHCPPacket
+    from Services.DNS.Classes import Packet, unpack_name
+
+    frame = Ethernet.disassemble(corpus.DHCP_FRAME)
+    dhcp = DHCPPacket.disassemble(corpus.DHCP_PAYLOAD)
+    dns = Packet.from_bytes(corpus.DNS_RESPONSE)
+    options = corpus.DHCP_PAYLOAD[240:]
+
+    return {
+        'ethernet.disassemble': lambda: Ethernet.disassemble(corpus.DHCP_FRAME),
+        'ethernet.build': frame.build,
+        'checksum': lambda: BasePacket._calc_compliment_(frame, corpus.CHECKSUM_DATA),
+        'dhcp.disassemble': lambda: DHCPPacket.disassemble(corpus.DHCP_PAYLOAD),
+        'dhcp.build': dhcp.build,
+        'dhcp.options.unpack': lambda: BaseOption.unpack(options),
+        'dns.from_bytes': lambda: Packet.from_bytes(corpus.DNS_RESPONSE),
+        'dns.to_bytes': dns.to_bytes,
+        'dns.unpack_name': lambda: unpack_name(corpus.DNS_NAME, return_unused=True),
+        'ber.decode_bytes': lambda: decode_bytes(corpus.LDAP_SEARCH),
+    }
+
+
+def calibrate(func, min_time):
+    loops = 1
+    while True:
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        if perf_counter() - start >= min_time:
+            return loops
+        loops = loops * 2
+
+
+def allocations(func, loops=1000):
+    """
+    Memory behaviour of a single call
+
+    :return: tuple: Peak bytes allocated during one call, blocks still allocated per call afterwards
+    """
+    func()  # Make sure caches and lazy imports are already in place.
+
+    blocks = getallocatedblocks()
+    for _ in range(loops):
+        func()
+    retained = (getallocatedblocks() - blocks) / loops
+
+    tracemalloc.start()
+    try:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak - current, retained
+
+
+def bench(func, runs=10, min_time=0.1):
+    loops = calibrate(func, min_time)
+
+    timings = list()
+    for _ in range(runs):
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((perf_counter() - start) / loops)
+
+    peak, retained = allocations(func)
+
+    return {
+        'loops': loops,
+        'runs': runs,
+        'mean_ns': mean(timings) * 1e9,
+        'stdev_ns': stdev(timings) * 1e9,
+        'ops_per_sec': 1 / mean(timings),
+        'peak_bytes_per_op': peak,
+        'retained_blocks_per_op': retained,
+    }
+
+
+def run(names=(), runs=10, min_time=0.1):
+    report = {
+        'meta': {
+            'timestamp': time(),
+            'python': python_version(),
+            'platform': platform(),
+            'runs': runs,
+            'min_time': min_time,
+        },
+        'results': dict(),
+    }
+
+    for name, func in codecs().items():
+        if names and name not in names:
+            continue
+        report['results'][name] = bench(func, runs, min_time)
+
+    return report
+
+
+def compare(report, baseline, tolerance=0.10):
+    regressions = list()
+
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            change = result['ops_per_sec'] / base['ops_per_sec'] - 1
+            regressions.append(f'{name}: {change:+.1%} '
+                               f'({base["ops_per_sec"]:.0f} -> {result["ops_per_sec"]:.0f} ops/s)')
+
+        if result['peak_bytes_per_op'] > base['peak_bytes_per_op'] * (1 + tolerance):
+            regressions.append(f'{name}: peak memory per op '
+                               f'{base["peak_bytes_per_op"]} -> {result["peak_bytes_per_op"]} bytes')
+
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(prog='python -m benchmarks.micro', description='Codec micro benchmarks')
+    parser.add_argument('names', nargs='*', help='Benchmarks to run. Defaults to all of them.')
+    parser.add_argument('--runs', type=int, default=10, help='Number of timed runs per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.1, help='Minimum seconds per run')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative change')
+    args = parser.parse_args()
+
+    report = run(args.names, args.runs, args.min_time)
+
+    print(dumps(report, indent=2))
+    if args.output:
+        save(report, args.output)
+
+    status = 0
+    if path.exists(args.baseline) and not args.save_baseline:
+        regressions = compare(report, load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        save(report, args.baseline)
+
+    return status
+
+
+if __name__ == '__main__':
+    exit(main())
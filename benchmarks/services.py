@@ -0,0 +1,418 @@
+from ipaddress import ip_address
+from itertools import count
+from os import getpid, urandom
+from socket import socket, socketpair, create_connection, AF_INET, AF_UNIX, SOCK_DGRAM
+from struct import pack, unpack
+
+from RawPacket import Ethernet, IPv4, UDP, MAC_Address
+from .harness import ServiceBenchmark
+
+LOCALHOST = '127.0.0.1'
+TIMEOUT = 1
+
+
+# --------------------------------------------------
+# Client helpers
+#
+#
+# --------------------------------------------------
+
+
+def udp_client(context, message=b''):
+    address = context
+    sock = socket(AF_INET, SOCK_DGRAM)
+    sock.settimeout(TIMEOUT)
+
+    def op():
+        sock.sendto(message, address)
+        sock.recvfrom(65536)
+
+    return op
+
+
+def recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionResetError
+        data = data + chunk
+    return data
+
+
+def connect_and_read(context):
+    # For services that send a single response and hang up.
+    address = context
+
+    def op():
+        with create_connection(address, TIMEOUT) as sock:
+            sock.recv(1024)
+
+    return op
+
+
+# --------------------------------------------------
+# Simple services
+#
+#
+# --------------------------------------------------
+
+
+class EchoTCP(ServiceBenchmark):
+    name = 'echo_tcp'
+    message = bytes(64)
+
+    def start(self, root):
+        from Services.Echo import TCPServer
+        self.server = TCPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = create_connection(context, TIMEOUT)
+        message = EchoTCP.message
+
+        def op():
+            sock.send(message)
+            recv_exactly(sock, len(message))
+
+        return op
+
+
+class EchoUDP(ServiceBenchmark):
+    name = 'echo_udp'
+
+    def start(self, root):
+        from Services.Echo import UDPServer
+        self.server = UDPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return udp_client(context, bytes(64))
+
+
+class DiscardTCP(ServiceBenchmark):
+    name = 'discard_tcp'
+
+    def start(self, root):
+        from Services.Discard import TCPServer
+        self.server = TCPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = create_connection(context, TIMEOUT)
+        message = bytes(64)
+
+        def op():
+            sock.sendall(message)
+
+        return op
+
+
+class DiscardUDP(ServiceBenchmark):
+    name = 'discard_udp'
+
+    def start(self, root):
+        from Services.Discard import UDPServer
+        self.server = UDPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = socket(AF_INET, SOCK_DGRAM)
+        message = bytes(64)
+
+        def op():
+            sock.sendto(message, context)
+
+        return op
+
+
+class ChargenTCP(ServiceBenchmark):
+    name = 'chargen_tcp'
+
+    def start(self, root):
+        from Services.Chargen import TCPServer
+        self.server = TCPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = create_connection(context, TIMEOUT)
+
+        def op():
+            if not sock.recv(4096):
+                raise ConnectionResetError
+
+        return op
+
+
+class ChargenUDP(ServiceBenchmark):
+    name = 'chargen_udp'
+
+    def start(self, root):
+        from Services.Chargen import UDPServer
+        self.server = UDPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return udp_client(context)
+
+
+class QOTDTCP(ServiceBenchmark):
+    name = 'qotd_tcp'
+
+    def start(self, root):
+        from Services.QOTD import TCPServer
+        self.server = TCPServer(LOCALHOST, b'Benchmarks are the quote of the day.', port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return connect_and_read(context)
+
+
+class QOTDUDP(ServiceBenchmark):
+    name = 'qotd_udp'
+
+    def start(self, root):
+        from Services.QOTD import UDPServer
+        self.server = UDPServer(LOCALHOST, b'Benchmarks are the quote of the day.', port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return udp_client(context)
+
+
+class DaytimeTCP(ServiceBenchmark):
+    name = 'daytime_tcp'
+
+    def start(self, root):
+        from Services.Daytime import TCPServer
+        self.server = TCPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return connect_and_read(context)
+
+
+class DaytimeUDP(ServiceBenchmark):
+    name = 'daytime_udp'
+
+    def start(self, root):
+        from Services.Daytime import UDPServer
+        self.server = UDPServer(LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        return udp_client(context)
+
+
+# --------------------------------------------------
+# DNS
+#
+# Queries are answered from local records so
+# no upstream servers are contacted.
+# --------------------------------------------------
+
+
+DNS_NAME = 'bench.example'
+
+
+def dns_storage():
+    from Services.DNS.Classes import ResourceRecord, Type, Class
+    from Services.DNS.Storage import DictStorage
+
+    storage = DictStorage()
+    storage.add_record(ResourceRecord(DNS_NAME, Type.A, Class.IN, 300, 4, ip_address('192.0.2.1').packed))
+    return storage
+
+
+def dns_query():
+    from Services.DNS.Classes import Packet, Query, Type, Class
+
+    return Packet(0, 0, questions=[Query(DNS_NAME, Type.A, Class.IN)])
+
+
+class DNSUDP(ServiceBenchmark):
+    name = 'dns_udp'
+
+    def start(self, root):
+        from Services.DNS import UDPServer
+        self.server = UDPServer(dns_storage(), ip=LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = socket(AF_INET, SOCK_DGRAM)
+        sock.settimeout(TIMEOUT)
+        packet = dns_query()
+        ids = count(getpid())
+
+        def op():
+            packet.identification = next(ids) & 0xffff
+            sock.sendto(packet.to_bytes(), context)
+            data, _ = sock.recvfrom(65536)
+            if unpack('! H', data[:2])[0] != packet.identification:
+                raise ValueError('Response for another query')
+
+        return op
+
+
+class DNSTCP(ServiceBenchmark):
+    name = 'dns_tcp'
+
+    def start(self, root):
+        from Services.DNS import TCPServer
+        self.server = TCPServer(dns_storage(), ip=LOCALHOST, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        data = dns_query().to_bytes()
+        message = pack('! H', len(data)) + data
+
+        def op():
+            with create_connection(context, TIMEOUT) as sock:
+                sock.sendall(message)
+                size = unpack('! H', recv_exactly(sock, 2))[0]
+                recv_exactly(sock, size)
+
+        return op
+
+
+# --------------------------------------------------
+# FTP
+#
+#
+# --------------------------------------------------
+
+
+class FTP(ServiceBenchmark):
+    name = 'ftp'
+
+    def start(self, root):
+        from Services.FTP import TCPServer
+        self.server = TCPServer(LOCALHOST, public=True, req_pass=False, root_dir=root, port=0)
+        self.server.start()
+        return self.server.server_address
+
+    @staticmethod
+    def client(context):
+        sock = create_connection(context, TIMEOUT)
+        reader = sock.makefile('r')
+        reader.readline()  # 220 Service ready.
+
+        sock.sendall(b'USER anonymous\r\n')
+        reader.readline()
+
+        def op():
+            sock.sendall(b'NOOP\r\n')
+            if not reader.readline().startswith('200'):
+                raise ValueError('Unexpected response to NOOP')
+
+        return op
+
+
+# --------------------------------------------------
+# DHCP
+#
+# The server's raw socket is replaced by one end of a
+# socketpair. The load process writes client frames to
+# the other end, like a host on the far side of a veth pair.
+# --------------------------------------------------
+
+
+DHCP_SERVER_IP = '10.0.0.1'
+DHCP_SERVER_MAC = '02:00:00:00:00:01'
+BROADCAST_MAC = MAC_Address('ff:ff:ff:ff:ff:ff')
+
+
+def dhcp_frame(mac, packet):
+    udp = UDP(68, 67, packet.build())
+    ip = IPv4(ip_address(0), ip_address('255.255.255.255'), udp)
+    eth = Ethernet(BROADCAST_MAC, mac, ip)
+    eth.calc_checksum()
+    return eth.build()
+
+
+def dhcp_reply(data):
+    from Services.DHCP.Packet import DHCPPacket
+
+    return DHCPPacket.disassemble(Ethernet.disassemble(data).payload.payload.payload)
+
+
+class DHCP(ServiceBenchmark):
+    name = 'dhcp'
+    # The stand in link is a single wire, replies can't be split between processes.
+    processes = 1
+
+    def start(self, root):
+        from Services.DHCP import RawServer
+
+        server_end, self.client_end = socketpair(AF_UNIX, SOCK_DGRAM)
+        self.server = RawServer('bench0', sock=server_end, mac_address=DHCP_SERVER_MAC,
+                                server_ip=DHCP_SERVER_IP, network='10.0.0.0', mask='255.255.0.0',
+                                offer_hold_time=1, savefile=f'{root}/dhcp.json')
+        self.server.start()
+        return self.client_end
+
+    def stop(self):
+        ServiceBenchmark.stop(self)
+        self.client_end.close()
+
+    @staticmethod
+    def client(context):
+        from Services.DHCP import Options
+        from Services.DHCP.Packet import DHCPPacket
+
+        sock = context
+        sock.settimeout(TIMEOUT)
+
+        # Cycle through a fixed set of clients so the pool never runs dry.
+        base = int.from_bytes(b'\x02' + urandom(3), 'big') << 16
+        clients = count()
+
+        def exchange(mac, packet):
+            sock.send(dhcp_frame(mac, packet))
+            while True:
+                reply = dhcp_reply(sock.recv(65536))
+                if reply.xid == packet.xid:
+                    return reply
+
+        def op():
+            mac = MAC_Address(base | (next(clients) % 1024))
+            xid = int.from_bytes(urandom(4), 'big')
+
+            discover = DHCPPacket(xid=xid, _chaddr=mac)
+            discover.options.extend([Options.DHCPMessageType(1), Options.End()])
+            offer = exchange(mac, discover)
+
+            request = DHCPPacket(xid=xid, _chaddr=mac)
+            request.options.extend([Options.DHCPMessageType(3), Options.RequestedIP(offer.yiaddr),
+                                    Options.DHCPServerID(DHCP_SERVER_IP), Options.End()])
+            exchange(mac, request)
+
+        return op
+
+
+BENCHMARKS = (EchoTCP, EchoUDP, DiscardTCP, DiscardUDP, ChargenTCP, ChargenUDP, QOTDTCP, QOTDUDP,
+              DaytimeTCP, DaytimeUDP, DNSUDP, DNSTCP, FTP, DHCP)
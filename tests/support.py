@@ -0,0 +1,71 @@
+import tempfile
+from socket import socketpair, AF_UNIX, SOCK_DGRAM
+
+from benchmarks.services import dhcp_frame, dhcp_reply, DHCP_SERVER_MAC, DHCP_SERVER_IP
+from RawPacket import MAC_Address
+from Services.DHCP import Options
+from Services.DHCP.Packet import DHCPPacket
+from Services.DHCP.Server import RawServer, RawHandler
+
+# Shared by the DHCP server tests. The server is driven in process, frames
+# go through one end of a socketpair and replies come out of the other.
+
+
+class DHCPTestServer(object):
+    def __init__(self, **kwargs):
+        """
+        :param kwargs: Passed on to RawServer, on top of a 10.0.0.0/24 network
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.sock, self.client = socketpair(AF_UNIX, SOCK_DGRAM)
+        self.client.settimeout(0.2)
+
+        options = {
+            'sock': self.sock,
+            'mac_address': DHCP_SERVER_MAC,
+            'server_ip': DHCP_SERVER_IP,
+            'network': '10.0.0.0',
+            'mask': '255.255.255.0',
+            'savefile': f'{self.directory.name}/dhcp.json',
+        }
+        options.update(kwargs)
+        self.server = RawServer('test0', **options)
+
+    def send(self, mac, *options, xid=1, ciaddr=0, giaddr=0):
+        """
+        Hand a packet from a client to the server
+
+        :param mac: MAC_Address: Client
+        :param options: Options of the packet, without End
+        :return: DHCPPacket: Reply of the server or None if it didn't answer
+        """
+        packet = DHCPPacket(xid=xid, _chaddr=mac, _ciaddr=ciaddr, _giaddr=giaddr)
+        packet.options.extend([*options, Options.End()])
+        RawHandler((dhcp_frame(mac, packet), self.sock), (None,), self.server)
+
+        try:
+            return dhcp_reply(self.client.recv(65536))
+        except OSError:
+            return None
+
+    def bind(self, mac, xid=1, *options):
+        """
+        DISCOVER then REQUEST
+
+        :return: DHCPPacket: The ACK
+        """
+        offer = self.send(mac, Options.DHCPMessageType(1), *options, xid=xid)
+        return self.send(mac, Options.DHCPMessageType(3), Options.RequestedIP(offer.yiaddr),
+                         Options.DHCPServerID(DHCP_SERVER_IP), *options, xid=xid)
+
+    def close(self):
+        self.server.gb.shutdown()
+        self.server.events.shutdown()
+        self.server.store.shutdown()
+        self.sock.close()
+        self.client.close()
+        self.directory.cleanup()
+
+
+def client_mac(number):
+    return MAC_Address(f'02:00:00:00:{number >> 8:02x}:{number & 0xff:02x}')
@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+
+from RawPacket import MAC_Address
+from Services.DHCP.ACL import MacACL
+from Services.DHCP.Pool import Pool
+
+MAC = MAC_Address('00:1a:2b:3c:4d:5e')
+SAME_OUI = MAC_Address('00:1a:2b:ff:ff:ff')
+OTHER = MAC_Address('00:1a:2c:3c:4d:5e')
+LOCAL = MAC_Address('02:00:00:00:00:01')
+
+
+class MacACLTest(unittest.TestCase):
+    def setUp(self):
+        self.acl = MacACL()
+
+    def test_parse(self):
+        self.assertEqual(MacACL.parse(MAC), (0x001a2b3c4d5e, (1 << 48) - 1))
+        self.assertEqual(MacACL.parse('00:1a:2b'), (0x001a2b000000, 0xffffff000000))
+        self.assertEqual(MacACL.parse('00-1a-2b'), MacACL.parse('00:1a:2b'))
+        self.assertEqual(MacACL.parse('00:1a:2b:3c:4d:5e/24'), (0x001a2b000000, 0xffffff000000))
+        self.assertEqual(MacACL.parse('02:00:00:00:00:00/02:00:00:00:00:00'), (0x020000000000, 0x020000000000))
+
+        for rule in ('', '00:1a:2b:3c:4d:5e:6f', 'zz:00'):
+            with self.assertRaises(ValueError):
+                MacACL.parse(rule)
+
+    def test_format(self):
+        for rule in ('00:1a:2b:3c:4d:5e', '00:1a:2b:00:00:00/24', '02:00:00:00:00:00/02:00:00:00:00:00'):
+            self.assertEqual(MacACL.format(*MacACL.parse(rule)), rule)
+
+    def test_exact(self):
+        self.acl.add(MAC)
+        self.assertIn(MAC, self.acl)
+        self.assertNotIn(SAME_OUI, self.acl)
+
+    def test_oui(self):
+        self.acl.add('00:1a:2b')
+        self.assertIn(MAC, self.acl)
+        self.assertIn(SAME_OUI, self.acl)
+        self.assertNotIn(OTHER, self.acl)
+
+    def test_mask(self):
+        # Locally administered addresses
+        self.acl.add('02:00:00:00:00:00/02:00:00:00:00:00')
+        self.assertIn(LOCAL, self.acl)
+        self.assertIn(MAC_Address('06:aa:bb:cc:dd:ee'), self.acl)
+        self.assertNotIn(MAC, self.acl)
+
+    def test_blacklist_whitelist(self):
+        self.acl.add('00:1a:2b')
+        self.assertFalse(self.acl.allows(MAC))
+        self.assertTrue(self.acl.allows(OTHER))
+
+        self.acl.toggle_mode()
+        self.assertEqual(self.acl.mode, 'w')
+        self.assertTrue(self.acl.allows(MAC))
+        self.assertFalse(self.acl.allows(OTHER))
+
+        self.acl.toggle_mode()
+        self.assertEqual(self.acl.mode, 'b')
+        self.assertFalse(self.acl.allows(MAC))
+
+    def test_empty_whitelist(self):
+        self.acl.mode = 'w'
+        self.assertFalse(self.acl.allows(MAC))
+
+    def test_remove(self):
+        self.acl.update([MAC, '00:1a:2b', '02:00:00:00:00:00/02:00:00:00:00:00'])
+        self.assertEqual(len(self.acl), 3)
+
+        self.acl.remove('00:1a:2b')
+        self.assertIn(MAC, self.acl)
+        self.assertNotIn(SAME_OUI, self.acl)
+        self.assertEqual(len(self.acl), 2)
+        self.assertNotIn(0xffffff000000, self.acl.rules)
+
+        # Removing a rule that isn't there changes nothing
+        self.acl.remove('00:1a:2b')
+        self.acl.remove(OTHER)
+        self.assertEqual(len(self.acl), 2)
+
+        self.acl.remove(MAC)
+        self.acl.remove('02:00:00:00:00:00/02:00:00:00:00:00')
+        self.assertEqual((len(self.acl), self.acl.rules), (0, dict()))
+        self.assertNotIn(LOCAL, self.acl)
+
+    def test_listing(self):
+        rules = ['00:1a:2b:3c:4d:5e', '00:1a:2b:00:00:00/24']
+        self.acl.update(rules)
+        self.assertEqual(sorted(self.acl), sorted(rules))
+
+        # What listing() gives back reads as the same rules
+        acl = MacACL()
+        acl.update(self.acl.listing())
+        self.assertEqual(acl.rules, self.acl.rules)
+
+    def test_load(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.acl') as file:
+            file.write('# Printers\n00:1a:2b  # Whole OUI\n\n02:00:00:00:00:01\n')
+            file.flush()
+            self.assertEqual(self.acl.load(file.name), 2)
+
+        self.assertIn(SAME_OUI, self.acl)
+        self.assertIn(LOCAL, self.acl)
+
+
+class PoolListingTest(unittest.TestCase):
+    def test_listed_client_gets_nothing(self):
+        pool = Pool('10.0.0.0', '255.255.255.0')
+        pool.add_listing('00:1a:2b')
+        self.assertIsNone(pool.get_ip(MAC))
+        self.assertIsNotNone(pool.get_ip(OTHER))
+
+        pool.toggle_listing_mode()
+        self.assertIsNotNone(pool.get_ip(MAC))
+        self.assertIsNone(pool.get_ip(MAC_Address('00:1a:2c:00:00:01')))
+
+        pool.remove_listing('00:1a:2b')
+        self.assertIsNone(pool.get_ip(SAME_OUI))
+
+
+if __name__ == '__main__':
+    unittest.main()
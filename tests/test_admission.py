@@ -0,0 +1,135 @@
+import unittest
+from time import monotonic
+
+from BaseServers import TokenBucket, AdmissionControl
+from benchmarks.services import dhcp_frame, dhcp_reply
+from Services.DHCP import Options
+from Services.DHCP.Packet import DHCPPacket
+from support import DHCPTestServer, client_mac
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_refill(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        now = bucket.stamp
+
+        self.assertTrue(all(bucket.consume(now) for _ in range(3)))
+        self.assertFalse(bucket.consume(now))
+
+        # Two tokens a second, never more than the capacity
+        self.assertTrue(bucket.consume(now + 0.5))
+        self.assertFalse(bucket.consume(now + 0.5))
+        self.assertFalse(bucket.is_full(now + 1.0))
+        self.assertTrue(bucket.is_full(now + 2.0))
+        self.assertEqual(sum(bucket.consume(now + 100) for _ in range(5)), 3)
+
+    def test_cost(self):
+        bucket = TokenBucket(rate=1, capacity=4)
+        self.assertTrue(bucket.consume(bucket.stamp, 3))
+        self.assertFalse(bucket.consume(bucket.stamp, 2))
+        self.assertTrue(bucket.consume(bucket.stamp, 1))
+
+    def test_older_now(self):
+        # A time taken just before the bucket was made doesn't take tokens away
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.consume(bucket.stamp - 0.5))
+        self.assertFalse(bucket.consume(bucket.stamp))
+
+
+class AdmissionControlTest(unittest.TestCase):
+    def test_rate_per_client(self):
+        admission = AdmissionControl(rate=1, burst=2)
+        self.assertTrue(admission.admit('a', 1))
+        self.assertTrue(admission.admit('a', 2))
+        self.assertFalse(admission.admit('a', 3))
+
+        # Other clients have buckets of their own
+        self.assertTrue(admission.admit('b', 4))
+        self.assertEqual((admission.admitted, admission.rejected), (3, 1))
+
+    def test_burst_defaults_to_rate(self):
+        self.assertEqual(AdmissionControl(rate=5).burst, 5)
+        self.assertEqual(AdmissionControl(rate=0.5).burst, 1)
+
+    def test_max_per_client(self):
+        admission = AdmissionControl(max_per_client=2)
+        self.assertTrue(admission.admit('a', 1))
+        self.assertTrue(admission.admit('a', 2))
+        self.assertFalse(admission.admit('a', 3))
+        self.assertTrue(admission.admit('b', 4))
+
+        admission.release(1)
+        self.assertTrue(admission.admit('a', 5))
+        self.assertIn('a', admission)
+
+        for key in (2, 4, 5):
+            admission.release(key)
+        self.assertNotIn('a', admission)
+        self.assertEqual(admission.clients, dict())
+
+    def test_max_active(self):
+        admission = AdmissionControl(max_active=2)
+        self.assertTrue(admission.admit('a', 1))
+        self.assertTrue(admission.admit('b', 2))
+        self.assertFalse(admission.admit('c', 3))
+        self.assertEqual(admission.active, 2)
+
+        admission.release(1)
+        self.assertTrue(admission.admit('c', 3))
+
+        # Rejected requests were never admitted, releasing them does nothing
+        admission.release(99)
+        self.assertEqual(len(admission), 2)
+
+    def test_prune(self):
+        admission = AdmissionControl(rate=1000, burst=1, max_tracked=4)
+        for client in range(4):
+            admission.admit(client, client)
+            admission.release(client)
+
+        # Buckets that refilled are dropped to make room
+        admission._prune(monotonic() + 1)
+        self.assertEqual(admission.buckets, dict())
+
+        for client in range(10):
+            admission.admit(client, client)
+        self.assertLessEqual(len(admission.buckets), 4)
+
+
+class ServerAdmissionTest(unittest.TestCase):
+    def tearDown(self):
+        self.dhcp.close()
+
+    def test_disabled_by_default(self):
+        self.dhcp = DHCPTestServer()
+        self.assertIsNone(self.dhcp.server.admission)
+
+    def test_enable(self):
+        self.dhcp = DHCPTestServer(max_per_client=4)
+        admission = self.dhcp.server.admission
+        self.assertEqual((admission.rate, admission.max_active, admission.max_per_client), (0, 0, 4))
+
+        self.assertIsNone(self.dhcp.server.enable_admission())
+        self.assertIsNone(self.dhcp.server.admission)
+
+    def test_rate(self):
+        # Frames go through handle_request, the path served requests take
+        self.dhcp = DHCPTestServer(admission_rate=1, admission_burst=1)
+        server = self.dhcp.server
+
+        for xid in (1, 2):
+            packet = DHCPPacket(xid=xid, _chaddr=client_mac(1))
+            packet.options.extend([Options.DHCPMessageType(1), Options.End()])
+            self.dhcp.client.send(dhcp_frame(client_mac(1), packet))
+            server.handle_request()
+
+        self.assertEqual(dhcp_reply(self.dhcp.client.recv(65536)).xid, 1)
+        with self.assertRaises(OSError):
+            self.dhcp.client.recv(65536)
+
+        self.assertEqual((server.admission.admitted, server.admission.rejected), (1, 1))
+        self.assertEqual(server.admission.active, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import random
+import unittest
+
+from Services.DHCP.Allocator import IntervalSet, Allocator
+
+
+class IntervalSetTest(unittest.TestCase):
+    # Random operations, checked against a plain set holding the same values
+
+    def check(self, intervals, model):
+        self.assertEqual(set(intervals), model)
+        self.assertEqual(len(intervals), len(model))
+
+        # Ranges stay sorted, disjoint and non adjacent
+        ranges = intervals.ranges()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertLess(end + 1, start)
+        for start, end in ranges:
+            self.assertLessEqual(start, end)
+
+    def test_against_set(self):
+        rng = random.Random(3074)
+
+        for _ in range(50):
+            intervals = IntervalSet()
+            model = set()
+
+            for _ in range(300):
+                first = rng.randint(0, 200)
+                last = first + rng.choice((0, 0, 1, 5, 40))
+                values = set(range(first, last + 1))
+                action = rng.random()
+
+                if action < 0.4:
+                    self.assertEqual(intervals.add(first, last), len(values - model))
+                    model |= values
+                elif action < 0.8:
+                    self.assertEqual(intervals.remove(first, last), len(values & model))
+                    model -= values
+                else:
+                    value = intervals.pop()
+                    self.assertEqual(value, min(model) if model else None)
+                    model.discard(value)
+
+                self.check(intervals, model)
+                self.assertEqual(first in intervals, first in model)
+
+
+class AllocatorTest(unittest.TestCase):
+    def test_against_set(self):
+        rng = random.Random(2131)
+
+        for _ in range(50):
+            allocator = Allocator([(10, 60), (100, 180)], [(20, 29), (150, 150)])
+            scope = set(range(10, 61)) | set(range(100, 181))
+            scope -= set(range(20, 30)) | {150}
+            free = set(scope)
+
+            for _ in range(400):
+                value = rng.randint(0, 200)
+                action = rng.random()
+
+                if action < 0.3:
+                    taken = allocator.allocate()
+                    self.assertEqual(taken, min(free) if free else None)
+                    free.discard(taken)
+                elif action < 0.55:
+                    self.assertEqual(allocator.take(value), value in free)
+                    free.discard(value)
+                elif action < 0.9:
+                    self.assertEqual(allocator.release(value), value in scope and value not in free)
+                    if value in scope:
+                        free.add(value)
+                else:
+                    last = value + rng.randint(0, 10)
+                    allocator.exclude(value, last)
+                    scope -= set(range(value, last + 1))
+                    free -= set(range(value, last + 1))
+
+                self.assertEqual(set(allocator.free), free)
+                self.assertEqual(set(allocator.scope), scope)
+                self.assertEqual(allocator.used, len(scope) - len(free))
+                self.assertEqual(value in allocator, value in free)
+
+
+if __name__ == '__main__':
+    unittest.main()
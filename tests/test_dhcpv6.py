@@ -0,0 +1,210 @@
+import socket
+import tempfile
+import unittest
+from ipaddress import IPv6Address, IPv6Network
+from time import time
+
+from Services.DHCPv6 import Options, Packet
+from Services.DHCPv6.Pool import Pool
+from Services.DHCPv6.Server import UDPServer, UDPHandler, DECLINED, binding
+
+CLIENT = Options.ClientID(b'\x00\x03\x00\x01\x02\x00\x00\x00\x00\x01')
+DUID = CLIENT.data
+
+
+class ExchangeTest(unittest.TestCase):
+    # The handler is driven in process. Replies go out of the server's socket to a client socket on ::1.
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = self.create()
+        self.client = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        self.client.bind(('::1', 0))
+        self.client.settimeout(0.2)
+
+    def create(self):
+        return UDPServer('::1', 0, network='fd00::/64', prefixes='fd00:1::/54', delegated_length=56,
+                         lease_file=f'{self.directory.name}/leases.json', mac_address=1, interface='',
+                         rapid_commit=False, dns_servers=['fd00::53'], domains=[])
+
+    def tearDown(self):
+        self.close(self.server)
+        self.client.close()
+        self.directory.cleanup()
+
+    @staticmethod
+    def close(server):
+        server.gb.shutdown()
+        server.store.shutdown()
+        server.socket.close()
+
+    def send(self, message_type, *options, xid=1, server_id=True):
+        options = [CLIENT, *options]
+        if server_id:
+            options.insert(1, Options.ServerID(self.server.duid))
+        packet = Packet.DHCPv6Packet(message_type, xid, options)
+        UDPHandler((packet.build(), self.server.socket), self.client.getsockname(), self.server)
+
+        try:
+            return Packet.DHCPv6Packet.disassemble(self.client.recv(65536))
+        except OSError:
+            return None
+
+    def solicit(self):
+        return self.send(Packet.SOLICIT, Options.IANA(1), Options.IAPD(2), Options.OptionRequest([23]),
+                         server_id=False)
+
+    def bind(self):
+        return self.send(Packet.REQUEST, Options.IANA(1), Options.IAPD(2))
+
+    def values(self, reply):
+        ia_na, ia_pd = reply.option(3), reply.option(25)
+        return ia_na.option(5).address, ia_pd.option(26).prefix
+
+    def test_solicit_request(self):
+        advertise = self.solicit()
+        self.assertEqual(advertise.message_type, Packet.ADVERTISE)
+        self.assertEqual(advertise.option(1), CLIENT)
+        self.assertEqual(advertise.option(2).data, self.server.duid)
+        self.assertEqual(advertise.option(23), self.server.options[23])
+
+        address, prefix = self.values(advertise)
+        self.assertIn(address, IPv6Network('fd00::/64'))
+        self.assertEqual(prefix.prefixlen, 56)
+        self.assertTrue(prefix.subnet_of(IPv6Network('fd00:1::/54')))
+        # Only held until the REQUEST
+        self.assertEqual(len(self.server.offers), 2)
+        self.assertEqual(len(self.server.leases), 0)
+
+        reply = self.bind()
+        self.assertEqual(reply.message_type, Packet.REPLY)
+        self.assertEqual(self.values(reply), (address, prefix))
+        self.assertEqual(self.server.offers, dict())
+        self.assertEqual(self.server.leases.get(DUID, binding(3, 1)).ip, address)
+        self.assertEqual(self.server.leases.get(DUID, binding(25, 2)).ip, prefix)
+
+    def test_renew(self):
+        self.solicit()
+        address, prefix = self.values(self.bind())
+        expires = self.server.leases.get(DUID, binding(3, 1)).expires
+
+        reply = self.send(Packet.RENEW, Options.IANA(1), Options.IAPD(2), xid=2)
+        self.assertEqual(self.values(reply), (address, prefix))
+        self.assertGreaterEqual(self.server.leases.get(DUID, binding(3, 1)).expires, expires)
+
+        # IAs the server never bound
+        reply = self.send(Packet.RENEW, Options.IANA(9), xid=3)
+        self.assertEqual(reply.option(3).option(13).status, 3)
+
+    def test_release(self):
+        self.solicit()
+        address, prefix = self.values(self.bind())
+        used = self.server.pool.statistics()
+
+        reply = self.send(Packet.RELEASE, Options.IANA(1, options=[Options.IAAddress(address)]),
+                          Options.IAPD(2, options=[Options.IAPrefix(prefix)]), xid=2)
+        self.assertEqual(reply.option(13).status, 0)
+        self.assertEqual(len(self.server.leases), 0)
+        self.assertEqual(self.server.pool.statistics()['addresses_used'], used['addresses_used'] - 1)
+        self.assertEqual(self.server.pool.statistics()['prefixes_used'], used['prefixes_used'] - 1)
+
+        reply = self.send(Packet.RENEW, Options.IANA(1), xid=3)
+        self.assertEqual(reply.option(3).option(13).status, 3)
+
+    def test_decline(self):
+        self.solicit()
+        address, _ = self.values(self.bind())
+
+        reply = self.send(Packet.DECLINE, Options.IANA(1, options=[Options.IAAddress(address)]), xid=2)
+        self.assertEqual(reply.option(13).status, 0)
+        self.assertIsNone(self.server.leases.get(DUID, binding(3, 1)))
+
+        held = self.server.leases.by_ip(address)
+        self.assertEqual(held.mac, DECLINED)
+        self.assertAlmostEqual(held.expires, time() + self.server.decline_hold_time, delta=5)
+
+        # The next client doesn't get the declined address
+        advertise = self.send(Packet.SOLICIT, Options.IANA(1), server_id=False, xid=3)
+        self.assertNotEqual(advertise.option(3).option(5).address, address)
+
+    def test_wrong_server(self):
+        self.solicit()
+        packet = Packet.DHCPv6Packet(Packet.REQUEST, 2, [CLIENT, Options.ServerID(b'other'), Options.IANA(1)])
+        UDPHandler((packet.build(), self.server.socket), self.client.getsockname(), self.server)
+        with self.assertRaises(OSError):
+            self.client.recv(65536)
+
+        # SOLICIT must not name a server
+        self.assertIsNone(self.send(Packet.SOLICIT, Options.IANA(1), xid=3))
+
+    def test_rapid_commit(self):
+        self.server.rapid_commit = True
+        reply = self.send(Packet.SOLICIT, Options.IANA(1), Options.RapidCommit(), server_id=False)
+        self.assertEqual(reply.message_type, Packet.REPLY)
+        self.assertIsNotNone(reply.option(14))
+        self.assertEqual(self.server.leases.get(DUID, binding(3, 1)).ip, reply.option(3).option(5).address)
+
+    def test_restore(self):
+        self.solicit()
+        address, prefix = self.values(self.bind())
+        self.close(self.server)
+
+        self.server = self.create()
+        self.server.restore()
+        self.assertEqual(self.server.leases.get(DUID, binding(3, 1)).ip, address)
+        self.assertEqual(self.server.leases.get(DUID, binding(25, 2)).ip, prefix)
+
+        # Restored values are taken out of the pool, and the client keeps them
+        self.assertFalse(self.server.pool.take_address(address))
+        self.assertFalse(self.server.pool.take_prefix(prefix))
+        self.assertEqual(self.values(self.send(Packet.RENEW, Options.IANA(1), Options.IAPD(2), xid=2)),
+                         (address, prefix))
+
+
+class PoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = Pool('fd00::/64', 'fd00:1::/54', delegated_length=56)
+
+    def test_prefix_index(self):
+        for index in (0, 1, 3):
+            prefix = self.pool._prefix(index)
+            self.assertEqual(prefix.prefixlen, 56)
+            self.assertEqual(self.pool._index(prefix), index)
+        self.assertEqual(self.pool._prefix(1), IPv6Network('fd00:1:0:100::/56'))
+
+        # Wrong length, or outside the delegated network
+        self.assertIsNone(self.pool._index(IPv6Network('fd00:1::/60')))
+        self.assertIsNone(self.pool._index(IPv6Network('fd00:2::/56')))
+
+    def test_prefixes_run_out(self):
+        prefixes = [self.pool.get_prefix() for _ in range(4)]
+        self.assertEqual(len(set(prefixes)), 4)
+        self.assertIsNone(self.pool.get_prefix())
+
+        self.pool.free_prefix(prefixes[2])
+        self.assertEqual(self.pool.get_prefix(), prefixes[2])
+
+    def test_prefix_hint(self):
+        hint = IPv6Network('fd00:1:0:200::/56')
+        self.assertEqual(self.pool.get_prefix(hint), hint)
+        self.assertNotEqual(self.pool.get_prefix(hint), hint)
+        self.assertFalse(self.pool.take_prefix(hint))
+
+    def test_no_prefixes(self):
+        pool = Pool('fd00::/64')
+        self.assertIsNone(pool.get_prefix())
+        self.assertFalse(pool.take_prefix(IPv6Network('fd00:1::/56')))
+
+    def test_addresses(self):
+        self.assertEqual(self.pool.get_address(), IPv6Address('fd00::1'))
+        self.assertEqual(self.pool.get_address(IPv6Address('fd00::99')), IPv6Address('fd00::99'))
+        self.assertFalse(self.pool.take_address(IPv6Address('fd00::99')))
+        self.assertFalse(self.pool.take_address(IPv6Address('fd01::1')))
+
+        # Reserved anycast addresses at the top of the network aren't handed out
+        self.assertFalse(self.pool.take_address(IPv6Address('fd00::ffff:ffff:ffff:ffff')))
+        self.assertEqual(self.pool.statistics()['addresses'], (1 << 64) - 129)
+
+
+if __name__ == '__main__':
+    unittest.main()
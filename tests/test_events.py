@@ -0,0 +1,137 @@
+import json
+import socket
+import tempfile
+import unittest
+from ipaddress import IPv4Address
+
+from RawPacket import MAC_Address
+from Services.DHCP import Events
+from Services.DHCP.Events import EventBus, CallbackSink, JSONLinesSink, UnixSocketSink
+
+MAC = MAC_Address('02:00:00:00:00:01')
+
+
+class EventBusTest(unittest.TestCase):
+    # The bus's thread isn't started, shutdown() hands sinks what they haven't had yet
+
+    def setUp(self):
+        self.bus = EventBus(size=4)
+
+    def publish(self, count, start=0):
+        for number in range(start, start + count):
+            self.bus.publish(Events.GRANT, MAC, b'', IPv4Address(f'10.0.0.{number + 2}'), 100.0)
+
+    def test_read(self):
+        self.publish(3)
+        events, cursor, missed = self.bus.read(0)
+        self.assertEqual([event.sequence for event in events], [0, 1, 2])
+        self.assertEqual((cursor, missed), (3, 0))
+
+        events, cursor, missed = self.bus.read(1, limit=1)
+        self.assertEqual([event.sequence for event in events], [1])
+        self.assertEqual((cursor, missed), (2, 0))
+
+        self.assertEqual(self.bus.read(3), ([], 3, 0))
+
+    def test_ring_overflow(self):
+        self.publish(10)
+
+        # Only the last <size> events are left, the reader is told how many it missed
+        events, cursor, missed = self.bus.read(0)
+        self.assertEqual([event.sequence for event in events], [6, 7, 8, 9])
+        self.assertEqual((cursor, missed), (10, 6))
+
+        events, cursor, missed = self.bus.read(7)
+        self.assertEqual([event.sequence for event in events], [7, 8, 9])
+        self.assertEqual(missed, 0)
+
+    def test_sink_dropped(self):
+        events = list()
+        sink = CallbackSink(events.append)
+        self.publish(2)
+        self.bus.add_sink(sink)
+        self.publish(10, 2)
+        self.bus.shutdown()
+
+        # The sink joined at event 2 and fell 6 events behind a ring of 4
+        self.assertEqual([event.sequence for event in events], [8, 9, 10, 11])
+        self.assertEqual((sink.delivered, sink.dropped), (4, 6))
+        self.assertEqual(self.bus.statistics()['sinks'][repr(sink)], {'delivered': 4, 'dropped': 6, 'lag': 0})
+
+    def test_replay(self):
+        events = list()
+        self.publish(6)
+        self.bus.add_sink(CallbackSink(events.append), replay=True)
+        self.bus.shutdown()
+        self.assertEqual([event.sequence for event in events], [2, 3, 4, 5])
+
+    def test_broken_sink(self):
+        def fail(event):
+            raise RuntimeError(event)
+
+        sink = CallbackSink(fail)
+        self.bus.add_sink(sink)
+        self.publish(2)
+        self.bus.shutdown()
+        self.assertEqual((sink.delivered, sink.errors), (0, 1))
+
+    def test_running(self):
+        events = list()
+        self.bus.add_sink(CallbackSink(events.append))
+        self.bus.start()
+        self.publish(3)
+
+        tail = self.bus.tail(cursor=0, timeout=1.0)
+        self.assertEqual([next(tail).sequence for _ in range(3)], [0, 1, 2])
+        self.bus.shutdown()
+        self.assertEqual(len(events), 3)
+
+    def test_tail_timeout(self):
+        self.assertEqual(list(self.bus.tail(timeout=0.01)), [])
+
+
+class JSONLinesSinkTest(unittest.TestCase):
+    def test_format(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = f'{directory}/events.jsonl'
+            bus = EventBus()
+            bus.add_sink(JSONLinesSink(file))
+            bus.publish(Events.GRANT, MAC, b'\x01\x02', IPv4Address('10.0.0.2'), 100.5, b'host')
+            bus.publish(Events.RELEASE, MAC, b'\x01\x02', IPv4Address('10.0.0.2'))
+            bus.shutdown()
+
+            with open(file, 'r') as lines:
+                text = lines.read()
+
+        lines = text.split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertNotIn(' ', text)
+
+        grant, release = [json.loads(line) for line in lines[:-1]]
+        self.assertEqual(set(grant), {'sequence', 'time', 'kind', 'mac', 'clientid', 'ip', 'expires', 'hostname'})
+        self.assertEqual((grant['sequence'], grant['kind'], grant['mac'], grant['clientid'], grant['ip'],
+                          grant['expires'], grant['hostname']),
+                         (0, 'grant', str(MAC), '0102', '10.0.0.2', 100.5, 'host'))
+        self.assertEqual((release['sequence'], release['kind'], release['expires']), (1, 'release', None))
+
+
+class UnixSocketSinkTest(unittest.TestCase):
+    def test_stream(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = UnixSocketSink(f'{directory}/events.sock')
+            consumer = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            consumer.connect(sink.file)
+            consumer.settimeout(1.0)
+
+            bus = EventBus()
+            bus.add_sink(sink)
+            bus.publish(Events.EXPIRE, MAC, b'', IPv4Address('10.0.0.2'))
+            bus.shutdown()
+
+            line = consumer.makefile('r').readline()
+            consumer.close()
+            self.assertEqual(json.loads(line)['kind'], 'expire')
+
+
+if __name__ == '__main__':
+    unittest.main()
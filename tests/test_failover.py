@@ -0,0 +1,70 @@
+import random
+import unittest
+from ipaddress import ip_address
+
+from Services.DHCP.Failover import Failover
+from Services.DHCP.Pool import Pool
+
+
+class FailoverSplitTest(unittest.TestCase):
+    # The two servers must split every range of a pool between them,
+    # checked against plain sets of the addresses each can hand out.
+
+    def setUp(self):
+        self.primary = Failover(None, 'primary', address=('127.0.0.1', 0))
+        self.secondary = Failover(None, 'secondary', address=('127.0.0.1', 0))
+
+    def tearDown(self):
+        self.primary.listener.server_close()
+        self.secondary.listener.server_close()
+
+    def test_buckets(self):
+        for bucket in range(256):
+            self.assertEqual(self.primary.buckets[bucket] + self.secondary.buckets[bucket], 1)
+
+    def test_split_against_set(self):
+        rng = random.Random(3074)
+        network = int(ip_address('10.0.0.0'))
+
+        for _ in range(100):
+            ranges = list()
+            exclusions = list()
+            for _ in range(rng.randint(1, 4)):
+                first = rng.randint(1, 250)
+                ranges.append((first, min(254, first + rng.randint(0, 60))))
+            for _ in range(rng.randint(0, 3)):
+                first = rng.randint(1, 254)
+                exclusions.append((first, min(254, first + rng.randint(0, 5))))
+
+            pools = [Pool('10.0.0.0', '255.255.255.0',
+                          [(ip_address(network + first), ip_address(network + last)) for first, last in ranges],
+                          [(ip_address(network + first), ip_address(network + last)) for first, last in exclusions])
+                     for _ in range(2)]
+            self.primary.split(pools[0])
+            self.secondary.split(pools[1])
+
+            scope = set(pools[0].hosts.scope)
+            primary = set(pools[0].hosts.free)
+            secondary = set(pools[1].hosts.free)
+
+            self.assertFalse(primary & secondary)
+            self.assertEqual(primary | secondary, scope)
+            self.assertEqual(set(pools[0].hosts.held), secondary)
+            self.assertEqual(set(pools[1].hosts.held), primary)
+
+            # Each range is split in two halves, the primary's lower one never smaller
+            for first, last in pools[0].hosts.scope.ranges():
+                values = set(range(first, last + 1))
+                self.assertGreaterEqual(len(values & primary), len(values & secondary))
+                self.assertLessEqual(len(values & primary) - len(values & secondary), 1)
+                if values & primary and values & secondary:
+                    self.assertLess(max(values & primary), min(values & secondary))
+
+            # An address the peer gave out and released never becomes free here
+            for value in secondary:
+                pools[0].add_ip(ip_address(value))
+            self.assertEqual(set(pools[0].hosts.free), primary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from ipaddress import ip_address
+from time import time
+
+from benchmarks.services import DHCP_SERVER_IP
+from Services.DHCP import Options
+from Services.DHCP.Server import DECLINED
+from support import DHCPTestServer, client_mac
+
+MAC = client_mac(1)
+SERVER_ID = Options.DHCPServerID(DHCP_SERVER_IP)
+
+
+class DeclineTest(unittest.TestCase):
+    def setUp(self):
+        self.dhcp = DHCPTestServer(decline_hold_time=300)
+        self.server = self.dhcp.server
+        self.pool = self.server.scopes.default.pool
+
+    def tearDown(self):
+        self.dhcp.close()
+
+    def expire(self, seconds):
+        # Run the timers due within <seconds> more, the collector's thread isn't started
+        wheel = self.server.gb.wheel
+        for timer in wheel.advance(max(wheel.tick, wheel.now()) + int(seconds / wheel.resolution)):
+            timer.action(*timer.args)
+
+    def decline(self, address, mac=MAC):
+        return self.dhcp.send(mac, Options.DHCPMessageType(4), Options.RequestedIP(address), SERVER_ID, xid=2)
+
+    def test_quarantine(self):
+        address = self.dhcp.bind(MAC).yiaddr
+        self.assertIsNone(self.decline(address))
+
+        self.assertIsNone(self.server.leases.get(MAC, b''))
+        held = self.server.leases.by_ip(address)
+        self.assertEqual(held.mac, DECLINED)
+        self.assertAlmostEqual(held.expires, time() + 300, delta=5)
+        self.assertNotIn(address, self.pool)
+
+        # Nobody is offered the address while it's held
+        for number in range(2, 6):
+            self.assertNotEqual(self.dhcp.send(client_mac(number), Options.DHCPMessageType(1)).yiaddr, address)
+
+        # Back in the pool once decline_hold_time is over
+        self.expire(290)
+        self.assertEqual(self.server.leases.by_ip(address).mac, DECLINED)
+        self.expire(20)
+        self.assertIsNone(self.server.leases.by_ip(address))
+        self.assertIn(address, self.pool)
+
+    def test_someone_elses_address(self):
+        address = self.dhcp.bind(MAC).yiaddr
+        self.decline(address, client_mac(2))
+
+        self.assertEqual(self.server.leases.by_ip(address).mac, MAC)
+
+
+class ReleaseTest(unittest.TestCase):
+    def setUp(self):
+        self.dhcp = DHCPTestServer()
+        self.server = self.dhcp.server
+        self.pool = self.server.scopes.default.pool
+
+    def tearDown(self):
+        self.dhcp.close()
+
+    def release(self, ciaddr):
+        return self.dhcp.send(MAC, Options.DHCPMessageType(7), SERVER_ID, xid=2, ciaddr=ciaddr)
+
+    def test_release(self):
+        address = self.dhcp.bind(MAC).yiaddr
+        self.assertIsNone(self.release(address))
+
+        self.assertIsNone(self.server.leases.get(MAC, b''))
+        self.assertIn(address, self.pool)
+        self.assertNotIn(('client', MAC, b''), self.server.gb)
+
+    def test_mismatched_ciaddr(self):
+        address = self.dhcp.bind(MAC).yiaddr
+        self.release(ip_address('10.0.0.200'))
+
+        lease = self.server.leases.get(MAC, b'')
+        self.assertEqual(lease.ip, address)
+        self.assertNotIn(address, self.pool)
+
+    def test_other_server(self):
+        address = self.dhcp.bind(MAC).yiaddr
+        self.dhcp.send(MAC, Options.DHCPMessageType(7), Options.DHCPServerID('10.0.0.254'), xid=2, ciaddr=address)
+        self.assertEqual(self.server.leases.get(MAC, b'').ip, address)
+
+
+class InformTest(unittest.TestCase):
+    def setUp(self):
+        self.dhcp = DHCPTestServer()
+        self.server = self.dhcp.server
+        self.server.register(Options.Router('10.0.0.1'))
+
+    def tearDown(self):
+        self.dhcp.close()
+
+    def test_inform(self):
+        ciaddr = ip_address('10.0.0.50')
+        available = self.server.scopes.default.pool.available
+        ack = self.dhcp.send(MAC, Options.DHCPMessageType(8), Options.ParameterRequestList(3, 51), ciaddr=ciaddr)
+
+        self.assertEqual(ack.message_type, 5)
+        self.assertEqual(ack.yiaddr, ip_address(0))
+        self.assertEqual(ack.option(3).data, [ip_address('10.0.0.1')])
+        for code in self.server.lease_options:
+            self.assertIsNone(ack.option(code))
+
+        # Nothing is leased for an INFORM
+        self.assertIsNone(self.server.leases.get(MAC, b''))
+        self.assertEqual(self.server.scopes.default.pool.available, available)
+
+    def test_without_ciaddr(self):
+        self.assertIsNone(self.dhcp.send(MAC, Options.DHCPMessageType(8)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import tempfile
+import unittest
+from threading import Thread, Event
+from time import sleep
+
+from RawPacket import MAC_Address
+from Services.DHCP.LeaseStore import LeaseStore
+
+MAC = MAC_Address('02:00:00:00:00:01')
+OTHER = MAC_Address('02:00:00:00:00:02')
+
+
+class LeaseStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = f'{self.directory.name}/leases.json'
+        self.store = LeaseStore(self.file)
+
+    def tearDown(self):
+        self.store.shutdown()
+        self.directory.cleanup()
+
+    def reload(self):
+        # A new store reading what the old one left on disk, IE: after a restart
+        self.store.shutdown()
+        self.store = LeaseStore(self.file)
+        return self.store.load()
+
+    def journal(self):
+        with open(self.store.journal_file, 'rb') as journal:
+            return journal.read()
+
+    def test_reload(self):
+        self.store.put(MAC, b'', '10.0.0.2', 100.0, b'host')
+        self.store.put(OTHER, b'\x01\x02', '10.0.0.3', 200.0)
+        self.store.put(MAC, b'', '10.0.0.4', 300.0)
+        self.store.remove(OTHER, b'\x01\x02')
+
+        self.assertEqual(self.reload(), {(str(MAC), ''): ('10.0.0.4', 300.0, '')})
+
+    def test_journal_replayed_over_snapshot(self):
+        self.store.put(MAC, b'', '10.0.0.2', 100.0, b'host')
+        self.store.compact()
+        self.assertEqual(self.journal(), b'')
+
+        self.store.put(OTHER, b'', '10.0.0.3', 200.0)
+        self.store.remove(MAC, b'')
+        self.store.journal.close()
+        self.store.journal = None
+
+        store = LeaseStore(self.file)
+        self.assertEqual(store.load(), {(str(OTHER), ''): ('10.0.0.3', 200.0, '')})
+        self.assertEqual(store.entries, 2)
+
+    def test_compact_after(self):
+        self.store = LeaseStore(self.file, compact_after=4)
+        self.store.start()
+        for index in range(10):
+            self.store.put(MAC, b'', f'10.0.0.{index + 2}', 100.0)
+
+        # The writer compacted at least once, the journal never holds more than a few entries
+        self.assertLess(self.store.entries, 4)
+        self.assertEqual(self.reload(), {(str(MAC), ''): ('10.0.0.11', 100.0, '')})
+
+    def test_torn_last_line(self):
+        self.store.put(MAC, b'', '10.0.0.2', 100.0)
+        self.store.put(OTHER, b'', '10.0.0.3', 200.0)
+        self.store.journal.close()
+        self.store.journal = None
+
+        # The server went down in the middle of writing the second entry
+        data = self.journal()
+        with open(self.store.journal_file, 'wb') as journal:
+            journal.write(data[:-10])
+
+        store = LeaseStore(self.file)
+        self.assertEqual(store.load(), {(str(MAC), ''): ('10.0.0.2', 100.0, '')})
+        # The torn line is cut off, so the next entry starts on a line of its own
+        self.assertEqual(self.journal(), data[:data.index(b'\n') + 1])
+
+        store.put(OTHER, b'', '10.0.0.4', 300.0)
+        store.shutdown()
+        self.assertEqual(LeaseStore(self.file).load(), {(str(MAC), ''): ('10.0.0.2', 100.0, ''),
+                                                       (str(OTHER), ''): ('10.0.0.4', 300.0, '')})
+
+    def test_group_commit(self):
+        writes = list()
+        writing = Event()
+        resume = Event()
+        write = self.store._write
+
+        def _write(lines):
+            writes.append(len(lines))
+            if len(writes) == 1:
+                # Hold the first write until every other entry is queued
+                writing.set()
+                resume.wait(5)
+            write(lines)
+
+        self.store._write = _write
+        self.store.start()
+
+        first = Thread(target=self.store.put, args=(MAC, b'', '10.0.0.2', 100.0))
+        first.start()
+        writing.wait(5)
+
+        threads = [Thread(target=self.store.put, args=(MAC_Address(f'02:00:00:00:01:{index:02x}'), b'',
+                                                       f'10.0.1.{index}', 100.0))
+                   for index in range(8)]
+        for thread in threads:
+            thread.start()
+        while len(self.store.pending) < 8:
+            sleep(0.001)
+
+        # Nothing waiting is acknowledged before it's on disk
+        self.assertEqual(self.store.committed, 0)
+        resume.set()
+        for thread in [first, *threads]:
+            thread.join(5)
+
+        self.assertEqual(writes, [1, 8])
+        self.assertEqual(self.store.committed, 9)
+        self.assertEqual(len(self.reload()), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
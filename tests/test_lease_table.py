@@ -0,0 +1,141 @@
+import random
+import unittest
+from ipaddress import IPv4Address
+
+from RawPacket import MAC_Address
+from Services.DHCP.LeaseTable import LeaseTable, ExpiryIndex
+
+# Both are checked against a plain model, a sorted list and a dict of leases,
+# after every step of a seeded random run.
+
+
+class ExpiryIndexTest(unittest.TestCase):
+    def check(self, index, model):
+        self.assertEqual(len(index), len(model))
+        self.assertEqual([item for chunk in index.chunks for item in chunk], sorted(model))
+        self.assertEqual(index.maxes, [chunk[-1] for chunk in index.chunks])
+        for chunk in index.chunks:
+            self.assertTrue(0 < len(chunk) <= index.load * 2)
+
+    def test_against_sorted_list(self):
+        rng = random.Random(3)
+        index = ExpiryIndex(load=4)
+        model = list()
+
+        for serial in range(2000):
+            if model and rng.random() < 0.4:
+                item = rng.choice(model)
+                model.remove(item)
+                index.remove(item)
+            else:
+                # Mostly later than anything indexed, like new leases, sometimes anywhere
+                expires = serial if rng.random() < 0.7 else rng.randrange(serial + 1)
+                item = (float(expires), serial)
+                model.append(item)
+                index.add(item)
+            self.check(index, model)
+
+            limit = (float(rng.randrange(serial + 1)), float('inf'))
+            self.assertEqual(list(index.until(limit)), sorted(item for item in model if item <= limit))
+
+    def test_split(self):
+        index = ExpiryIndex(load=2)
+        for serial in range(5):
+            index.add((1.0, serial))
+        self.assertEqual(index.chunks, [[(1.0, 0), (1.0, 1)], [(1.0, 2), (1.0, 3), (1.0, 4)]])
+
+        for serial in range(5):
+            index.remove((1.0, serial))
+        self.assertEqual((index.chunks, index.maxes, len(index)), ([], [], 0))
+
+
+class LeaseTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = LeaseTable()
+        self.table.expiry.load = 4
+        self.model = dict()  # Keys will be a tuple of (MAC address, ClientID), values (IP address, expires)
+
+    def add(self, mac, clientid, ip, expires):
+        # A different client holding the same IP loses its lease
+        for key, (held, _) in list(self.model.items()):
+            if held == ip and key != (mac, clientid):
+                del self.model[key]
+        self.model[(mac, clientid)] = (ip, expires)
+        self.table.add(mac, clientid, ip, expires)
+
+    def check(self):
+        table = self.table
+        self.assertEqual({key: (lease.ip, lease.expires) for key, lease in table.leases.items()}, self.model)
+        self.assertEqual(len(table), len(self.model))
+
+        self.assertEqual({ip: lease.key for ip, lease in table.ips.items()},
+                         {ip: key for key, (ip, _) in self.model.items()})
+
+        macs = dict()
+        for mac, clientid in self.model:
+            macs.setdefault(mac, set()).add(clientid)
+        self.assertEqual({mac: set(leases) for mac, leases in table.macs.items()}, macs)
+
+        self.assertEqual({clientid: lease.key for clientid, lease in table.clientids.items()},
+                         {clientid: (mac, clientid) for mac, clientid in self.model if clientid})
+
+        self.assertEqual(len(table.expiry), len(self.model))
+        self.assertEqual(set(table.serials.values()), set(table.leases.values()))
+        for lease in table:
+            self.assertIs(table.by_ip(lease.ip), lease)
+            self.assertIn(lease, table.by_mac(lease.mac))
+
+        order = [lease.expires for lease in table.expiring(float('inf'), now=0.0)]
+        self.assertEqual(order, sorted(expires for _, expires in self.model.values()))
+
+    def test_against_model(self):
+        rng = random.Random(5)
+        # A few MACs with one or two ClientIDs each, each ClientID belongs to one client
+        clients = [(MAC_Address(f'02:00:00:00:00:{number:02x}'), clientid)
+                   for number in range(12) for clientid in (b'', bytes([1, number]))]
+        ips = [IPv4Address(f'10.0.0.{host}') for host in range(2, 12)]
+
+        for step in range(1500):
+            mac, clientid = rng.choice(clients)
+            action = rng.random()
+
+            if action < 0.5:
+                self.add(mac, clientid, rng.choice(ips), float(rng.randrange(100)))
+            elif action < 0.75:
+                removed = self.table.remove(mac, clientid)
+                held = self.model.pop((mac, clientid), None)
+                self.assertEqual(None if removed is None else (removed.ip, removed.expires), held)
+            else:
+                expires = float(rng.randrange(100))
+                renewed = self.table.renew(mac, clientid, expires)
+                self.assertEqual(renewed is None, (mac, clientid) not in self.model)
+                if renewed is not None:
+                    self.model[(mac, clientid)] = (renewed.ip, expires)
+            self.check()
+
+    def test_same_ip_other_client(self):
+        first = MAC_Address('02:00:00:00:00:01')
+        second = MAC_Address('02:00:00:00:00:02')
+        ip = IPv4Address('10.0.0.5')
+
+        self.table.add(first, b'\x01', ip, 10.0)
+        lease = self.table.add(second, b'', ip, 20.0)
+
+        self.assertIsNone(self.table.get(first, b'\x01'))
+        self.assertIsNone(self.table.by_clientid(b'\x01'))
+        self.assertEqual(self.table.by_mac(first), [])
+        self.assertIs(self.table.by_ip(ip), lease)
+        self.assertEqual(self.table.expiring(100.0, now=0.0), [lease])
+
+    def test_expiring(self):
+        mac = MAC_Address('02:00:00:00:00:01')
+        leases = [self.table.add(mac, bytes([number]), IPv4Address(f'10.0.0.{number + 2}'), expires)
+                  for number, expires in enumerate((30.0, 10.0, 20.0, 10.0))]
+
+        self.assertEqual(self.table.expired(now=5.0), [])
+        self.assertEqual(self.table.expired(now=10.0), [leases[1], leases[3]])
+        self.assertEqual(self.table.expiring(10.0, now=10.0), [leases[1], leases[3], leases[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import random
+import unittest
+
+from Services.DHCP import Options
+from Services.DHCP.Options import BaseOption, OptionList
+
+
+def old_unpack(data):
+    # BaseOption.unpack as it was before OptionList, one byte popped at a time
+    out = []
+    option_list = list(data)
+    classes = BaseOption.classes
+
+    while (len(option_list)):
+        code = option_list.pop(0)
+
+        if (code == 0 or code == 255):
+            out.append(classes[code]())
+            continue
+
+        length = option_list.pop(0)
+        data = bytes([option_list.pop(0) for _ in range(length)])
+
+        if (code in classes):
+            out.append(classes[code](data))
+        else:
+            out.append(classes[-1](code, length, data))
+
+    return out
+
+
+def random_option(rng):
+    # Packed option with data its class accepts
+    kind = rng.randrange(7)
+    if kind == 0:
+        return b'\x00' * rng.randrange(1, 4)  # Pad
+    if kind == 1:
+        return Options.DHCPMessageType(rng.randrange(1, 9)).pack()
+    if kind == 2:
+        return Options.Router(*[f'10.0.0.{rng.randrange(256)}' for _ in range(rng.randrange(1, 4))]).pack()
+    if kind == 3:
+        return Options.HostName(bytes(rng.randrange(97, 123) for _ in range(rng.randrange(1, 32)))).pack()
+    if kind == 4:
+        return Options.IPLeaseTime(rng.randrange(1 << 32)).pack()
+    if kind == 5:
+        return Options.ParameterRequestList([rng.randrange(1, 255) for _ in range(rng.randrange(1, 12))]).pack()
+    # Codes without a class of their own, up to the longest length there is
+    length = rng.choice((0, 1, rng.randrange(256), 255))
+    return bytes([rng.randrange(224, 255), length]) + rng.randbytes(length)
+
+
+class OptionListTest(unittest.TestCase):
+    def areas(self, seed, count=300):
+        rng = random.Random(seed)
+        for _ in range(count):
+            area = b''.join(random_option(rng) for _ in range(rng.randrange(8)))
+            if rng.random() < 0.5:
+                area = area + b'\xff'
+                if rng.random() < 0.5:
+                    # Padding or leftovers after End
+                    area = area + b'\x00' * rng.randrange(1, 60)
+            yield rng, area
+
+    def test_against_old_parser(self):
+        for _, area in self.areas(1):
+            options = OptionList.parse(area)
+            self.assertEqual(options, old_unpack(area), area)
+            self.assertEqual(list(options), old_unpack(area))
+
+    def test_truncated(self):
+        # The old parser gave up on the whole area, only the options that fit are kept now
+        for rng, area in self.areas(2):
+            if not area:
+                continue
+            cut = rng.randrange(len(area))
+            whole = OptionList.parse(area[:cut])
+
+            kept = list()
+            offset = 0
+            for option in OptionList.parse(area):
+                size = 1 if option.code in (0, 255) else len(option.pack())
+                if offset + size > cut:
+                    break
+                kept.append(option)
+                offset = offset + size
+
+            self.assertEqual(list(whole), kept)
+            self.assertEqual(list(whole), old_unpack(area[:offset]))
+
+    def test_over_long(self):
+        area = Options.DHCPMessageType(1).pack() + b'\x0c\x09short' + b'\xff'
+        self.assertEqual(list(OptionList.parse(area)), [Options.DHCPMessageType(1)])
+        with self.assertRaises(IndexError):
+            old_unpack(area)
+
+        # Length byte with no data after it, or no length byte at all
+        self.assertEqual(list(OptionList.parse(b'\x35\x01\x01\x0c')), [Options.DHCPMessageType(1)])
+        self.assertEqual(list(OptionList.parse(b'\x35\x01\x01\xe0\x00')),
+                         [Options.DHCPMessageType(1), Options.UnknownOption(224, 0, b'')])
+
+    def test_lookups(self):
+        for _, area in self.areas(3, 100):
+            options = OptionList.parse(area)
+            parsed = old_unpack(area)
+
+            for code in {option.code for option in parsed}:
+                first = next(option for option in parsed if option.code == code)
+                self.assertTrue(options.has(code))
+                self.assertEqual(options.get(code), first)
+                self.assertIn(first, options)
+                if code not in (0, 255):
+                    self.assertEqual(options.raw(code), first.pack()[2:])
+
+            self.assertIsNone(options.get(223))
+            self.assertIsNone(options.raw(223))
+
+    def test_packed_again(self):
+        for _, area in self.areas(4, 100):
+            options = OptionList.parse(area)
+            packed = b''.join(b'\x00' if option.code == 0 else b'\xff' if option.code == 255 else option.pack()
+                              for option in options)
+            self.assertEqual(packed, area)
+
+
+if __name__ == '__main__':
+    unittest.main()
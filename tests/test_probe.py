@@ -0,0 +1,120 @@
+import unittest
+from ipaddress import IPv4Address
+from socket import socketpair, AF_UNIX, SOCK_DGRAM
+
+from RawPacket import Ethernet, ARP, MAC_Address
+from Services.DHCP import Options
+from Services.DHCP.Pool import Pool
+from Services.DHCP.Server import DECLINED
+from support import DHCPTestServer, client_mac
+
+HOST = MAC_Address('02:00:00:00:ee:ee')
+
+
+class ProbeGatedPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = Pool('10.0.0.0', '255.255.255.0')
+        self.pool.probed = True
+
+    def test_only_ready_addresses_offered(self):
+        self.assertIsNone(self.pool.get_ip(client_mac(1)))
+        self.assertEqual(self.pool.misses, 1)
+
+        self.pool.ready.append(int(IPv4Address('10.0.0.9')))
+        self.assertEqual(self.pool.get_ip(client_mac(1)), IPv4Address('10.0.0.9'))
+        self.assertIsNone(self.pool.get_ip(client_mac(2)))
+
+    def test_requested_address_must_be_ready(self):
+        # Free, but never probed
+        self.assertIsNone(self.pool.get_ip(client_mac(1), IPv4Address('10.0.0.20')))
+        self.assertIn(IPv4Address('10.0.0.20'), self.pool)
+
+        self.pool.ready.extend([int(IPv4Address('10.0.0.20')), int(IPv4Address('10.0.0.21'))])
+        self.assertEqual(self.pool.get_ip(client_mac(1), IPv4Address('10.0.0.21')), IPv4Address('10.0.0.21'))
+        self.assertEqual(list(self.pool.ready), [int(IPv4Address('10.0.0.20'))])
+
+    def test_claim_from_ready(self):
+        self.pool.probed = False
+        self.pool.ready.append(self.pool.hosts.allocate())
+        address = IPv4Address(self.pool.ready[0])
+
+        self.assertIn(address, self.pool)
+        self.assertTrue(self.pool.take(address))
+        self.assertNotIn(address, self.pool)
+        self.assertFalse(self.pool.take(address))
+
+
+class ArpProberTest(unittest.TestCase):
+    # The prober is driven by hand, without its thread
+
+    def setUp(self):
+        self.dhcp = DHCPTestServer()
+        self.server = self.dhcp.server
+        self.sock, self.peer = socketpair(AF_UNIX, SOCK_DGRAM)
+        self.peer.setblocking(False)
+        self.prober = self.server.enable_probing(sock=self.sock, ready=4, attempts=2, wait=0.1)
+
+    def tearDown(self):
+        self.prober.shutdown()
+        self.peer.close()
+        self.dhcp.close()
+
+    def probes(self):
+        out = list()
+        while True:
+            try:
+                out.append(Ethernet.disassemble(self.peer.recv(65536)).payload)
+            except BlockingIOError:
+                return out
+
+    def answer(self, address):
+        arp = ARP(2, HOST, address, self.server.mac_address, IPv4Address(0))
+        self.prober.receive(Ethernet(self.server.mac_address, HOST, arp).build())
+
+    def test_no_offer_before_probing(self):
+        self.assertTrue(self.server.pool.probed)
+        self.assertIsNone(self.dhcp.send(client_mac(1), Options.DHCPMessageType(1)))
+
+    def test_probe_and_conflict(self):
+        self.prober.refill()
+        self.prober.probe(0.0)
+        probed = [arp.target_ip for arp in self.probes()]
+        self.assertEqual(len(probed), 4)
+        for arp_target in probed:
+            self.assertNotIn(arp_target, self.server.pool)
+
+        # Something answers for the first address
+        self.answer(probed[0])
+        self.assertEqual(self.server.leases.by_ip(probed[0]).mac, DECLINED)
+
+        self.prober.probe(1.0)
+        self.prober.probe(2.0)
+        self.prober.probe(3.0)
+        self.assertEqual([IPv4Address(address) for address in self.server.pool.ready], probed[1:])
+
+        offer = self.dhcp.send(client_mac(1), Options.DHCPMessageType(1))
+        self.assertEqual(offer.yiaddr, probed[1])
+
+    def test_conflict_on_ready_address(self):
+        self.prober.refill()
+        for now in range(4):
+            self.prober.probe(float(now))
+        ready = IPv4Address(self.server.pool.ready[0])
+
+        # A static host announcing an address that was already probed
+        self.answer(ready)
+        self.assertNotIn(int(ready), self.server.pool.ready)
+        self.assertEqual(self.server.leases.by_ip(ready).mac, DECLINED)
+
+    def test_shutdown_returns_addresses(self):
+        available = self.server.pool.available
+        self.prober.refill()
+        self.prober.probe(0.0)
+        self.prober.shutdown()
+
+        self.assertFalse(self.server.pool.probed)
+        self.assertEqual(self.server.pool.available, available)
+
+
+if __name__ == '__main__':
+    unittest.main()
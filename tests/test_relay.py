@@ -0,0 +1,163 @@
+import socket
+import unittest
+from ipaddress import ip_address
+
+from BaseServers import AdmissionControl
+from RawPacket import Ethernet, MAC_Address
+from benchmarks.services import dhcp_frame
+from Services.DHCP import Options
+from Services.DHCP.Packet import DHCPPacket
+from Services.DHCP.Relay import RelayServer, scan_options
+
+RELAY_MAC = MAC_Address('02:00:00:00:00:09')
+CLIENT = MAC_Address('02:11:22:33:44:55')
+OTHER = MAC_Address('02:11:22:33:44:66')
+
+
+class RelayTest(unittest.TestCase):
+    # forward() and reply() are called by hand, the upstream server is a UDP socket on localhost
+
+    def setUp(self):
+        self.segment, relay_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.segment.settimeout(0.5)
+        upstream = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        upstream.bind(('127.0.0.1', 0))
+        self.dhcp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.dhcp.bind(('127.0.0.1', 0))
+        self.dhcp.settimeout(0.5)
+
+        self.relay = RelayServer('eth9', [self.dhcp.getsockname()], sock=relay_end, mac_address=RELAY_MAC,
+                                 relay_ip='127.0.0.1', upstream_sock=upstream, max_hops=4)
+
+    def tearDown(self):
+        self.relay.upstream.close()
+        self.relay.socket.close()
+        self.segment.close()
+        self.dhcp.close()
+
+    def request(self, mac=CLIENT, xid=1, hops=0, giaddr=0, options=(), broadcast=True):
+        packet = DHCPPacket(xid=xid, hops=hops, broadcast=broadcast, _chaddr=mac, _giaddr=giaddr)
+        packet.options.extend([Options.DHCPMessageType(1), *options, Options.End()])
+        return dhcp_frame(mac, packet)
+
+    def forwarded(self):
+        self.relay.flush()
+        return DHCPPacket.disassemble(self.dhcp.recv(4096))
+
+    def answer(self, request, yiaddr='10.0.0.5', ciaddr=0):
+        packet = DHCPPacket(op=2, xid=request.xid, broadcast=request.broadcast, _chaddr=request.chaddr,
+                            _ciaddr=ciaddr, _yiaddr=yiaddr, _giaddr=request.giaddr)
+        packet.options.extend([Options.DHCPMessageType(2), *request.options[1:]])
+        return packet.build()
+
+    def test_agent_option_added(self):
+        self.relay.forward(self.request())
+        request = self.forwarded()
+
+        self.assertEqual(request.giaddr, ip_address('127.0.0.1'))
+        self.assertEqual(request.hops, 1)
+        agent = request.option(82).data
+        self.assertEqual(agent, b'\x01\x04eth9\x02\x06' + RELAY_MAC.packed)
+        self.assertEqual(request.options[-1].code, 255)
+
+    def test_client_agent_option_dropped(self):
+        self.relay.forward(self.request(options=[Options.UnknownOption(82, 3, b'\x01\x01x')]))
+        self.assertEqual(self.relay.outgoing, [])
+        self.assertEqual(self.relay.dropped, 1)
+
+    def test_relayed_request_unchanged(self):
+        # Already relayed by another agent, giaddr and its option 82 stay
+        agent = Options.UnknownOption(82, 3, b'\x01\x01x')
+        self.relay.forward(self.request(hops=1, giaddr='192.168.1.1', options=[agent]))
+        request = self.forwarded()
+
+        self.assertEqual(request.giaddr, ip_address('192.168.1.1'))
+        self.assertEqual(request.hops, 2)
+        self.assertEqual(request.option(82).data, b'\x01\x01x')
+
+    def test_max_hops(self):
+        self.relay.forward(self.request(hops=4))
+        self.assertEqual(self.relay.outgoing, [])
+        self.assertEqual(self.relay.dropped, 1)
+
+        self.relay.forward(self.request(hops=3))
+        self.assertEqual(self.forwarded().hops, 4)
+
+    def test_reply_broadcast(self):
+        self.relay.forward(self.request(broadcast=True))
+        frame = Ethernet.disassemble(self.relay.reply(self.answer(self.forwarded())))
+
+        self.assertEqual(frame.destination, MAC_Address('FF:FF:FF:FF:FF:FF'))
+        self.assertEqual(frame.payload.destination, ip_address('255.255.255.255'))
+        self.assertEqual(frame.payload.payload.destination, 68)
+
+        reply = DHCPPacket.disassemble(frame.payload.payload.payload)
+        self.assertIsNone(reply.option(82))
+        self.assertEqual(reply.message_type, 2)
+
+    def test_reply_unicast(self):
+        self.relay.forward(self.request(broadcast=False))
+        request = self.forwarded()
+
+        frame = Ethernet.disassemble(self.relay.reply(self.answer(request)))
+        self.assertEqual(frame.destination, CLIENT)
+        self.assertEqual(frame.payload.destination, ip_address('10.0.0.5'))
+
+        # A client with an address (RENEW through the relay) gets it at ciaddr
+        self.relay.forward(self.request(broadcast=False, xid=2))
+        request = self.forwarded()
+        frame = Ethernet.disassemble(self.relay.reply(self.answer(request, ciaddr='10.0.0.7')))
+        self.assertEqual(frame.payload.destination, ip_address('10.0.0.7'))
+
+    def test_reply_without_route(self):
+        self.assertIsNone(self.relay.reply(DHCPPacket(op=2, xid=7, _chaddr=CLIENT, options=[Options.End()]).build()))
+        self.assertEqual(self.relay.dropped, 1)
+
+    def test_route_expiry(self):
+        self.relay.forward(self.request())
+        request = self.forwarded()
+
+        key = (1, CLIENT.packed)
+        self.relay.routes[key] = self.relay.routes[key] - self.relay.route_ttl - 1
+        self.assertIsNone(self.relay.reply(self.answer(request)))
+
+        # Expired routes are dropped from the front as new ones are added
+        self.relay.forward(self.request(xid=2))
+        self.assertEqual(list(self.relay.routes), [(2, CLIENT.packed)])
+
+    def test_same_xid_two_clients(self):
+        self.relay.forward(self.request(CLIENT, xid=9))
+        self.relay.forward(self.request(OTHER, xid=9))
+        self.relay.flush()
+        requests = [DHCPPacket.disassemble(self.dhcp.recv(4096)) for _ in range(2)]
+
+        for request in requests:
+            frame = Ethernet.disassemble(self.relay.reply(self.answer(request)))
+            self.assertEqual(DHCPPacket.disassemble(frame.payload.payload.payload).chaddr, request.chaddr)
+
+    def test_handle_request_pipeline(self):
+        self.relay.admission = AdmissionControl(rate=1, burst=1)
+        self.segment.send(self.request(xid=1))
+        self.segment.send(self.request(xid=2))
+        self.relay.handle_request()
+
+        # The second frame of the client is over its rate
+        self.assertEqual(self.relay.forwarded, 1)
+        self.assertEqual(self.forwarded().xid, 1)
+        self.assertEqual(self.relay.admission.rejected, 1)
+        self.assertEqual(self.relay.admission.active, 0)
+
+
+class ScanOptionsTest(unittest.TestCase):
+    def test_scan(self):
+        head = bytes(236) + b'\x63\x82\x53\x63'
+        data = head + b'\x00\x35\x01\x01\x52\x03\x01\x01x\xff'
+        self.assertEqual(scan_options(memoryview(data)), ((244, 249), 249))
+
+        # No End option, or one running past the end of the packet
+        self.assertEqual(scan_options(memoryview(head + b'\x35\x01\x01')), (None, 243))
+        self.assertEqual(scan_options(memoryview(head + b'\x35\x09\x01')), (None, 243))
+
+
+if __name__ == '__main__':
+    unittest.main()
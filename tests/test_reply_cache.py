@@ -0,0 +1,102 @@
+import unittest
+
+from benchmarks.services import DHCP_SERVER_IP
+from Services.DHCP import Options
+from Services.DHCP.ReplyCache import ReplyCache
+from support import DHCPTestServer, client_mac
+
+MAC = client_mac(1)
+
+
+class ReplyCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = ReplyCache(ttl=8.0, size=3)
+
+    def test_ttl(self):
+        self.cache.put((MAC, 1, 1), b'offer', now=100.0)
+        self.assertEqual(self.cache.get((MAC, 1, 1), now=107.9), b'offer')
+        self.assertIsNone(self.cache.get((MAC, 1, 1), now=108.0))
+
+        # The expired reply is gone, not only skipped
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.statistics(), {'size': 0, 'hits': 1, 'misses': 1})
+
+    def test_expired_dropped_on_put(self):
+        self.cache.put((MAC, 1, 1), b'first', now=100.0)
+        self.cache.put((MAC, 2, 1), b'second', now=104.0)
+        self.cache.put((MAC, 3, 1), b'third', now=109.0)
+        self.assertEqual(list(self.cache.entries), [(MAC, 2, 1), (MAC, 3, 1)])
+
+    def test_size(self):
+        for xid in range(5):
+            self.cache.put((MAC, xid, 1), bytes([xid]), now=100.0)
+
+        # The oldest replies go first
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(list(self.cache.entries), [(MAC, 2, 1), (MAC, 3, 1), (MAC, 4, 1)])
+
+    def test_put_again_refreshes(self):
+        self.cache.put((MAC, 1, 1), b'first', now=100.0)
+        self.cache.put((MAC, 2, 1), b'second', now=101.0)
+        self.cache.put((MAC, 1, 1), b'again', now=102.0)
+
+        self.assertEqual(list(self.cache.entries), [(MAC, 2, 1), (MAC, 1, 1)])
+        self.assertEqual(self.cache.get((MAC, 1, 1), now=109.0), b'again')
+
+    def test_discard_client(self):
+        other = client_mac(2)
+        self.cache.put((MAC, 1, 1), b'offer', now=100.0)
+        self.cache.put((MAC, 1, 3), b'ack', now=100.0)
+        self.cache.put((other, 1, 3), b'ack', now=100.0)
+
+        self.cache.discard_client(MAC, 3)
+        self.assertEqual(list(self.cache.entries), [(MAC, 1, 1), (other, 1, 3)])
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.dhcp = DHCPTestServer()
+        self.server = self.dhcp.server
+
+    def tearDown(self):
+        self.dhcp.close()
+
+    def request(self, offer, xid):
+        return self.dhcp.send(MAC, Options.DHCPMessageType(3), Options.RequestedIP(offer),
+                              Options.DHCPServerID(DHCP_SERVER_IP), xid=xid)
+
+    def test_retransmitted_discover(self):
+        offer = self.dhcp.send(MAC, Options.DHCPMessageType(1), xid=5)
+        available = self.server.scopes.default.pool.available
+
+        again = self.dhcp.send(MAC, Options.DHCPMessageType(1), xid=5)
+        self.assertEqual(again.build(), offer.build())
+        self.assertEqual(self.server.replies.hits, 1)
+        # Nothing more was taken from the pool
+        self.assertEqual(self.server.scopes.default.pool.available, available)
+
+    def test_retransmitted_request(self):
+        ack = self.dhcp.bind(MAC, 5)
+        again = self.request(ack.yiaddr, 5)
+        self.assertEqual(again.build(), ack.build())
+
+    def test_no_replay_after_release(self):
+        ack = self.dhcp.bind(MAC, 5)
+        self.dhcp.send(MAC, Options.DHCPMessageType(7), Options.DHCPServerID(DHCP_SERVER_IP),
+                       xid=6, ciaddr=ack.yiaddr)
+        self.assertIsNone(self.server.leases.get(MAC, b''))
+
+        # The ACK is not sent again for a lease that is gone
+        self.assertIsNone(self.request(ack.yiaddr, 5))
+
+    def test_no_replay_after_decline(self):
+        ack = self.dhcp.bind(MAC, 5)
+        self.dhcp.send(MAC, Options.DHCPMessageType(4), Options.RequestedIP(ack.yiaddr),
+                       Options.DHCPServerID(DHCP_SERVER_IP), xid=5)
+        self.assertIsNone(self.server.leases.get(MAC, b''))
+
+        self.assertIsNone(self.request(ack.yiaddr, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from ipaddress import ip_address
+
+from Services.DHCP import Options
+from support import DHCPTestServer, client_mac
+
+RELAY = ip_address('10.1.0.1')
+
+
+class ScopeOptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.dhcp = DHCPTestServer(ipleasetime=3600)
+        self.server = self.dhcp.server
+        self.server.register(Options.Router('10.0.0.1'))
+        self.server.register(Options.DomainName(b'example.com'))
+        self.scope = self.server.add_scope('10.1.0.0', '255.255.255.0',
+                                           options=[Options.Router('10.1.0.1'), Options.IPLeaseTime(600)])
+
+    def tearDown(self):
+        self.dhcp.close()
+
+    def offer(self, mac, *codes, giaddr=0):
+        return self.dhcp.send(mac, Options.DHCPMessageType(1), Options.ParameterRequestList(list(codes)),
+                              giaddr=giaddr)
+
+    def codes(self, packet):
+        return [option.code for option in packet.options]
+
+    def test_requested_option_sent_once(self):
+        # Router is both a scope option and one the client asks for
+        offer = self.offer(client_mac(1), 3, 15, 51, giaddr=RELAY)
+        codes = self.codes(offer)
+
+        self.assertEqual(codes.count(3), 1)
+        self.assertEqual(codes.count(51), 1)
+        self.assertEqual(codes.count(15), 1)
+        self.assertEqual(offer.option(3).data, [ip_address('10.1.0.1')])
+        self.assertEqual(offer.option(51).data, 600)
+
+    def test_blobs_per_scope(self):
+        offer = self.offer(client_mac(1), 3, 15)
+        self.assertEqual(offer.option(3).data, [ip_address('10.0.0.1')])
+        self.assertEqual(self.codes(offer).count(3), 1)
+
+        relayed = self.offer(client_mac(2), 3, 15, giaddr=RELAY)
+        self.assertEqual(relayed.option(3).data, [ip_address('10.1.0.1')])
+
+        self.assertEqual(list(self.server.scopes.default.option_blobs), [b'\x03\x0f'])
+        self.assertEqual(list(self.scope.option_blobs), [b'\x03\x0f'])
+        self.assertNotEqual(self.server.scopes.default.option_blobs[b'\x03\x0f'], self.scope.option_blobs[b'\x03\x0f'])
+
+    def test_blobs_dropped_on_register(self):
+        self.offer(client_mac(1), 3, 15, giaddr=RELAY)
+        self.scope.register(Options.DomainName(b'branch.example.com'))
+        self.assertEqual(self.scope.option_blobs, dict())
+
+        offer = self.offer(client_mac(2), 3, 15, giaddr=RELAY)
+        self.assertEqual(offer.option(15).data, b'branch.example.com')
+        self.assertEqual(self.codes(offer).count(15), 1)
+
+    def test_scope_lease_time(self):
+        self.dhcp.bind(client_mac(1), 1, Options.ParameterRequestList(3))
+        lease = self.server.leases.get(client_mac(1), b'')
+
+        relayed = client_mac(2)
+        offer = self.dhcp.send(relayed, Options.DHCPMessageType(1), giaddr=RELAY)
+        self.dhcp.send(relayed, Options.DHCPMessageType(3), Options.RequestedIP(offer.yiaddr),
+                       Options.DHCPServerID(self.server.server_ip), giaddr=RELAY)
+        scoped = self.server.leases.get(relayed, b'')
+
+        # Both leases were made within the test, 3600 and 600 seconds from now
+        self.assertAlmostEqual(lease.expires - scoped.expires, 3000, delta=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import random
+import unittest
+from ipaddress import ip_address
+from struct import unpack
+
+from RawPacket import Ethernet, IPv4, UDP, MAC_Address, checksum
+from Services.DHCP import Options
+from Services.DHCP.Packet import DHCPPacket
+from Services.DHCP.Template import ReplyTemplate
+
+SERVER_MAC = MAC_Address('02:00:00:00:00:01')
+SERVER_IP = ip_address('10.0.0.1')
+CLIENT = MAC_Address('02:11:22:33:44:55')
+BROADCAST_MAC = MAC_Address('FF:FF:FF:FF:FF:FF')
+
+
+def word_checksum(data):
+    # The Internet checksum one 2 byte word at a time, as RawPacket used to work it out
+    if len(data) % 2:
+        data = data + b'\x00'
+
+    out = sum(unpack(f'! {len(data) // 2}H', data))
+    while out > 0xffff:
+        out = (out & 0xffff) + (out >> 16)
+
+    return -out % 0xffff or 0xffff
+
+
+class ChecksumTest(unittest.TestCase):
+    def test_against_word_sum(self):
+        rng = random.Random(7)
+        for length in list(range(0, 64)) + [575, 576, 1499, 1500]:
+            data = bytes(rng.randrange(256) for _ in range(length))
+            self.assertEqual(checksum(data), word_checksum(data), length)
+
+    def test_sums_to_zero(self):
+        # One's complement sums of 0xffff give 0, which is sent as 0xffff
+        for data in (b'', b'\xff\xff', b'\xff\x00\x00\xff', b'\x12\x34\xed\xcb'):
+            self.assertEqual(checksum(data), 0xffff)
+            self.assertEqual(checksum(data), word_checksum(data))
+
+    def test_memoryview(self):
+        data = bytearray(b'\x45\x00\x01\x48\x00')
+        self.assertEqual(checksum(memoryview(data)), word_checksum(bytes(data)))
+
+
+class ReplyTemplateTest(unittest.TestCase):
+    # Every reply is checked against the same reply built the old way,
+    # from DHCPPacket / UDP / IPv4 / Ethernet objects and calc_checksum().
+
+    server_options = [Options.DHCPServerID(SERVER_IP), Options.IPLeaseTime(3600), Options.Subnet('255.255.255.0')]
+
+    def old_build(self, message_type, destination_mac, destination_ip, xid, yiaddr, chaddr,
+                  broadcast=False, hops=0, giaddr=None, options=(), port=68):
+        packet = DHCPPacket(op=2, xid=xid, broadcast=broadcast, hops=hops, _yiaddr=yiaddr, _siaddr=SERVER_IP,
+                            _giaddr=0 if giaddr is None else giaddr, _chaddr=chaddr)
+        packet.options.extend([Options.DHCPMessageType(message_type), *self.server_options, *options, Options.End()])
+
+        udp = UDP(67, port, packet.build())
+        eth = Ethernet(destination_mac, SERVER_MAC, IPv4(SERVER_IP, destination_ip, udp))
+        eth.calc_checksum()
+        return eth.build()
+
+    def compare(self, message_type, *args, options=(), port=None, **kwargs):
+        template = ReplyTemplate(message_type, SERVER_MAC, SERVER_IP, 67, 68, self.server_options)
+        requested = b''.join(option.pack() for option in options)
+        frame = template.build(*args, options=requested, port=port, **kwargs)
+
+        self.assertEqual(frame, self.old_build(message_type, *args, options=options,
+                                               port=68 if port is None else port, **kwargs))
+        return frame
+
+    def test_broadcast_offer(self):
+        self.compare(2, BROADCAST_MAC, ip_address('255.255.255.255'), 0x1234, ip_address('10.0.0.9'), CLIENT,
+                     broadcast=True)
+
+    def test_unicast_ack(self):
+        self.compare(5, CLIENT, ip_address('10.0.0.9'), 0xdeadbeef, ip_address('10.0.0.9'), CLIENT,
+                     options=[Options.Router('10.0.0.1'), Options.DNSServers('10.0.0.1', '10.0.0.2')])
+
+    def test_relayed(self):
+        giaddr = ip_address('10.1.0.1')
+        self.compare(5, MAC_Address('02:00:00:00:00:99'), giaddr, 7, ip_address('10.1.0.9'), CLIENT,
+                     hops=2, giaddr=giaddr, port=67)
+
+    def test_odd_lengths(self):
+        # DomainName options of every length make the UDP payload both odd and even sized
+        sizes = set()
+        for length in range(1, 12):
+            frame = self.compare(2, CLIENT, ip_address('10.0.0.9'), length, ip_address('10.0.0.9'), CLIENT,
+                                 options=[Options.DomainName(b'x' * length)])
+            sizes.add(len(frame[42:]) % 2)
+
+            # Checksums of the headers check out
+            ip = Ethernet.disassemble(frame).payload
+            self.assertEqual(ip.length, len(frame) - 14)
+            self.assertEqual(word_checksum(frame[14:34]), 0xffff)
+            pseudo_header = frame[26:34] + b'\x00\x11' + frame[38:40]
+            self.assertEqual(word_checksum(pseudo_header + frame[34:]), 0xffff)
+
+        self.assertEqual(sizes, {0, 1})
+
+    def test_random(self):
+        rng = random.Random(11)
+        for _ in range(50):
+            broadcast = rng.random() < 0.5
+            yiaddr = ip_address(f'10.0.{rng.randrange(256)}.{rng.randrange(1, 255)}')
+            options = [Options.DomainName(bytes(rng.randrange(97, 123) for _ in range(rng.randrange(1, 40))))
+                       for _ in range(rng.randrange(3))]
+            self.compare(rng.choice((2, 5)), BROADCAST_MAC if broadcast else CLIENT,
+                         ip_address('255.255.255.255') if broadcast else yiaddr, rng.randrange(1 << 32),
+                         yiaddr, MAC_Address(rng.randbytes(6)), broadcast=broadcast, options=options)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from Services.DHCP.GarbageCollection import TimerWheel
+
+
+class TimerWheelTest(unittest.TestCase):
+    # Random inserts, cancels, reschedules and jumps of the clock, checked against
+    # a dict of key -> deadline. Few slots per level, so timers cascade down often.
+
+    def test_against_model(self):
+        rng = random.Random(5227)
+
+        for _ in range(40):
+            wheel = TimerWheel(resolution=1, bits=3, levels=4)
+            clock = [0]
+            wheel.now = lambda: clock[0]
+            deadlines = dict()  # Keys will be the timer key, values the tick it expires on
+
+            for _ in range(500):
+                key = rng.randint(0, 30)
+                delay = rng.choice((1, 2, 7, 8, 9, 63, 64, 65, 511, 600, 4000))
+                action = rng.random()
+
+                if action < 0.3:
+                    wheel.insert(delay, None, key=key)
+                    deadlines[key] = clock[0] + delay
+                elif action < 0.4:
+                    self.assertEqual(wheel.cancel(key), key in deadlines)
+                    deadlines.pop(key, None)
+                elif action < 0.5:
+                    self.assertEqual(wheel.reschedule(key, delay), key in deadlines)
+                    if key in deadlines:
+                        deadlines[key] = clock[0] + delay
+                else:
+                    before = clock[0]
+                    clock[0] = clock[0] + rng.choice((1, 1, 1, 5, 8, 64, 300))
+
+                    # Every timer due in (before, now] expires, and no other
+                    expected = {key for key, deadline in deadlines.items() if deadline <= clock[0]}
+                    expired = wheel.advance()
+                    self.assertEqual({timer.key for timer in expired}, expected)
+                    for timer in expired:
+                        self.assertGreater(deadlines.pop(timer.key), before)
+
+                self.assertEqual(len(wheel), len(deadlines))
+                self.assertEqual(sum(wheel.counts), len(deadlines))
+                self.assertEqual(key in wheel, key in deadlines)
+
+    def test_next_expiry(self):
+        wheel = TimerWheel(resolution=1, bits=3, levels=4)
+        clock = [0]
+        wheel.now = lambda: clock[0]
+        self.assertIsNone(wheel.next_expiry())
+
+        wheel.insert(100, None, key='late')
+        # Nothing in the lowest level, the wheel needs attention when it wraps
+        self.assertEqual(wheel.next_expiry(), 8)
+
+        wheel.insert(3, None, key='soon')
+        self.assertEqual(wheel.next_expiry(), 3)
+
+        # Never waking past a timer's tick, the timer expires right on it
+        while wheel.timers:
+            clock[0] = wheel.tick + wheel.next_expiry()
+            for timer in wheel.advance():
+                self.assertEqual(clock[0], {'soon': 3, 'late': 100}[timer.key])
+
+
+if __name__ == '__main__':
+    unittest.main()